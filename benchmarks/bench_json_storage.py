@@ -0,0 +1,137 @@
+"""
+Benchmark uložení news_data: db.JSON vs. CompressedJSON (zlib / zstd).
+
+Pro každý typ sloupce vytvoří samostatnou SQLite databázi, vloží do ní stejné syntetické
+požadavky (texty článků jako z newspaper3k) a změří velikost souboru, čas zápisu
+a čas čtení celých řádků i jen stavu (bez news_data).
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_json_storage --rows 500
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    insert,
+    select,
+)
+
+from flask_app.database import CompressedJSON, zstandard
+from flask_app.utils.lexicon_rating import FINANCIAL_LEXICON
+
+FILLER_WORDS = (
+    "the company said on tuesday that its quarterly results were in line with analyst "
+    "expectations while investors waited for guidance about the next fiscal year and market"
+).split()
+
+
+def make_article(rng: random.Random, paragraphs: int = 8) -> dict:
+    """Vytvoří syntetický článek podobné délky a slovní zásoby jako skutečné zprávy."""
+    vocabulary = FILLER_WORDS * 4 + list(FINANCIAL_LEXICON)
+    content = "\n\n".join(
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(60, 120))).capitalize() + "."
+        for _ in range(paragraphs)
+    )
+    return {
+        "title": " ".join(rng.choice(vocabulary) for _ in range(8)).capitalize(),
+        "url": f"https://example.com/news/{rng.randrange(10**9)}",
+        "publishedAt": "2025-03-04T12:00:00Z",
+        "source": "Example News",
+        "content": content,
+    }
+
+
+def make_news_data(rng: random.Random, companies: int = 3, articles: int = 5) -> str:
+    """news_data ve stejném tvaru, jaký ukládá process_request (JSON řetězec)."""
+    results = [
+        {"company": f"Company {idx}", "articles": [make_article(rng) for _ in range(articles)]}
+        for idx in range(companies)
+    ]
+    return json.dumps(results)
+
+
+def run_case(name, column_type, rows, directory):
+    path = os.path.join(directory, f"{name}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = MetaData()
+    table = Table(
+        "request_data",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("status", String(20)),
+        Column("news_data", column_type),
+    )
+    metadata.create_all(engine)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for news_data in rows:
+            conn.execute(insert(table).values(status="done", news_data=news_data))
+    write_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        loaded = conn.execute(select(table)).all()
+    read_time = time.perf_counter() - started
+    assert [row.news_data for row in loaded] == rows
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(select(table.c.id, table.c.status)).all()
+    status_time = time.perf_counter() - started
+
+    engine.dispose()
+    return {
+        "name": name,
+        "size_kb": os.path.getsize(path) / 1024,
+        "write_ms": write_time * 1000 / len(rows),
+        "read_ms": read_time * 1000 / len(rows),
+        "status_ms": status_time * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark komprimovaného JSON sloupce")
+    parser.add_argument("--rows", type=int, default=200, help="Počet požadavků")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [make_news_data(rng) for _ in range(args.rows)]
+    raw_size = sum(len(row.encode("utf-8")) for row in rows) / 1024
+
+    cases = [("json", JSON()), ("zlib-1", CompressedJSON("zlib", level=1))]
+    cases.append(("zlib-6", CompressedJSON("zlib", level=6)))
+    if zstandard is not None:
+        cases.append(("zstd-3", CompressedJSON("zstd", level=3)))
+    else:
+        print("[INFO] Balíček zstandard není nainstalován, zstd se neměří.")
+
+    print(f"Požadavků: {args.rows}, velikost news_data: {raw_size:.0f} KiB")
+    print(
+        f"{'typ':<8} {'DB [KiB]':>10} {'zápis/řádek [ms]':>18} "
+        f"{'čtení/řádek [ms]':>18} {'jen stav [ms]':>15}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, column_type in cases:
+            result = run_case(name, column_type, rows, directory)
+            print(
+                f"{result['name']:<8} {result['size_kb']:>10.0f} {result['write_ms']:>18.3f} "
+                f"{result['read_ms']:>18.3f} {result['status_ms']:>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark paměti process_request: streamované zpracování po společnostech vs. sběr všech výsledků.
+
+Každý režim běží v samostatném procesu (čisté maximum RSS) nad dočasnou SQLite databází.
+Zprávy a texty článků jsou syntetické (NewsAPI a stahování se nahradí), hodnotí se lokálně
+(RATING_MODE=local), takže benchmark nepotřebuje síť ani API klíče.
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_process_memory --companies 40 --articles 50
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from benchmarks.bench_json_storage import make_article
+
+
+def run_child(companies: int, articles: int, seed: int) -> dict:
+    """Jeden běh process_request v aktuálním procesu (konfigurace je už v proměnných prostředí)."""
+    from flask_app.app import app, db
+    from flask_app.models import RequestData
+    from flask_app.tasks import process_request
+    from flask_app.utils.memory import peak_rss_bytes
+
+    rng = random.Random(seed)
+    texts = {}
+
+    def get_everything(q, **kwargs):
+        items = []
+        for _ in range(articles):
+            article = make_article(rng, paragraphs=rng.randint(8, 40))
+            texts[article["url"]] = article.pop("content")
+            article["source"] = {"name": article["source"]}
+            items.append(article)
+        return {"articles": items}
+
+    def download(url, timeout=None):
+        return texts.pop(url, "")
+
+    with app.app_context():
+        db.create_all()
+        request_data = RequestData(
+            status="pending",
+            input_data=[
+                {"name": f"Company {idx}", "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"}
+                for idx in range(companies)
+            ],
+        )
+        db.session.add(request_data)
+        db.session.commit()
+        request_id = request_data.id
+
+    baseline = peak_rss_bytes()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with patch("flask_app.tasks.newsapi.get_everything", side_effect=get_everything), patch(
+        "flask_app.tasks.download_article_text", side_effect=download
+    ):
+        process_request(request_id, app)
+    duration = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        status = request_data.status
+    return {
+        "status": status,
+        "duration_s": duration,
+        "peak_rss_mb": peak_rss_bytes() / 2**20,
+        "rss_growth_mb": (peak_rss_bytes() - baseline) / 2**20,
+        "traced_peak_mb": traced_peak / 2**20,
+    }
+
+
+def run_case(streaming: bool, args, directory: str) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(directory, f'streaming-{int(streaming)}.db')}",
+        PROCESS_STREAMING="1" if streaming else "0",
+        RATING_MODE="local",
+        DAILY_SENTIMENT_CACHE="0",
+        NEAR_DUPLICATE_DETECTION="0",
+        MAINTENANCE_INTERVAL_SECONDS="0",
+        CACHE_WARM_INTERVAL_SECONDS="0",
+        JOB_RECOVER_ON_START="0",
+    )
+    output = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_process_memory", "--child",
+            "--companies", str(args.companies), "--articles", str(args.articles),
+            "--seed", str(args.seed),
+        ],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark paměti process_request")
+    parser.add_argument("--companies", type=int, default=20, help="Počet společností v požadavku")
+    parser.add_argument("--articles", type=int, default=30, help="Počet článků na společnost")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.companies, args.articles, args.seed)))
+        return
+
+    print(f"Společností: {args.companies}, článků na společnost: {args.articles}")
+    print(
+        f"{'režim':<10} {'stav':<6} {'čas [s]':>8} {'max RSS [MiB]':>14} "
+        f"{'nárůst RSS [MiB]':>17} {'tracemalloc [MiB]':>18}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, streaming in (("sběr", False), ("stream", True)):
+            result = run_case(streaming, args, directory)
+            print(
+                f"{name:<10} {result['status']:<6} {result['duration_s']:>8.2f} "
+                f"{result['peak_rss_mb']:>14.1f} {result['rss_growth_mb']:>17.1f} "
+                f"{result['traced_peak_mb']:>18.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark výpisu požadavků (/output): stránkování podle klíče (kurzor) vs. LIMIT/OFFSET.
+
+Vytvoří samostatnou SQLite databázi s `--rows` požadavky (rovnoměrně rozložené stavy a časy),
+pak změří čas první stránky a stránky hluboko ve výpisu - jednou přes list_requests s kurzorem,
+jednou stejným dotazem s OFFSET. Cena stránky s kurzorem nezávisí na její pozici.
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_request_listing --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import insert, select
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.request_listing import encode_cursor, list_requests
+
+STATUSES = ("pending", "processing", "done", "done", "done", "cancelled", "error")
+
+
+def fill(rows: int, batch: int = 50000) -> None:
+    """Vloží syntetické požadavky (jen sloupce potřebné pro výpis)."""
+    rng = random.Random(0)
+    now = time.time()
+    for start in range(0, rows, batch):
+        db.session.execute(
+            insert(RequestData),
+            [
+                {
+                    "status": rng.choice(STATUSES),
+                    "created_at": now - (rows - idx) * 1.5,
+                    "updated_at": now - (rows - idx),
+                    "priority": 1,
+                    "attempts": 0,
+                }
+                for idx in range(start, min(rows, start + batch))
+            ],
+        )
+        db.session.commit()
+
+
+def timed(callable_, repeat: int = 5) -> float:
+    """Nejlepší čas z `repeat` opakování v milisekundách."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        callable_()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def offset_page(status: str, offset: int, limit: int) -> list:
+    """Stejná stránka se stejnými sloupci přes LIMIT/OFFSET (pro porovnání)."""
+    return db.session.execute(
+        select(
+            RequestData.id,
+            RequestData.status,
+            RequestData.created_at,
+            RequestData.updated_at,
+            RequestData.started_at,
+            RequestData.priority,
+            RequestData.client_key,
+            RequestData.attempts,
+            RequestData.cost,
+            RequestData.worker_id,
+        )
+        .where(RequestData.status == status, RequestData.created_at.is_not(None))
+        .order_by(RequestData.created_at.desc(), RequestData.id.desc())
+        .offset(offset)
+        .limit(limit)
+    ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark výpisu požadavků s kurzorem")
+    parser.add_argument("--rows", type=int, default=200000, help="Počet požadavků v DB")
+    parser.add_argument("--limit", type=int, default=50, help="Velikost stránky")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            fill(args.rows)
+            print(f"Požadavků: {args.rows}, vloženo za {time.perf_counter() - started:.1f} s")
+
+            status = "done"
+            total = db.session.query(RequestData).filter(RequestData.status == status).count()
+            deep = int(total * 0.9)
+            row = offset_page(status, deep - 1, 1)[0]
+            cursor = encode_cursor(row.created_at, row.id)
+            assert [item["request_id"] for item in list_requests([status], limit=args.limit, cursor=cursor)["requests"]] == [
+                item.id for item in offset_page(status, deep, args.limit)
+            ]
+
+            print(f"{'stránka':<24}{'kurzor (ms)':>14}{'OFFSET (ms)':>14}")
+            for label, offset, page_cursor in (("první", 0, None), (f"od {deep}. záznamu", deep, cursor)):
+                keyset = timed(lambda: list_requests([status], limit=args.limit, cursor=page_cursor))
+                offset_ms = timed(lambda: offset_page(status, offset, args.limit))
+                print(f"{label:<24}{keyset:>14.2f}{offset_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
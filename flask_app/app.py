@@ -1,15 +1,128 @@
 import json
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+    redirect,
+    send_file,
+    stream_with_context,
+    url_for,
+)
+from sqlalchemy import update
 from flask_app.database import db, init_db
 from flask_app.models import RequestData
-from flask_app.tasks import process_request
-from flask_app.config import ALLOWED_COMPANIES_IN_UI
+from flask_app.job_queue import process_job, resume_pending_jobs
+from flask_app.scheduler import (
+    JobScheduler,
+    get_queue_stats,
+    job_cost,
+    job_from_request,
+    parse_priority,
+)
+from flask_app.bulk_submit import bulk_submit, iter_ndjson_lines
+from flask_app.cache_warmer import CacheWarmer, get_warm_stats
+from flask_app.batch_rating import BatchRatingThread, drop_queued_items, get_batch_stats
+from flask_app.maintenance import TERMINAL_STATUSES, MaintenanceThread
+from flask_app.profiling import (
+    format_profile,
+    init_profiling,
+    is_admin,
+    list_profiles,
+    profile_path,
+    resolve_profile_dir,
+)
+from flask_app.webhooks import WebhookDispatcher, validate_callback_url
+from flask_app.portfolio import PortfolioStore, get_history
+from flask_app.request_listing import list_requests
+from flask_app.utils.news_rating import get_rating_stats
+from flask_app.utils.domain_health import DOMAIN_HEALTH
+from flask_app.utils.rating_aggregation import aggregate_ratings, default_options, parse_source_weights
+from flask_app.daily_sentiment import company_key, load_article_ratings
+from flask_app.config import (
+    ALLOWED_COMPANIES_IN_UI,
+    JOB_QUEUE_MODE,
+    JOB_RECOVER_ON_START,
+    MAINTENANCE_INTERVAL_SECONDS,
+    PROFILING,
+    RATING_BATCH_POLL_SECONDS,
+    RATING_MODE,
+    REQUEST_DEADLINE_SECONDS,
+    REQUEST_DEADLINE_MAX_SECONDS,
+    STATUS_WAIT_MAX_SECONDS,
+    STATUS_WAIT_POLL_SECONDS,
+    WEB_BACKGROUND_TASKS,
+)
 import threading
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta, timezone
 
 
 app = Flask(__name__)
 init_db(app)
+init_profiling(app)
+
+# Plánovač úloh webového procesu - omezený počet vláken, pořadí podle priority a klientů
+scheduler = JobScheduler(app, runner=process_job)
+
+# Webhooky po dokončení požadavků (vlákno se spustí s prvním požadavkem s callbackem)
+webhooks = WebhookDispatcher(app)
+
+# Předehřívání cache pro obchodované společnosti (ALLOWED_COMPANIES_IN_UI)
+cache_warmer = CacheWarmer(app)
+
+# Úlohy na pozadí se spouští až v procesu, který je potřebuje (viz start_background_tasks),
+# import modulu (worker, jednorázové příkazy, testy) žádná vlákna nespouští
+_background_lock = threading.Lock()
+_background_started = False
+
+
+def start_background_tasks(web=True):
+    """
+    Spustí úlohy na pozadí (v jednom procesu nejvýše jednou) - obnovu nedokončených úloh, doručování
+    webhooků, předehřívání cache, údržbu DB a dávkové hodnocení.
+
+    Webový proces je spustí s prvním požadavkem (ASGI server při startu), worker jen s --background.
+    S WEB_BACKGROUND_TASKS=0 webový proces spouští jen obnovu úloh a webhooky, pravidelné úlohy
+    pak obstará jeden worker s --background.
+
+    Args:
+        web (bool): True ve webovém procesu, False ve workeru
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+
+    if web:
+        # Po restartu dokončí úlohy, které zůstaly ve stavu "pending"/"processing"
+        # (v režimu "queue" to dělají samostatné workery)
+        if JOB_QUEUE_MODE == "thread" and JOB_RECOVER_ON_START:
+            threading.Thread(target=resume_pending_jobs, args=(app, scheduler), daemon=True).start()
+        threading.Thread(target=webhooks.resume, daemon=True).start()
+        if not WEB_BACKGROUND_TASKS:
+            return
+    else:
+        # worker dokončuje požadavky sám - webhooky pro ně doručí hned
+        webhooks.start()
+
+    cache_warmer.start()
+
+    # Pravidelná údržba DB na pozadí (retence textů článků, archivace, uvolnění místa)
+    if MAINTENANCE_INTERVAL_SECONDS > 0:
+        MaintenanceThread(app).start()
+
+    # Dávkové hodnocení (/submit?batch=1) - odesílání dávek a zpracování jejich výsledků
+    if RATING_BATCH_POLL_SECONDS > 0:
+        BatchRatingThread(app).start()
+
+
+@app.before_request
+def start_background_on_first_request():
+    if not _background_started:
+        start_background_tasks()
 
 
 @app.route("/", methods=["GET"])
@@ -17,6 +130,55 @@ def index():
     return render_template("index.html")
 
 
+def _submit_options():
+    """
+    Načte společné parametry zadání požadavku (/submit i /submit/bulk).
+
+    Returns:
+        Tuple[dict, Optional[Response]]: ({"deadline_seconds", "priority", "client_key", "callback_url",
+            "rating_batch"}, chybová odpověď 400 nebo None)
+    """
+    # deadline celeho pozadavku (od zacatku zpracovani, cekani ve fronte se nezapocitava)
+    deadline_param = request.args.get("deadline")
+    deadline_seconds = REQUEST_DEADLINE_SECONDS
+    if deadline_param is not None:
+        try:
+            deadline_seconds = float(deadline_param)
+        except ValueError:
+            deadline_seconds = 0
+        if not 0 < deadline_seconds < float("inf"):
+            return None, (jsonify({"error": "Invalid deadline parameter"}), 400)
+        deadline_seconds = min(deadline_seconds, REQUEST_DEADLINE_MAX_SECONDS)
+
+    # trida priority a klic klienta pro planovac
+    try:
+        priority = parse_priority(request.args.get("priority"))
+    except ValueError:
+        return None, (jsonify({"error": "Invalid priority parameter"}), 400)
+    client_key = (
+        request.headers.get("X-Client-Key")
+        or request.args.get("client")
+        or request.remote_addr
+        or "anonymous"
+    )[:64]
+
+    # URL, na kterou se po dokonceni posle vysledek (misto dotazovani na /status)
+    callback_url = request.args.get("callback")
+    if callback_url is not None:
+        try:
+            callback_url = validate_callback_url(callback_url)
+        except ValueError:
+            return None, (jsonify({"error": "Invalid callback parameter"}), 400)
+    return {
+        "deadline_seconds": deadline_seconds,
+        "priority": priority,
+        "client_key": client_key,
+        "callback_url": callback_url,
+        # hodnoceni pres Batch API - levnejsi, vysledek az po dokonceni davky (viz batch_rating)
+        "rating_batch": request.args.get("batch") == "1",
+    }, None
+
+
 @app.route("/submit", methods=["POST", "GET"])
 def submit():
     """
@@ -27,6 +189,15 @@ def submit():
     Pro GET:
     - Očekává URL parametr 'data' obsahující JSON řetězec
 
+    Volitelně (POST i GET):
+    - URL parametr 'deadline' - časový rozpočet zpracování v sekundách
+      (výchozí REQUEST_DEADLINE_SECONDS, max. REQUEST_DEADLINE_MAX_SECONDS)
+    - URL parametr 'priority' - třída priority high / normal (výchozí) / low
+    - hlavička 'X-Client-Key' (nebo URL parametr 'client') - klíč klienta pro férové dělení
+      kapacity, výchozí je IP adresa
+    - URL parametr 'callback' - http(s) URL, na kterou se po dokončení pošle POST s výsledkem
+      {"results": [{"request_id", "status", "sentiment_data"}]}
+
     Args:
         N/A (přijímá data přes request.json pro POST nebo request.args pro GET)
 
@@ -41,6 +212,8 @@ def submit():
             - Pokud chybí JSON data (POST)
             - Pokud chybí parametr 'data' (GET)
             - Pokud data nejsou validní JSON
+            - Pokud parametr 'deadline' není kladné číslo
+            - Pokud parametr 'priority' není známá třída
 
     Examples:
         POST request:
@@ -50,7 +223,8 @@ def submit():
         http://localhost:5000/submit?data={"key":"value"}
 
     Poznámky:
-        - Požadavek je zpracován asynchronně v background threadu
+        - Požadavek je zpracován asynchronně plánovačem webového procesu (JOB_QUEUE_MODE="thread"),
+          nebo ho z DB fronty převezme samostatný worker (JOB_QUEUE_MODE="queue")
         - Vytvoří nový záznam v DB se statusem 'pending'
         - Pro sledování stavu použijte /status endpoint s vráceným request_id
     """
@@ -69,18 +243,36 @@ def submit():
         except json.JSONDecodeError:
             return jsonify({"error": "Invalid JSON format"}), 400
 
+    # deadline, trida priority a klic klienta pro planovac
+    options, error = _submit_options()
+    if error:
+        return error
+
     print(f"[DEBUG] Přijatá data: {data}")
     # predani promenne "data" do tasks.py
     with app.app_context():
         new_request = RequestData(
-            status="pending", input_data=data
+            status="pending",
+            input_data=data,
+            deadline_seconds=options["deadline_seconds"],  # počítá se až od začátku zpracování
+            priority=options["priority"],
+            client_key=options["client_key"],
+            cost=job_cost(data),
+            callback_url=options["callback_url"],
+            callback_state="pending" if options["callback_url"] else None,
+            profile=request.args.get("profile") == "1" and is_admin(),
+            rating_batch=options["rating_batch"],
         )  # vytvoreni prvku v databazi
         db.session.add(new_request)  # pridani prvku do databaze
         db.session.commit()  # ulozeni zmen do databaze
         request_id = new_request.id  # ziskani ID noveho prvku v databazi
+        job = job_from_request(new_request)
 
-    # spusteni noveho vlakna s funkci process_request v tasks.py
-    threading.Thread(target=process_request, args=(request_id, app)).start()
+    # predani ulohy planovaci, ktery ji ve vlakne zabere z fronty a zpracuje (process_request v tasks.py)
+    if JOB_QUEUE_MODE == "thread":
+        scheduler.submit(job)
+    if options["callback_url"]:
+        webhooks.start()
 
     # pokud je metoda GET, presmeruje na /status endpoint s request_id
     if request.method == "GET":
@@ -90,11 +282,119 @@ def submit():
         return jsonify({"request_id": request_id})
 
 
+@app.route("/submit/bulk", methods=["POST"])
+def submit_bulk():
+    """
+    Hromadné zadání požadavků - tělo ve formátu NDJSON, jeden požadavek na řádek
+    (seznam společností jako u /submit, nebo jedna společnost {"name", "from", "to"}).
+
+    Tělo se čte a ukládá průběžně po dávkách, odpověď je také NDJSON:
+    {"line": <číslo řádku>, "request_id": <id>} nebo {"line": ..., "error": ...} pro každý řádek
+    a na konci {"done": true, "accepted": ..., "rejected": ...}.
+    Parametry deadline, priority, client a callback platí pro všechny požadavky.
+
+    Raises:
+        400 Bad Request: Neplatný parametr deadline nebo priority
+    """
+    options, error = _submit_options()
+    if error:
+        return error
+
+    enqueue = scheduler.submit if JOB_QUEUE_MODE == "thread" else None
+    if options["callback_url"]:
+        webhooks.start()
+    results = bulk_submit(iter_ndjson_lines(request.stream), options, enqueue=enqueue)
+    return Response(stream_with_context(results), mimetype="application/x-ndjson")
+
+
+def _parse_wait_param(value):
+    """
+    Převede parametr ?wait= (sekundy long pollingu) na číslo omezené STATUS_WAIT_MAX_SECONDS.
+
+    Raises:
+        ValueError: Pokud hodnota není nezáporné číslo
+    """
+    if value is None:
+        return 0.0
+    wait = float(value)
+    if not wait >= 0:  # zachytí i NaN
+        raise ValueError("Invalid wait parameter")
+    return min(wait, STATUS_WAIT_MAX_SECONDS)
+
+
+@app.route("/output", methods=["GET"])
+def list_output():
+    """
+    Vypíše požadavky od nejnovějších s filtrem podle stavu a času (bez vstupních a výstupních dat).
+
+    URL parametry (všechny volitelné):
+        status: stav nebo více stavů oddělených čárkou (např. pending,processing)
+        from, to: období - unix timestamp nebo ISO datum/čas (datum bez času u "to" = celý den)
+        sort: "created" (čas vytvoření, výchozí) nebo "updated" (čas poslední změny) - podle něj
+            se řadí i filtruje období
+        limit: počet záznamů na stránce (výchozí 50, nejvýše 500)
+        cursor: kurzor další stránky (next_cursor z předchozí odpovědi)
+
+    Returns:
+        JSON: {"requests": [{"request_id", "status", "created_at", "updated_at", ...}], "next_cursor"}
+
+    Raises:
+        400 Bad Request: Neznámý stav nebo řazení, neplatný čas, počet nebo kurzor
+    """
+    statuses = [status for status in request.args.get("status", "").split(",") if status]
+    limit = request.args.get("limit", "50")
+    if not limit.isdigit() or int(limit) <= 0:
+        return jsonify({"error": "Invalid limit parameter"}), 400
+    try:
+        since = _parse_time_param(request.args.get("from"))
+        until = _parse_time_param(request.args.get("to"), end_of_day=True)
+    except ValueError:
+        return jsonify({"error": "Invalid time format"}), 400
+
+    with app.app_context():
+        try:
+            page = list_requests(
+                statuses=statuses,
+                since=since,
+                until=until,
+                sort=request.args.get("sort", "created"),
+                limit=int(limit),
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError as e:
+            return jsonify({"error": "Invalid listing parameters", "detail": str(e)}), 400
+    return jsonify(page)
+
+
 @app.route("/output/<int:request_id>/status", methods=["GET"])
 def get_status(request_id):
+    """
+    Vrátí stav požadavku.
+
+    URL parametry:
+        wait: volitelně počet sekund, po které se čeká na dokončení požadavku (long polling,
+            nejvýše STATUS_WAIT_MAX_SECONDS) - odpověď přijde hned po dokončení nebo po uplynutí doby
+
+    Returns:
+        JSON: {"request_id", "status"}
+    """
+    try:
+        wait = _parse_wait_param(request.args.get("wait"))
+    except ValueError:
+        return jsonify({"error": "Invalid wait parameter"}), 400
+
     with app.app_context():
         # vezme data z databáze k IDcku v URL a printne status zpracovani
         request_data = db.session.get(RequestData, request_id)
+        wait_until = time.monotonic() + wait
+        while (
+            request_data is not None
+            and request_data.status not in TERMINAL_STATUSES
+            and time.monotonic() < wait_until
+        ):
+            time.sleep(min(STATUS_WAIT_POLL_SECONDS, max(0.0, wait_until - time.monotonic())))
+            db.session.rollback()  # konec transakce - další čtení uvidí změny ostatních vláken
+            request_data = db.session.get(RequestData, request_id)
         if not request_data:
             return jsonify({"error": "Request not found"}), 404
         return jsonify(
@@ -105,6 +405,191 @@ def get_status(request_id):
         )
 
 
+@app.route("/output/<int:request_id>/cancel", methods=["POST"])
+def cancel_request(request_id):
+    """
+    Zruší čekající nebo běžící požadavek.
+
+    - Čekající požadavek (i požadavek čekající na dávkové hodnocení) se rovnou označí jako "cancelled".
+    - Běžícímu požadavku se nastaví příznak zrušení, zpracování ho zaznamená při další kontrole,
+      přeruší stahování i hodnocení a skončí ve stavu "cancelled".
+
+    Returns:
+        JSON: {"request_id": <id>, "status": "cancelled" | "cancelling"}
+
+    Raises:
+        404 Not Found: Požadavek neexistuje
+        409 Conflict: Požadavek už je dokončený
+    """
+    with app.app_context():
+        # podminene UPDATE - stav se mezitim mohl zmenit ve workeru
+        cancelled = db.session.execute(
+            update(RequestData)
+            .where(RequestData.id == request_id, RequestData.status.in_(["pending", "rating"]))
+            .values(status="cancelled", cancel_requested=True)
+        ).rowcount
+        if cancelled:
+            drop_queued_items(request_id)  # už odeslané položky se zahodí po dokončení dávky
+        cancelling = 0
+        if not cancelled:
+            cancelling = db.session.execute(
+                update(RequestData)
+                .where(RequestData.id == request_id, RequestData.status == "processing")
+                .values(cancel_requested=True)
+            ).rowcount
+        db.session.commit()
+
+        if cancelled:
+            return jsonify({"request_id": request_id, "status": "cancelled"})
+        if cancelling:
+            return jsonify({"request_id": request_id, "status": "cancelling"}), 202
+
+        request_data = db.session.get(RequestData, request_id)
+        if not request_data:
+            return jsonify({"error": "Request not found"}), 404
+        return (
+            jsonify({"error": "Request already finished", "status": request_data.status}),
+            409,
+        )
+
+
+@app.route("/queue/stats", methods=["GET"])
+def queue_stats():
+    """
+    Vrátí stav fronty úloh podle tříd priority.
+
+    Returns:
+        JSON: {"mode": ..., "db": {...}, "scheduler": {...}, "rating": {...}, "batch": {...},
+            "domains": {...}}
+            - db: čekající a zpracovávané úlohy v DB a doba čekání za poslední hodinu (všechny procesy)
+            - scheduler: fronta plánovače tohoto webového procesu (jen v režimu "thread")
+            - rating: volání OpenAI tohoto procesu - úspěšnost a podíl doplňovaných hodnocení
+            - batch: položky a dávky dávkového hodnocení podle stavu (všechny procesy)
+            - domains: jističe domén článků tohoto procesu - stav, úspěšnost a latence stahování
+    """
+    with app.app_context():
+        stats = {
+            "mode": JOB_QUEUE_MODE,
+            "db": get_queue_stats(),
+            "rating": get_rating_stats(),
+            "batch": get_batch_stats(),
+            "domains": DOMAIN_HEALTH.stats(),
+        }
+    if JOB_QUEUE_MODE == "thread":
+        stats["scheduler"] = scheduler.stats()
+    return jsonify(stats)
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """
+    Vrátí čerstvost předehřáté cache pro společnosti z ALLOWED_COMPANIES_IN_UI.
+
+    Returns:
+        JSON: {"db": {...}, "warmer": {...}}
+            - db: počet spočítaných dní okna a stáří posledního výpočtu pro každou společnost
+            - warmer: poslední běhy předehřívání tohoto procesu
+    """
+    with app.app_context():
+        stats = {"db": get_warm_stats()}
+    stats["warmer"] = cache_warmer.stats()
+    return jsonify(stats)
+
+
+@app.route("/ratings/<company>", methods=["GET"])
+def company_ratings(company):
+    """
+    Přepočítá hodnocení společnosti z uložených hodnocení článků (bez volání OpenAI).
+
+    URL parametry (všechny volitelné, výchozí hodnoty z configu):
+        from, to: období (YYYY-MM-DD, včetně)
+        mode: režim hodnocení (výchozí RATING_MODE)
+        half_life: poločas útlumu podle stáří článku ve dnech (0 = bez útlumu, stáří vůči konci období)
+        weights: váhy zdrojů zpráv, např. "Reuters=2,Bloomberg=1.5"
+        trim: podíl ořezu nejnižších a nejvyšších hodnocení na každé straně (0 až 0.5)
+
+    Returns:
+        JSON: {"company", "from", "to", "rating_mode", "count", "mean", "rating", "options"}
+
+    Raises:
+        400 Bad Request: Neplatné datum nebo parametr agregace
+    """
+    date_from, date_to = request.args.get("from"), request.args.get("to")
+    try:
+        for value in (date_from, date_to):
+            if value is not None and (len(value) != 10 or not date.fromisoformat(value)):
+                raise ValueError("Datum musí být ve tvaru YYYY-MM-DD")
+        options = default_options()
+        if "half_life" in request.args:
+            options["half_life_days"] = float(request.args["half_life"])
+        if "trim" in request.args:
+            options["trim"] = float(request.args["trim"])
+        if "weights" in request.args:
+            options["source_weights"] = parse_source_weights(request.args["weights"])
+        if not (options["half_life_days"] >= 0 and 0 <= options["trim"] <= 0.5):
+            raise ValueError("Parametr agregace mimo rozsah")
+    except ValueError:
+        return jsonify({"error": "Invalid aggregation parameters"}), 400
+
+    rating_mode = request.args.get("mode", RATING_MODE)
+    with app.app_context():
+        stored = load_article_ratings(company_key(company), rating_mode, date_from, date_to)
+    # stáří článků se počítá vůči konci období (bez "to" vůči nejnovějšímu článku)
+    reference = (
+        datetime.combine(date.fromisoformat(date_to) + timedelta(days=1), datetime.min.time(), timezone.utc).timestamp()
+        if date_to
+        else None
+    )
+    return jsonify(
+        {
+            "company": company,
+            "from": date_from,
+            "to": date_to,
+            "rating_mode": rating_mode,
+            "count": len(stored["ratings"]),
+            "mean": aggregate_ratings(stored["ratings"]),
+            "rating": aggregate_ratings(
+                stored["ratings"], stored["published"], stored["sources"], reference=reference, **options
+            ),
+            "options": options,
+        }
+    )
+
+
+@app.route("/admin/profiles", methods=["GET"])
+def admin_profiles():
+    """
+    Vypíše uložené profily (od nejnovějšího). Vyžaduje hlavičku X-Admin-Token.
+
+    Returns:
+        JSON: {"profiling": <režim>, "profiles": [{"name", "size", "created_at"}]}
+    """
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({"profiling": PROFILING, "profiles": list_profiles(resolve_profile_dir())})
+
+
+@app.route("/admin/profiles/<name>", methods=["GET"])
+def admin_profile(name):
+    """
+    Stáhne profil (binární pstats, otevře ho např. snakeviz nebo pstats),
+    s ?format=text vrátí textový výpis nejnáročnějších funkcí (?sort=cumulative|tottime, ?limit=50).
+    Vyžaduje hlavičku X-Admin-Token.
+    """
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    path = profile_path(resolve_profile_dir(), name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "text":
+        sort_by = request.args.get("sort", "cumulative")
+        if sort_by not in ("cumulative", "tottime", "calls"):
+            return jsonify({"error": "Invalid sort parameter"}), 400
+        limit = request.args.get("limit", default=50, type=int)
+        return Response(format_profile(path, sort_by, limit), mimetype="text/plain")
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=name)
+
+
 @app.route("/output/<int:request_id>/all", methods=["GET"])
 def get_all_request_data(request_id):
     with app.app_context():
@@ -142,11 +627,8 @@ def get_output(request_id):
 # Předdefinované společnosti
 ALLOWED_COMPANIES = ALLOWED_COMPANIES_IN_UI
 
-# Paměťová proměnná pro stav akcií (inicializováno jako "žádné změny" s časem "Nikdy")
-stock_data = {
-    company: {"status": "žádné změny", "updated_at": "Nikdy"}
-    for company in ALLOWED_COMPANIES
-}
+# Stav akcií je sdílený v DB (inicializováno jako "žádné změny" s časem "Nikdy"), proces si drží jen cache
+portfolio = PortfolioStore(ALLOWED_COMPANIES)
 
 
 @app.route("/UI", methods=["GET", "POST"])
@@ -165,47 +647,89 @@ def ui_page():
         except (json.JSONDecodeError, ValueError, TypeError):
             return jsonify({"error": "Invalid JSON format"}), 400
 
+        updates = []
         for entry in data:
             if not isinstance(entry, dict):
                 return jsonify({"error": "Invalid data format"}), 400
 
             company_name = entry.get("name")
             status = entry.get("status")
-            # přiřazení statusu a času změny akcií
+            # přiřazení statusu akcií (čas změny doplní PortfolioStore)
             if company_name in ALLOWED_COMPANIES and status in [0, 1]:
-                stock_data[company_name]["status"] = (
-                    "nakoupeno" if status == 1 else "prodáno"
-                )
-                stock_data[company_name]["updated_at"] = datetime.now().strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
+                updates.append((company_name, int(status)))
+
+        # všechny změny (stav i log událostí) se uloží jednou transakcí
+        portfolio.update(updates)
 
         return jsonify({"message": "Data updated successfully"})
 
-    # Odpověď ve formátu JSON pokud je požadováno
+    # Odpověď ve formátu JSON pokud je požadováno, jinak HTML stránka. Obojí se sestaví
+    # jen jednou pro každou verzi portfolia, ETag je číslo verze (klient s ním dostane 304).
     if request.headers.get("Accept") == "application/json":
-        return jsonify(
-            {
-                "stocks": [
-                    {
-                        "company": company,
-                        "status": data["status"],
-                        "updated_at": data["updated_at"],
-                    }
-                    for company, data in stock_data.items()
-                ]
-            }
-        )
+        kind, mimetype = "json", "application/json"
+        build = lambda stocks: jsonify({"stocks": stocks}).get_data()
+    else:
+        kind, mimetype = "html", "text/html; charset=utf-8"
+        build = lambda stocks: render_template("ui.html", data={"stocks": stocks}).encode("utf-8")
 
-    # Jinak HTML stránka
-    display_data = {
-        "stocks": [
-            {
-                "company": company,
-                "status": data["status"],
-                "updated_at": data["updated_at"],
-            }
-            for company, data in stock_data.items()
-        ]
-    }
-    return render_template("ui.html", data=display_data)
+    version, body = portfolio.get_view(kind, build)
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(f"portfolio-{version}-{kind}")
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept")
+    return response.make_conditional(request)
+
+
+def _parse_time_param(value, end_of_day=False):
+    """
+    Převede parametr času z URL (unix timestamp nebo ISO datum/čas) na unix timestamp.
+    Samotné datum znamená začátek dne, s end_of_day=True jeho konec.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if len(value) == 10:  # jen datum YYYY-MM-DD
+        day = datetime.combine(date.fromisoformat(value), datetime.min.time())
+        if end_of_day:
+            day += timedelta(days=1, microseconds=-1)
+        return day.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+@app.route("/UI/history", methods=["GET"])
+def ui_history():
+    """
+    Vrátí historii změn portfolia (nákupy/prodeje) a souhrnné statistiky.
+
+    URL parametry (všechny volitelné):
+        company: zkratka společnosti (např. NVDA)
+        from: začátek období - unix timestamp nebo ISO datum/čas (např. 2025-03-04)
+        to: konec období - unix timestamp nebo ISO datum/čas (datum bez času = celý den)
+        last: počet posledních událostí
+
+    Returns:
+        JSON: {"events": [...], "aggregates": {"count", "buy", "sell", "by_company"}}
+
+    Raises:
+        400 Bad Request: Neznámá společnost nebo neplatný formát času / počtu
+    """
+    company = request.args.get("company")
+    if company is not None and company not in ALLOWED_COMPANIES:
+        return jsonify({"error": "Unknown company"}), 400
+
+    try:
+        since = _parse_time_param(request.args.get("from"))
+        until = _parse_time_param(request.args.get("to"), end_of_day=True)
+    except ValueError:
+        return jsonify({"error": "Invalid time format"}), 400
+
+    last = request.args.get("last")
+    if last is not None:
+        if not last.isdigit() or int(last) <= 0:
+            return jsonify({"error": "Invalid last parameter"}), 400
+        last = int(last)
+
+    return jsonify(get_history(company=company, since=since, until=until, last=last))
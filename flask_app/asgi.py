@@ -0,0 +1,362 @@
+"""
+ASGI režim serveru - stejné endpointy a odpovědi jako Flask aplikace, bez blokování vlákna
+na každého čekajícího klienta.
+
+Spuštění (uvicorn je v requirements.txt):
+    uvicorn flask_app.asgi:application --host 0.0.0.0 --port 5000
+
+- Čtecí endpointy /output/<id>/status (včetně long pollingu ?wait=), /output/<id>/all a /output/<id>
+  obsluhuje přímo event loop. Čtení z DB je asynchronní přes async ovladač (aiosqlite, asyncpg),
+  pokud je nainstalovaný, jinak krátké dotazy běží v malém poolu ASGI_DB_THREADS vláken.
+  Čekání mezi kontrolami stavu vlákno nedrží - jeden proces tak obslouží tisíce pollujících klientů.
+- Ostatní požadavky (zadávání, UI, administrace) se předávají Flask aplikaci (WSGI) v poolu
+  ASGI_WSGI_THREADS vláken, streamované odpovědi (/submit/bulk) se posílají průběžně.
+"""
+
+import asyncio
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy import select
+
+from flask_app.app import app, _parse_wait_param, start_background_tasks
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.maintenance import TERMINAL_STATUSES
+from flask_app.config import (
+    ASGI_ASYNC_DB,
+    ASGI_BODY_SPOOL_BYTES,
+    ASGI_DB_THREADS,
+    ASGI_WSGI_THREADS,
+    STATUS_WAIT_POLL_SECONDS,
+)
+
+# Async ovladače pro jednotlivé databáze (dialekt -> ovladač pro create_async_engine)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+READ_ROUTES = [
+    (re.compile(r"^/output/(\d+)/status$"), "status"),
+    (re.compile(r"^/output/(\d+)/all$"), "all"),
+    (re.compile(r"^/output/(\d+)$"), "output"),
+]
+
+
+def create_async_engine_for(url):
+    """
+    Vytvoří async engine pro URL databáze aplikace.
+
+    Returns:
+        AsyncEngine | None: None, pokud pro databázi není nainstalovaný async ovladač (nebo greenlet)
+    """
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        return create_async_engine(url.set(drivername=f"{url.get_backend_name()}+{driver}"))
+    except (ImportError, ValueError) as e:
+        print(f"[INFO] Async ovladač DB není k dispozici ({e}), čtení poběží ve vláknech.")
+        return None
+
+
+class DatabaseReader:
+    """
+    Čtení z DB pro asynchronní endpointy - přes async engine, nebo přes synchronní engine
+    aplikace v omezeném poolu vláken.
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor ctecku pro aplikaci (po inicializaci DB).
+        reader = DatabaseReader(app)
+
+    2. V korutine nacti jeden radek dotazu.
+        row = await reader.first(select(RequestData.status).where(RequestData.id == 1))
+
+    3. Pri ukonceni serveru uvolni spojeni a vlakna.
+        await reader.close()
+    """
+
+    def __init__(self, app, use_async: str = ASGI_ASYNC_DB, threads: int = ASGI_DB_THREADS):
+        with app.app_context():
+            self.engine = db.engine
+        self.async_engine = create_async_engine_for(self.engine.url) if use_async != "0" else None
+        self.executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="asgi-db")
+
+    @property
+    def mode(self) -> str:
+        return "async" if self.async_engine is not None else "threads"
+
+    def _first_sync(self, statement):
+        with self.engine.connect() as conn:
+            return conn.execute(statement).first()
+
+    async def first(self, statement):
+        """První řádek výsledku dotazu (None, pokud dotaz nic nevrátí)."""
+        if self.async_engine is not None:
+            async with self.async_engine.connect() as conn:
+                return (await conn.execute(statement)).first()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._first_sync, statement)
+
+    async def close(self) -> None:
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        self.executor.shutdown(wait=False)
+
+
+def build_environ(scope: Dict, body) -> Dict:
+    """Převede ASGI scope HTTP požadavku na WSGI environ (PEP 3333)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] if server[1] is not None else 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = name
+        else:
+            key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class ASGIApplication:
+    """
+    ASGI aplikace - asynchronní čtecí endpointy a předávání ostatních požadavků Flask aplikaci.
+
+    # Navod k pouziti teto tridy.
+
+    1. Modul exportuje hotovou instanci pro uvicorn.
+        uvicorn flask_app.asgi:application
+
+    2. Pro vlastni Flask aplikaci (napr. v testech) vytvor instanci primo.
+        application = ASGIApplication(app)
+    """
+
+    def __init__(self, flask_app, wsgi_threads: int = ASGI_WSGI_THREADS):
+        self.flask_app = flask_app
+        self.wsgi_executor = ThreadPoolExecutor(
+            max_workers=max(1, wsgi_threads), thread_name_prefix="asgi-wsgi"
+        )
+        self.reader: Optional[DatabaseReader] = None
+        self.handlers: Dict[str, Callable] = {
+            "status": self.get_status,
+            "all": self.get_all_request_data,
+            "output": self.get_output,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            route = self.match_read_route(scope)
+            if route is not None:
+                handler, request_id = route
+                await self.send_json(send, *await handler(request_id, scope))
+            else:
+                await self.call_wsgi(scope, receive, send)
+        else:
+            raise RuntimeError(f"Nepodporovaný typ ASGI spojení: {scope['type']}")
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                start_background_tasks()
+                self.get_reader()
+                print(f"[INFO] ASGI server: čtení z DB v režimu {self.reader.mode}.")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.reader is not None:
+                    await self.reader.close()
+                self.wsgi_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def get_reader(self) -> DatabaseReader:
+        # Server bez lifespan událostí - čtečka se vytvoří s prvním požadavkem
+        if self.reader is None:
+            self.reader = DatabaseReader(self.flask_app)
+        return self.reader
+
+    def match_read_route(self, scope) -> Optional[Tuple[Callable, int]]:
+        if scope["method"] != "GET":
+            return None
+        for pattern, name in READ_ROUTES:
+            match = pattern.match(scope["path"])
+            if match:
+                return self.handlers[name], int(match.group(1))
+        return None
+
+    async def send_json(self, send, data, status: int = 200) -> None:
+        """Odešle JSON odpověď sestavenou stejně jako flask.jsonify."""
+        response = self.flask_app.json.response(data)
+        body = response.get_data()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", response.mimetype.encode("latin-1")),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def get_status(self, request_id: int, scope) -> Tuple[Dict, int]:
+        """Stejné jako get_status v app.py, čekání (?wait=) ale nedrží vlákno."""
+        query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        try:
+            wait = _parse_wait_param(query.get("wait"))
+        except ValueError:
+            return {"error": "Invalid wait parameter"}, 400
+
+        reader = self.get_reader()
+        statement = select(RequestData.status).where(RequestData.id == request_id)
+        wait_until = time.monotonic() + wait
+        row = await reader.first(statement)
+        while row is not None and row.status not in TERMINAL_STATUSES and time.monotonic() < wait_until:
+            await asyncio.sleep(min(STATUS_WAIT_POLL_SECONDS, max(0.0, wait_until - time.monotonic())))
+            row = await reader.first(statement)
+        if row is None:
+            return {"error": "Request not found"}, 404
+        return {"request_id": request_id, "status": row.status}, 200
+
+    async def get_all_request_data(self, request_id: int, scope) -> Tuple[Dict, int]:
+        row = await self.get_reader().first(
+            select(
+                RequestData.id,
+                RequestData.status,
+                RequestData.input_data,
+                RequestData.news_data,
+                RequestData.sentiment_data,
+            ).where(RequestData.id == request_id)
+        )
+        if row is None:
+            return {"error": "Request not found"}, 404
+        return {
+            "request_id": row.id,
+            "status": row.status,
+            "input_data": row.input_data,
+            "news_data": row.news_data,
+            "sentiment_data": row.sentiment_data,
+        }, 200
+
+    async def get_output(self, request_id: int, scope) -> Tuple[Dict, int]:
+        row = await self.get_reader().first(
+            select(RequestData.status, RequestData.sentiment_data).where(RequestData.id == request_id)
+        )
+        if row is None or row.status != "done":
+            return {"error": "Data not ready"}, 404
+        return row.sentiment_data, 200
+
+    async def call_wsgi(self, scope, receive, send) -> None:
+        """
+        Předá požadavek Flask aplikaci ve vlákně. Tělo požadavku se načte předem (velké na disk),
+        odpověď se posílá po částech, jak je aplikace vrací.
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=ASGI_BODY_SPOOL_BYTES)
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return
+            body.write(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        environ = build_environ(scope, body)
+        # tělo je celé načtené - délka platí i pro požadavky bez Content-Length (chunked)
+        environ["CONTENT_LENGTH"] = str(body.tell())
+        body.seek(0)
+
+        loop = asyncio.get_running_loop()
+        messages: asyncio.Queue = asyncio.Queue(maxsize=8)
+        closed = threading.Event()
+
+        def put(message) -> None:
+            # z vlákna WSGI - čeká, dokud event loop zprávu nepřevezme (zpětný tlak)
+            if closed.is_set():
+                raise ConnectionAbortedError("Klient ukončil spojení")
+            asyncio.run_coroutine_threadsafe(messages.put(message), loop).result()
+
+        def run() -> None:
+            started = {}
+
+            def start_response(status, headers, exc_info=None):
+                started["status"] = int(status.split(" ", 1)[0])
+                started["headers"] = [
+                    (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+                ]
+                return lambda data: None  # zastaralé write() Flask nepoužívá
+
+            result = None
+            try:
+                result = self.flask_app.wsgi_app(environ, start_response)
+                for chunk in result:
+                    if chunk:
+                        if "sent" not in started:
+                            started["sent"] = True
+                            put({"type": "http.response.start", **self._start(started)})
+                        put({"type": "http.response.body", "body": chunk, "more_body": True})
+                if "sent" not in started:
+                    put({"type": "http.response.start", **self._start(started)})
+                put({"type": "http.response.body", "body": b""})
+            except ConnectionAbortedError:
+                pass
+            except Exception as e:
+                print(f"[ERROR] Zpracování požadavku {scope['path']} selhalo: {e}")
+                if not closed.is_set():
+                    put(e)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+                body.close()
+
+        future = loop.run_in_executor(self.wsgi_executor, run)
+        try:
+            while True:
+                message = await messages.get()
+                if isinstance(message, Exception):
+                    raise message
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body"):
+                    break
+        finally:
+            # při odpojení klienta vlákno přestane posílat a uvolní se z čekání na frontu
+            closed.set()
+            while not future.done():
+                while not messages.empty():
+                    messages.get_nowait()
+                await asyncio.sleep(0.01)
+
+    @staticmethod
+    def _start(started: Dict) -> Dict:
+        return {"status": started["status"], "headers": started["headers"]}
+
+
+application = ASGIApplication(app)
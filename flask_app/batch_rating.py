@@ -0,0 +1,613 @@
+"""
+Dávkové hodnocení zpráv přes Batch API - pro hromadné požadavky, na jejichž výsledek se nespěchá.
+
+Požadavek zadaný s ?batch=1 (jen v RATING_MODE="llm") stáhne zprávy jako obvykle, ale hodnocení
+společností se místo přímého volání OpenAI zařadí do fronty RatingBatchItem a požadavek čeká
+ve stavu "rating". Vlákno webového procesu (nebo python -m flask_app.worker --batch-rating) pak:
+
+1. sebere čekající položky ze všech požadavků do jednoho JSONL souboru (řádek = jedno volání
+   chat completions se stejným promptem jako NewsRating) a odešle ho přes backend,
+2. u odeslaných dávek kontroluje stav a výsledky zapisuje do položek - chybějící nebo neplatná
+   hodnocení se zařadí do další dávky jen pro dané indexy (nejvýše RATING_REPAIR_ATTEMPTS krát),
+3. jakmile jsou hotové všechny položky požadavku, složí hodnocení společností stejně jako
+   process_request, uloží sentiment_data, nastaví stav "done" a pošle webhook.
+
+Backendy (BATCH_BACKENDS): "openai" (Files + Batches API s oknem 24 h) a "local" (soubory
+ve složce instance/batches/local, hodnotí lokálním lexikonem - pro testy a vývoj bez sítě).
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import openai
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from flask_app.database import db
+from flask_app.models import RatingBatch, RatingBatchItem, RequestData
+from flask_app.daily_sentiment import period_rating
+from flask_app.webhooks import notify_webhooks
+from flask_app.utils.lexicon_rating import LexiconRating
+from flask_app.utils.near_duplicates import expand_cluster_ratings
+from flask_app.utils.news_rating import (
+    MAX_NEWS_COUNT,
+    MAX_NEWS_LENGTH,
+    build_chat_request,
+    parse_rating_content,
+    record_rating_stats,
+)
+from flask_app.config import (
+    RATING_BATCH_BACKEND,
+    RATING_BATCH_DIR,
+    RATING_BATCH_MIN_ITEMS,
+    RATING_BATCH_MAX_ITEMS,
+    RATING_BATCH_MAX_WAIT_SECONDS,
+    RATING_BATCH_POLL_SECONDS,
+    RATING_REPAIR_ATTEMPTS,
+)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+OPEN_ITEM_STATUSES = ("queued", "submitted")
+# Dávka, jejíž odeslání se nedokončilo (pád procesu), se po této době vrátí do fronty
+STALE_SUBMIT_SECONDS = 3600
+
+
+def resolve_batch_dir(batch_dir: Optional[str] = None) -> str:
+    """Vrátí absolutní cestu ke složce dávek (relativní cesta je vůči složce instance/ aplikace)."""
+    batch_dir = batch_dir or RATING_BATCH_DIR
+    if not os.path.isabs(batch_dir):
+        batch_dir = os.path.join(current_app.instance_path, batch_dir)
+    return batch_dir
+
+
+def lexicon_responder(body: Dict) -> str:
+    """
+    Odpověď lokálního backendu na jedno volání - ohodnotí zprávy z promptu lexikonem
+    a vrátí JSON ve stejném tvaru jako model ({"0": 7.5, ...}, škála 0 až 10).
+    """
+    prompt = body["messages"][-1]["content"]
+    articles = prompt.split("Here are the articles to analyze:", 1)[-1]
+    parts = re.split(r"\n(\d+): ", articles)
+    texts = {int(parts[idx]): parts[idx + 1] for idx in range(1, len(parts) - 1, 2)}
+    if not texts:
+        return "{}"
+    ratings, _ = LexiconRating().score_batch(list(texts.values()))
+    return json.dumps(
+        {str(idx): round(float(rating) / 2 + 5, 2) for idx, rating in zip(texts, ratings)}
+    )
+
+
+class LocalBatchBackend:
+    """
+    Souborová náhrada Batch API - dávku "zpracuje" při první kontrole stavu a výsledek zapíše
+    ve stejném formátu jako OpenAI (JSONL s custom_id a response.body).
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor backend (volitelne s vlastni slozkou a odpovedi pro testy).
+        backend = LocalBatchBackend(directory, responder=lambda body: '{"0": 5}')
+
+    2. Odesli JSONL soubor a ziskej ID davky.
+        external_id = backend.submit("batch-1.input.jsonl")
+
+    3. Zkontroluj stav - pri "completed" je vysledek v output_path.
+        backend.poll(external_id, "batch-1.output.jsonl")
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        responder: Optional[Callable[[Dict], str]] = None,
+    ):
+        self.directory = directory or os.path.join(resolve_batch_dir(), "local")
+        self.responder = responder or lexicon_responder
+
+    def submit(self, input_path: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        external_id = f"local-{uuid.uuid4().hex[:12]}"
+        shutil.copyfile(input_path, os.path.join(self.directory, f"{external_id}.input.jsonl"))
+        return external_id
+
+    def poll(self, external_id: str, output_path: str) -> str:
+        input_path = os.path.join(self.directory, f"{external_id}.input.jsonl")
+        if not os.path.isfile(input_path):
+            return "failed"
+        with open(input_path, encoding="utf-8") as source, open(
+            output_path, "w", encoding="utf-8"
+        ) as target:
+            for line_number, line in enumerate(source):
+                request = json.loads(line)
+                content = self.responder(request["body"])
+                response = {
+                    "status_code": 200,
+                    "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]},
+                }
+                target.write(
+                    json.dumps(
+                        {
+                            "id": f"{external_id}-{line_number}",
+                            "custom_id": request["custom_id"],
+                            "response": response,
+                            "error": None,
+                        }
+                    )
+                    + "\n"
+                )
+        return "completed"
+
+
+class OpenAIBatchBackend:
+    """
+    Batch API OpenAI - soubor se nahraje přes Files API a zpracuje do 24 hodin
+    (za nižší cenu a mimo limity přímých volání).
+    """
+
+    name = "openai"
+
+    def __init__(self, client=None):
+        if client is None:
+            api_key = os.environ.get("OPEN_AI_API_KEY")
+            if not api_key:
+                raise ValueError("API klíč není nastaven v proměnné prostředí OPEN_AI_API_KEY")
+            client = openai.OpenAI(api_key=api_key)
+        self.client = client
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as input_file:
+            uploaded = self.client.files.create(file=input_file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT, completion_window="24h"
+        )
+        return batch.id
+
+    def poll(self, external_id: str, output_path: str) -> str:
+        batch = self.client.batches.retrieve(external_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return "in_progress"
+        if batch.output_file_id:
+            # i u vypršené dávky - chybějící položky se zařadí znovu
+            content = self.client.files.content(batch.output_file_id)
+            with open(output_path, "wb") as output_file:
+                output_file.write(content.content)
+            return "completed"
+        return "failed"
+
+
+BATCH_BACKENDS = {"local": LocalBatchBackend, "openai": OpenAIBatchBackend}
+
+
+def create_batch_backend(name: Optional[str] = None):
+    """
+    Vytvoří backend dávkového hodnocení podle názvu (výchozí RATING_BATCH_BACKEND).
+
+    Raises:
+        ValueError: Pokud backend není v BATCH_BACKENDS
+    """
+    name = name or RATING_BATCH_BACKEND
+    if name not in BATCH_BACKENDS:
+        raise ValueError(
+            f"Neznámý backend dávkového hodnocení '{name}', povolené: {', '.join(BATCH_BACKENDS)}"
+        )
+    return BATCH_BACKENDS[name]()
+
+
+def queue_company_rating(
+    request_id: int,
+    company_index: int,
+    news_list: List[str],
+    clusters: List[List[int]],
+    rated_articles: List[Dict],
+    plan: Dict,
+    rating_mode: str,
+) -> RatingBatchItem:
+    """
+    Zařadí hodnocení zpráv jedné společnosti do dávky (commit provede volající).
+
+    Args:
+        request_id (int): ID požadavku
+        company_index (int): Pořadí společnosti v sentiment_data požadavku
+        news_list (List[str]): Texty zástupců shluků v pořadí shluků
+        clusters (List[List[int]]): Shluky indexů článků (viz prepare_company_rating)
+        rated_articles (List[Dict]): Hodnocené články (pro rozdělení hodnocení po dnech a uložení
+            hodnocení článků)
+        plan (Dict): Uložené a chybějící dny společnosti (viz plan_company)
+        rating_mode (str): Režim hodnocení, pod kterým se dny uloží
+
+    Returns:
+        RatingBatchItem: Nová položka ve stavu "queued"
+    """
+    item = RatingBatchItem(
+        request_id=request_id,
+        company_index=company_index,
+        status="queued",
+        payload={
+            # stejná délka zprávy jako NewsRating.process_news, počet omezuje až write_batch_file
+            "news": [news[:MAX_NEWS_LENGTH] for news in news_list],
+            "clusters": clusters,
+            "articles": [
+                {key: article.get(key) for key in ("article_id", "publishedAt", "source", "content_source")}
+                for article in rated_articles
+            ],
+            "plan": plan,
+            "rating_mode": rating_mode,
+        },
+        ratings={},
+    )
+    db.session.add(item)
+    return item
+
+
+def drop_queued_items(request_id: int) -> int:
+    """
+    Odstraní dosud neodeslané položky zrušeného požadavku (commit provede volající).
+
+    Returns:
+        int: Počet odstraněných položek
+    """
+    return db.session.execute(
+        delete(RatingBatchItem).where(
+            RatingBatchItem.request_id == request_id, RatingBatchItem.status == "queued"
+        )
+    ).rowcount
+
+
+def missing_indices(item: RatingBatchItem) -> List[int]:
+    """Indexy zpráv položky, které ještě nemají platné hodnocení."""
+    rated = item.ratings or {}
+    return [idx for idx in range(len(item.payload["news"])) if str(idx) not in rated]
+
+
+def item_requests(item: RatingBatchItem) -> List[Tuple[str, List[int]]]:
+    """
+    Rozdělí zprávy položky bez hodnocení na volání po nejvýše MAX_NEWS_COUNT zprávách
+    (stejný limit jako NewsRating.process_news).
+
+    Returns:
+        List[Tuple[str, List[int]]]: (custom_id, indexy zpráv) - první volání má custom_id "item-<id>"
+    """
+    indices = missing_indices(item)
+    requests = []
+    for part, start in enumerate(range(0, len(indices), MAX_NEWS_COUNT)):
+        custom_id = f"item-{item.id}" if part == 0 else f"item-{item.id}-{part}"
+        requests.append((custom_id, indices[start : start + MAX_NEWS_COUNT]))
+    return requests
+
+
+def write_batch_file(items: Iterable[RatingBatchItem], path: str) -> int:
+    """
+    Zapíše položky do JSONL souboru pro Batch API - každá položka je jedno nebo více volání
+    chat completions (viz item_requests) jen pro zprávy, které ještě nemají hodnocení.
+
+    Returns:
+        int: Počet zapsaných řádků
+    """
+    count = 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as batch_file:
+        for item in items:
+            news = item.payload["news"]
+            for custom_id, indices in item_requests(item):
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": build_chat_request([news[idx] for idx in indices], indices),
+                }
+                batch_file.write(json.dumps(line) + "\n")
+                count += 1
+    return count
+
+
+def read_batch_output(path: str) -> Dict[str, Optional[str]]:
+    """
+    Načte výsledky dávky.
+
+    Returns:
+        Dict[str, Optional[str]]: custom_id -> obsah odpovědi modelu (None při chybě volání)
+    """
+    outputs = {}
+    if not os.path.isfile(path):
+        return outputs
+    with open(path, encoding="utf-8") as output_file:
+        for line in output_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            try:
+                if response.get("status_code") != 200:
+                    raise KeyError("status_code")
+                content = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                content = None
+            outputs[record.get("custom_id")] = content
+    return outputs
+
+
+def submit_batches(backend, now: Optional[float] = None, force: bool = False) -> int:
+    """
+    Odešle čekající položky jako dávky (nejvýše RATING_BATCH_MAX_ITEMS položek v souboru).
+
+    Bez force se odesílá, až když čeká RATING_BATCH_MIN_ITEMS položek nebo nejstarší
+    čeká déle než RATING_BATCH_MAX_WAIT_SECONDS.
+
+    Returns:
+        int: Počet odeslaných položek
+    """
+    now = time.time() if now is None else now
+    count, oldest = db.session.execute(
+        select(func.count(), func.min(RatingBatchItem.created_at)).where(
+            RatingBatchItem.status == "queued"
+        )
+    ).one()
+    if not count:
+        return 0
+    if not force and count < RATING_BATCH_MIN_ITEMS and now - oldest < RATING_BATCH_MAX_WAIT_SECONDS:
+        return 0
+
+    submitted = 0
+    while True:
+        candidates = db.session.execute(
+            select(RatingBatchItem.id)
+            .where(RatingBatchItem.status == "queued")
+            .order_by(RatingBatchItem.id)
+            .limit(max(1, RATING_BATCH_MAX_ITEMS))
+        ).scalars().all()
+        if not candidates:
+            return submitted
+
+        batch = RatingBatch(backend=backend.name, status="submitting", created_at=now)
+        db.session.add(batch)
+        db.session.flush()
+        # podminene UPDATE - polozky mohl mezitim zabrat jiny proces
+        claimed = db.session.execute(
+            update(RatingBatchItem)
+            .where(RatingBatchItem.id.in_(candidates), RatingBatchItem.status == "queued")
+            .values(status="submitted", batch_id=batch.id)
+        ).rowcount
+        if not claimed:
+            # vsechny polozky zabral jiny proces - prazdnou davku neukladat ani neodesilat
+            db.session.rollback()
+            continue
+        items = db.session.execute(
+            select(RatingBatchItem).where(RatingBatchItem.batch_id == batch.id).order_by(RatingBatchItem.id)
+        ).scalars().all()
+        batch.item_count = len(items)
+        db.session.commit()
+
+        path = os.path.join(resolve_batch_dir(), f"batch-{batch.id}.input.jsonl")
+        try:
+            write_batch_file(items, path)
+            batch.external_id = backend.submit(path)
+        except Exception as e:
+            print(f"[ERROR] Odeslání dávky hodnocení {batch.id} selhalo: {e}")
+            requeue_batch(batch)
+            return submitted
+        batch.status = "submitted"
+        db.session.commit()
+        submitted += len(items)
+        print(f"[INFO] Odeslána dávka hodnocení {batch.id} ({len(items)} položek, {batch.external_id}).")
+
+
+def requeue_batch(batch: RatingBatch) -> None:
+    """Vrátí neodeslanou dávku do fronty a označí ji jako "failed"."""
+    db.session.execute(
+        update(RatingBatchItem)
+        .where(RatingBatchItem.batch_id == batch.id, RatingBatchItem.status == "submitted")
+        .values(status="queued", batch_id=None)
+    )
+    batch.status = "failed"
+    db.session.commit()
+
+
+def apply_batch_results(batch: RatingBatch, outputs: Dict[str, Optional[str]]) -> Set[int]:
+    """
+    Zapíše výsledky dávky do jejích položek.
+
+    Položka, které i po výsledku chybí některá hodnocení, se zařadí znovu jen pro tyto indexy
+    (nejvýše RATING_REPAIR_ATTEMPTS krát), pak se označí jako "failed".
+
+    Returns:
+        Set[int]: ID požadavků, jejichž položky se změnily
+    """
+    items = db.session.execute(
+        select(RatingBatchItem).where(
+            RatingBatchItem.batch_id == batch.id, RatingBatchItem.status == "submitted"
+        )
+    ).scalars().all()
+    for item in items:
+        missing = missing_indices(item)
+        parsed = {}
+        for custom_id, indices in item_requests(item):
+            content = outputs.get(custom_id)
+            try:
+                parsed.update(parse_rating_content(content, indices) if content else {})
+            except ValueError:
+                record_rating_stats(invalid_responses=1)
+        ratings = dict(item.ratings or {})
+        ratings.update({str(idx): rating for idx, rating in parsed.items()})
+        item.ratings = ratings
+        item.attempts += 1
+        record_rating_stats(
+            **({"rated_items": len(parsed)} if item.attempts == 1 else {"repaired_items": len(parsed)})
+        )
+
+        still_missing = [idx for idx in missing if idx not in parsed]
+        if not still_missing:
+            item.status = "done"
+            record_rating_stats(batches_ok=1)
+        elif item.attempts <= RATING_REPAIR_ATTEMPTS:
+            item.status, item.batch_id = "queued", None
+        else:
+            item.status = "failed"
+            record_rating_stats(failed_items=len(still_missing), batches_failed=1)
+    db.session.commit()
+    return {item.request_id for item in items}
+
+
+def finalize_requests(request_ids: Iterable[int]) -> int:
+    """
+    Dokončí požadavky, jejichž všechny položky jsou ohodnocené (nebo definitivně selhaly) -
+    složí hodnocení společností, uloží sentiment_data a nastaví stav "done".
+
+    Returns:
+        int: Počet dokončených požadavků
+    """
+    finalized = 0
+    for request_id in sorted(request_ids):
+        open_items = db.session.execute(
+            select(func.count()).where(
+                RatingBatchItem.request_id == request_id,
+                RatingBatchItem.status.in_(OPEN_ITEM_STATUSES),
+            )
+        ).scalar()
+        if open_items:
+            continue
+
+        request_data = db.session.get(RequestData, request_id)
+        items = db.session.execute(
+            select(RatingBatchItem).where(RatingBatchItem.request_id == request_id)
+        ).scalars().all()
+        if request_data is not None and request_data.status == "rating":
+            sentiment = [dict(entry) for entry in request_data.sentiment_data or []]
+            for item in items:
+                rating = None
+                if item.status == "done":
+                    payload = item.payload
+                    ratings = expand_cluster_ratings(
+                        {int(idx): value for idx, value in item.ratings.items()}, payload["clusters"]
+                    )
+                    rating = period_rating(
+                        payload["plan"], payload["rating_mode"], payload["articles"], ratings
+                    )
+                if item.company_index < len(sentiment):
+                    sentiment[item.company_index]["rating"] = (
+                        float(rating) if rating is not None else None
+                    )
+            request_data.sentiment_data = sentiment
+            request_data.status = "cancelled" if request_data.cancel_requested else "done"
+            finalized += 1
+            print(f"[INFO] Request ID {request_id} dokončen po dávkovém hodnocení.")
+
+        # polozky zrusenych nebo smazanych pozadavku se jen odstrani
+        db.session.execute(delete(RatingBatchItem).where(RatingBatchItem.request_id == request_id))
+        db.session.commit()
+        if request_data is not None and request_data.callback_url:
+            notify_webhooks()
+    return finalized
+
+
+def collect_batches(backend, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Zkontroluje odeslané dávky backendu, zapíše hotové výsledky a dokončí požadavky.
+
+    Returns:
+        Dict[str, int]: {"completed", "failed", "finalized"} - počty dávek a dokončených požadavků
+    """
+    now = time.time() if now is None else now
+    stats = {"completed": 0, "failed": 0, "finalized": 0}
+    touched: Set[int] = set()
+
+    stale = db.session.execute(
+        select(RatingBatch).where(
+            RatingBatch.backend == backend.name,
+            RatingBatch.status == "submitting",
+            RatingBatch.created_at < now - STALE_SUBMIT_SECONDS,
+        )
+    ).scalars().all()
+    for batch in stale:
+        print(f"[WARNING] Dávka hodnocení {batch.id} nebyla odeslána, vracím položky do fronty.")
+        requeue_batch(batch)
+
+    batches = db.session.execute(
+        select(RatingBatch)
+        .where(RatingBatch.backend == backend.name, RatingBatch.status == "submitted")
+        .order_by(RatingBatch.id)
+    ).scalars().all()
+    for batch in batches:
+        output_path = os.path.join(resolve_batch_dir(), f"batch-{batch.id}.output.jsonl")
+        try:
+            state = backend.poll(batch.external_id, output_path)
+        except Exception as e:
+            print(f"[WARNING] Kontrola dávky hodnocení {batch.id} selhala: {e}")
+            continue
+        if state not in ("completed", "failed"):
+            continue
+
+        # u neuspesne davky se polozky zaradi znovu (nebo selzou po vycerpani pokusu)
+        outputs = read_batch_output(output_path) if state == "completed" else {}
+        touched |= apply_batch_results(batch, outputs)
+        batch.status = state
+        batch.completed_at = now
+        db.session.commit()
+        stats[state] += 1
+        print(f"[INFO] Dávka hodnocení {batch.id}: {state}.")
+
+    stats["finalized"] = finalize_requests(touched)
+    return stats
+
+
+def run_batch_rating(backend=None, force: bool = False, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Jeden průchod dávkového hodnocení - nejdřív zpracuje hotové dávky (opravné položky
+    se tak dostanou do další dávky), pak odešle čekající položky.
+
+    Returns:
+        Dict[str, int]: {"completed", "failed", "finalized", "submitted"}
+    """
+    backend = backend or create_batch_backend()
+    stats = collect_batches(backend, now=now)
+    stats["submitted"] = submit_batches(backend, now=now, force=force)
+    return stats
+
+
+def get_batch_stats() -> Dict:
+    """Počty položek a dávek dávkového hodnocení podle stavu (podle DB, pro všechny procesy)."""
+    items = db.session.execute(
+        select(RatingBatchItem.status, func.count()).group_by(RatingBatchItem.status)
+    ).all()
+    batches = db.session.execute(
+        select(RatingBatch.status, func.count()).group_by(RatingBatch.status)
+    ).all()
+    return {
+        "items": {status: count for status, count in items},
+        "batches": {status: count for status, count in batches},
+    }
+
+
+class BatchRatingThread(threading.Thread):
+    """
+    Vlákno webového procesu, které jednou za `interval` sekund zpracuje dávkové hodnocení.
+    Backend se vytvoří až s první čekající položkou (bez dávkových požadavků není potřeba API klíč).
+    """
+
+    def __init__(self, app, interval=RATING_BATCH_POLL_SECONDS, backend=None):
+        super().__init__(daemon=True)
+        self.app = app
+        self.interval = interval
+        self.backend = backend
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    pending = db.session.execute(
+                        select(func.count()).where(RatingBatchItem.status.in_(OPEN_ITEM_STATUSES))
+                    ).scalar()
+                    if pending:
+                        self.backend = self.backend or create_batch_backend()
+                        run_batch_rating(self.backend)
+            except Exception as e:
+                print(f"[ERROR] Dávkové hodnocení selhalo: {e}")
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,166 @@
+"""
+Hromadné zadání požadavků ve formátu NDJSON (jeden požadavek na řádek).
+
+Tělo se čte průběžně po řádcích, každý řádek se zvlášť zvaliduje a platné požadavky se ukládají
+do DB po dávkách BULK_SUBMIT_BATCH_SIZE řádků v jedné transakci. Výsledky (request_id nebo chyba
+pro každý řádek) se vrací také jako NDJSON průběžně po každé dávce - velký soubor se tak nemusí
+držet celý v paměti serveru ani klienta.
+
+Řádek je buď seznam společností (stejně jako tělo /submit), nebo jedna společnost {"name", "from", "to"}.
+"""
+
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.scheduler import job_cost, job_from_request
+from flask_app.config import BULK_SUBMIT_BATCH_SIZE, BULK_SUBMIT_MAX_LINE_BYTES
+
+
+def iter_ndjson_lines(
+    stream, max_line_bytes: int = BULK_SUBMIT_MAX_LINE_BYTES
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Čte tělo požadavku po řádcích bez načtení celého těla do paměti.
+
+    Příliš dlouhý řádek se vrátí zkrácený na max_line_bytes + 1 bajtů (zbytek se přeskočí),
+    aby ho validace mohla odmítnout. Prázdné řádky se přeskakují.
+
+    Yields:
+        Tuple[int, bytes]: (číslo řádku od 1, obsah řádku)
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            # dočtení zbytku příliš dlouhého řádku
+            while True:
+                rest = stream.readline(max_line_bytes)
+                if not rest or rest.endswith(b"\n"):
+                    break
+        if line.strip():
+            yield line_number, line
+
+
+def parse_line(line: bytes, max_line_bytes: int = BULK_SUBMIT_MAX_LINE_BYTES) -> List[Dict]:
+    """
+    Převede řádek NDJSON na vstupní data požadavku (seznam společností).
+
+    Raises:
+        ValueError: Pokud řádek není platný JSON nebo neobsahuje platné společnosti
+    """
+    if len(line) > max_line_bytes:
+        raise ValueError(f"Line exceeds {max_line_bytes} bytes")
+    try:
+        data = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("Invalid JSON format")
+
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not data:
+        raise ValueError("Expected a company object or a non-empty list of companies")
+    for company in data:
+        if not isinstance(company, dict):
+            raise ValueError("Company must be a JSON object")
+        for field in ("name", "from", "to"):
+            if not isinstance(company.get(field), str) or not company[field].strip():
+                raise ValueError(f"Missing or invalid field '{field}'")
+    return data
+
+
+def insert_batch(batch: List[Tuple[int, List[Dict]]], options: Dict) -> List[Tuple[int, Dict]]:
+    """
+    Uloží dávku platných řádků jednou transakcí.
+
+    Args:
+        batch (List[Tuple[int, List[Dict]]]): (číslo řádku, vstupní data)
+        options (Dict): deadline_seconds, priority, client_key, callback_url, rating_batch
+            (stejné jako u /submit)
+
+    Returns:
+        List[Tuple[int, Dict]]: (číslo řádku, úloha pro plánovač)
+    """
+    rows = [
+        RequestData(
+            status="pending",
+            input_data=data,
+            # velká dávka čeká ve frontě déle než interaktivní deadline - rozpočet platí od začátku
+            # zpracování, ne od nahrání
+            deadline_seconds=options["deadline_seconds"],
+            priority=options["priority"],
+            client_key=options["client_key"],
+            cost=job_cost(data),
+            callback_url=options.get("callback_url"),
+            callback_state="pending" if options.get("callback_url") else None,
+            rating_batch=options.get("rating_batch", False),
+        )
+        for _, data in batch
+    ]
+    db.session.add_all(rows)
+    db.session.flush()  # přidělení ID bez opětovného načítání řádků po commitu
+    jobs = [(line_number, job_from_request(row)) for (line_number, _), row in zip(batch, rows)]
+    db.session.commit()
+    return jobs
+
+
+def bulk_submit(
+    lines: Iterable[Tuple[int, bytes]],
+    options: Dict,
+    enqueue: Optional[Callable[[Dict], None]] = None,
+    batch_size: int = BULK_SUBMIT_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Zvaliduje a uloží požadavky z řádků NDJSON, výsledky vrací průběžně jako řádky NDJSON.
+
+    Args:
+        lines (Iterable[Tuple[int, bytes]]): Řádky těla (viz iter_ndjson_lines)
+        options (Dict): deadline_seconds, priority, client_key, callback_url
+        enqueue (Optional[Callable]): Předání uložené úlohy plánovači (režim "thread")
+        batch_size (int): Počet požadavků v jedné transakci
+
+    Yields:
+        str: {"line", "request_id"} nebo {"line", "error"} pro každý řádek
+            a na konci souhrn {"done": true, "accepted", "rejected"}
+    """
+    accepted = rejected = 0
+    batch: List[Tuple[int, List[Dict]]] = []
+    pending_errors: List[Dict] = []
+
+    def flush() -> Iterator[str]:
+        nonlocal accepted, rejected
+        results = list(pending_errors)
+        try:
+            jobs = insert_batch(batch, options) if batch else []
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Uložení dávky hromadného zadání selhalo: {e}")
+            jobs = []
+            rejected += len(batch)
+            results += [{"line": line_number, "error": "Database error"} for line_number, _ in batch]
+        for line_number, job in jobs:
+            if enqueue is not None:
+                enqueue(job)
+            results.append({"line": line_number, "request_id": job["id"]})
+        accepted += len(jobs)
+        batch.clear()
+        pending_errors.clear()
+        for result in sorted(results, key=lambda item: item["line"]):
+            yield json.dumps(result) + "\n"
+
+    for line_number, line in lines:
+        try:
+            batch.append((line_number, parse_line(line)))
+        except ValueError as e:
+            rejected += 1
+            pending_errors.append({"line": line_number, "error": str(e)})
+        if len(batch) + len(pending_errors) >= batch_size:
+            yield from flush()
+
+    yield from flush()
+    print(f"[INFO] Hromadné zadání: přijato {accepted}, odmítnuto {rejected} požadavků.")
+    yield json.dumps({"done": True, "accepted": accepted, "rejected": rejected}) + "\n"
@@ -0,0 +1,270 @@
+"""
+Předehřívání cache pro společnosti z ALLOWED_COMPANIES_IN_UI.
+
+Vlákno webového procesu jednou za CACHE_WARM_INTERVAL_SECONDS projde klouzavé okno posledních
+CACHE_WARM_DAYS uzavřených dní (do včerejška v UTC) a pro dny, které ještě nejsou v CompanyDaySentiment,
+stáhne zprávy, jejich texty a ohodnotí je stejnou cestou jako process_request. První /submit na tyto
+společnosti pak najde hodnocení i texty článků (ARTICLE_DOWNLOADS) připravené.
+Dnešní den se nepředehřívá - jeho hodnocení se neukládá a opakované hodnocení by jen spotřebovávalo tokeny.
+
+Předehřívání je ve výchozím nastavení vypnuté (spotřebovává kvótu NewsAPI a OpenAI). Může běžet ve všech
+procesech webu i workeru, průchod ale v každém intervalu provede jen jeden - ten, který zabere zámek
+v DB (TaskLease, viz claim_warm_run).
+
+Souběžně se zpracovává nejvýše CACHE_WARM_CONCURRENCY společností, každá s časovým rozpočtem
+CACHE_WARM_TIMEOUT sekund. Čerstvost cache (počet spočítaných dní okna a stáří výpočtu)
+vrací get_warm_stats / endpoint /cache/stats.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, update
+
+from flask_app import tasks
+from flask_app.database import db, upsert
+from flask_app.job_queue import make_worker_id
+from flask_app.models import CompanyDaySentiment, TaskLease
+from flask_app.daily_sentiment import company_key, plan_company
+from flask_app.utils.deadline import Deadline
+from flask_app.config import (
+    ALLOWED_COMPANIES_IN_UI,
+    CACHE_WARM_INTERVAL_SECONDS,
+    CACHE_WARM_START_DELAY,
+    CACHE_WARM_DAYS,
+    CACHE_WARM_CONCURRENCY,
+    CACHE_WARM_TIMEOUT,
+)
+
+
+def warm_window(days: int = CACHE_WARM_DAYS, now: Optional[float] = None) -> List[str]:
+    """Klouzavé okno předehřívání - posledních `days` uzavřených dní (YYYY-MM-DD, do včerejška v UTC)."""
+    now = time.time() if now is None else now
+    today = datetime.fromtimestamp(now, timezone.utc).date()
+    return [(today - timedelta(days=offset)).isoformat() for offset in range(days, 0, -1)]
+
+
+WARM_LEASE = "cache_warm"
+
+
+def claim_warm_run(owner: str, interval: float, now: Optional[float] = None) -> bool:
+    """
+    Zabere průchod předehřívání pro jeden proces - zámek platí o něco kratší dobu než interval,
+    takže ho vlastník při dalším průchodu znovu získá, ostatní procesy mezitím nic nespouští.
+
+    Args:
+        owner (str): Identifikátor procesu
+        interval (float): Interval předehřívání v sekundách
+        now (Optional[float]): Aktuální čas (unix timestamp)
+
+    Returns:
+        bool: True, pokud má průchod spustit tento proces
+    """
+    now = time.time() if now is None else now
+    db.session.execute(
+        upsert(
+            TaskLease,
+            {"name": WARM_LEASE, "owner": owner, "expires_at": 0.0},
+            index_elements=["name"],
+            update_values={"name": TaskLease.name},  # existující zámek se nemění
+        )
+    )
+    claimed = db.session.execute(
+        update(TaskLease)
+        .where(TaskLease.name == WARM_LEASE, TaskLease.expires_at <= now)
+        .values(owner=owner, expires_at=now + interval * 0.9)
+    ).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def warm_company(name: str, window: List[str], timeout: float = CACHE_WARM_TIMEOUT) -> Dict:
+    """
+    Spočítá chybějící dny okna pro jednu společnost (stažení zpráv, textů a hodnocení).
+
+    Args:
+        name (str): Název společnosti (jak ho zadávají uživatelé, např. "AAPL")
+        window (List[str]): Dny okna (viz warm_window)
+        timeout (float): Časový rozpočet v sekundách
+
+    Returns:
+        Dict: {"company", "missing_days", "articles", "rating"}
+    """
+    company = {"name": name, "from": window[0], "to": window[-1]}
+    plan = plan_company(company, tasks.RATING_MODE)
+    stats = {"company": name, "missing_days": len(plan["missing"]), "articles": 0, "rating": None}
+    if plan["days"] is not None and not plan["missing"]:
+        return stats
+
+    deadline = Deadline(time.time() + timeout)
+    result = tasks.fetch_company_articles(company, plan, deadline)
+    stats["articles"] = len(result["articles"])
+    stats["rating"] = tasks.rate_company_articles(
+        result, plan, tasks.create_news_rater(tasks.RATING_MODE), deadline
+    )
+    return stats
+
+
+def get_warm_stats(
+    companies: List[str] = ALLOWED_COMPANIES_IN_UI, now: Optional[float] = None
+) -> Dict:
+    """
+    Čerstvost předpočítaných hodnocení pro okno předehřívání (podle DB, platí pro všechny procesy).
+
+    Returns:
+        Dict: {"window": {"from", "to", "days"}, "companies": {název: {"cached_days", "missing_days",
+            "last_computed_at", "age_seconds"}}}
+    """
+    now = time.time() if now is None else now
+    window = warm_window(now=now)
+    keys = {company_key(name): name for name in companies}
+    rows = db.session.execute(
+        select(
+            CompanyDaySentiment.company,
+            func.count(),
+            func.max(CompanyDaySentiment.computed_at),
+        )
+        .where(
+            CompanyDaySentiment.company.in_(keys),
+            CompanyDaySentiment.rating_mode == tasks.RATING_MODE,
+            CompanyDaySentiment.day.in_(window),
+        )
+        .group_by(CompanyDaySentiment.company)
+    ).all()
+    found = {key: (count, computed_at) for key, count, computed_at in rows}
+
+    result = {}
+    for key, name in keys.items():
+        count, computed_at = found.get(key, (0, None))
+        result[name] = {
+            "cached_days": count,
+            "missing_days": len(window) - count,
+            "last_computed_at": computed_at,
+            "age_seconds": round(now - computed_at, 1) if computed_at else None,
+        }
+    return {
+        "window": {"from": window[0], "to": window[-1], "days": len(window)} if window else None,
+        "companies": result,
+    }
+
+
+class CacheWarmer:
+    """
+    Předehřívání cache ve vlákně webového procesu.
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor a spust predehrivani pro aplikaci.
+        warmer = CacheWarmer(app)
+        warmer.start()
+
+    2. Jeden beh lze spustit i primo (napr. z testu nebo workeru).
+        warmer.run_once()
+
+    3. Stav poslednich behu vraci stats.
+        warmer.stats()
+    """
+
+    def __init__(
+        self,
+        app,
+        companies: List[str] = ALLOWED_COMPANIES_IN_UI,
+        interval: float = CACHE_WARM_INTERVAL_SECONDS,
+        concurrency: int = CACHE_WARM_CONCURRENCY,
+    ):
+        self.app = app
+        self.companies = list(companies)
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_run = None
+        self.company_status: Dict[str, Dict] = {}
+        self.owner = make_worker_id()
+
+    def _warm_one(self, name: str, window: List[str]) -> Dict:
+        started = time.time()
+        status = {"last_run_at": started, "error": None}
+        try:
+            with self.app.app_context():
+                status.update(warm_company(name, window))
+        except Exception as e:
+            print(f"[ERROR] Předehřátí cache pro {name} selhalo: {e}")
+            status["error"] = str(e)
+        status["duration_seconds"] = round(time.time() - started, 3)
+        with self.lock:
+            self.company_status[name] = status
+        return status
+
+    def run_once(self, now: Optional[float] = None) -> Dict:
+        """
+        Jeden průchod všemi společnostmi (nejvýše `concurrency` souběžně).
+
+        Returns:
+            Dict: {"started_at", "duration_seconds", "warmed", "errors"}
+        """
+        started = time.time()
+        window = warm_window(now=now)
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="cache-warm"
+        ) as executor:
+            statuses = list(executor.map(lambda name: self._warm_one(name, window), self.companies))
+
+        run = {
+            "started_at": started,
+            "duration_seconds": round(time.time() - started, 3),
+            "warmed": sum(
+                1 for status in statuses if status.get("missing_days") and not status["error"]
+            ),
+            "errors": sum(1 for status in statuses if status["error"]),
+        }
+        with self.lock:
+            self.runs += 1
+            self.last_run = run
+        print(
+            f"[INFO] Předehřátí cache: {run['warmed']} společností doplněno, "
+            f"{run['errors']} chyb, {run['duration_seconds']} s."
+        )
+        return run
+
+    def _run(self) -> None:
+        if self.stop_event.wait(CACHE_WARM_START_DELAY):
+            return
+        while not self.stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    claimed = claim_warm_run(self.owner, self.interval)
+                if claimed:
+                    self.run_once()
+            except Exception as e:
+                print(f"[ERROR] Předehřátí cache selhalo: {e}")
+            if self.stop_event.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        """Spustí předehřívání na pozadí (CACHE_WARM_INTERVAL_SECONDS=0 = vypnuto)."""
+        if self.interval <= 0 or not self.companies:
+            return
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def stats(self) -> Dict:
+        """Stav předehřívání tohoto procesu - poslední běh a výsledek pro jednotlivé společnosti."""
+        with self.lock:
+            return {
+                "enabled": self.interval > 0,
+                "interval_seconds": self.interval,
+                "concurrency": self.concurrency,
+                "runs": self.runs,
+                "last_run": self.last_run,
+                "companies": {name: dict(status) for name, status in self.company_status.items()},
+            }
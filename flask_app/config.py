@@ -25,6 +25,185 @@ if not NEWS_API_KEY or not OPEN_AI_API_KEY:
         NEWS_API_KEY = NEWS_API_KEY or None  # Fallback na None
         OPEN_AI_API_KEY = OPEN_AI_API_KEY or None  # Fallback na None
 
+# Limity volání externích API (0 = bez limitu) - sdílené všemi vlákny procesu. Platí pro každý proces
+# zvlášť (webový proces i každý worker), při N procesech je potřeba limity nastavit na 1/N kvóty API
+NEWSAPI_REQUESTS_PER_MINUTE = float(os.getenv("NEWSAPI_REQUESTS_PER_MINUTE", "30"))
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+# Opakování při 429/5xx - exponenciální backoff s náhodným rozptylem, respektuje Retry-After
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))  # sekundy
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "60"))  # sekundy
+
+# Hodnocení přes OpenAI - odpověď vynucená JSON schématem (0 = volný text s JSON objektem) a počet
+# doplňujících dotazů jen na chybějící nebo neplatná hodnocení jednotlivých zpráv
+OPENAI_STRUCTURED_OUTPUT = os.getenv("OPENAI_STRUCTURED_OUTPUT", "1") == "1"
+RATING_REPAIR_ATTEMPTS = int(os.getenv("RATING_REPAIR_ATTEMPTS", "2"))
+
+# Dávkové hodnocení (/submit?batch=1, jen RATING_MODE="llm") - hodnocení společností z mnoha požadavků
+# se sbírají do JSONL dávek a odesílají přes backend RATING_BATCH_BACKEND ("openai" = Batch API,
+# "local" = souborová náhrada bez sítě). Dávka se odešle, jakmile má RATING_BATCH_MIN_ITEMS položek
+# nebo nejstarší čeká RATING_BATCH_MAX_WAIT_SECONDS; stav se kontroluje jednou za RATING_BATCH_POLL_SECONDS.
+RATING_BATCH_BACKEND = os.getenv("RATING_BATCH_BACKEND", "openai")
+RATING_BATCH_DIR = os.getenv("RATING_BATCH_DIR", "batches")  # Relativní cesta je vůči složce instance/
+RATING_BATCH_MIN_ITEMS = int(os.getenv("RATING_BATCH_MIN_ITEMS", "100"))
+RATING_BATCH_MAX_ITEMS = int(os.getenv("RATING_BATCH_MAX_ITEMS", "5000"))  # Položek v jednom souboru
+RATING_BATCH_MAX_WAIT_SECONDS = float(os.getenv("RATING_BATCH_MAX_WAIT_SECONDS", "600"))
+RATING_BATCH_POLL_SECONDS = float(os.getenv("RATING_BATCH_POLL_SECONDS", "60"))  # 0 = vypnuto
+
+# Agregace hodnocení článků za období - poločas útlumu podle stáří článku ve dnech (0 = bez útlumu),
+# váhy zdrojů zpráv ("Reuters=2,Bloomberg=1.5", ostatní váha 1) a podíl ořezu extrémních hodnocení
+# na každé straně (0 až 0.5). Výchozí nastavení = prostý průměr.
+RATING_DECAY_HALF_LIFE_DAYS = float(os.getenv("RATING_DECAY_HALF_LIFE_DAYS", "0"))
+RATING_SOURCE_WEIGHTS = os.getenv("RATING_SOURCE_WEIGHTS", "")
+RATING_TRIM_FRACTION = float(os.getenv("RATING_TRIM_FRACTION", "0"))
+
+# Deadline zpracování jednoho požadavku v sekundách (lze přepsat parametrem ?deadline= při /submit)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "300"))
+REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "3600"))
+ARTICLE_DOWNLOAD_TIMEOUT = float(os.getenv("ARTICLE_DOWNLOAD_TIMEOUT", "7"))  # Timeout stažení článku
+# Jak dlouho čekat na plný text článku, který má v NewsAPI úryvek (description/content) - pak se hodnotí
+# úryvek a plný text se použije až z cache u dalších požadavků (0 = čekat na plný text až do deadlinu)
+ARTICLE_FULLTEXT_BUDGET = float(os.getenv("ARTICLE_FULLTEXT_BUDGET", "3"))
+# Souběžná stahování článků - sdílená všemi úlohami procesu
+ARTICLE_DOWNLOAD_WORKERS = int(os.getenv("ARTICLE_DOWNLOAD_WORKERS", "8"))
+# Stažené články (podle normalizované URL) se sdílí mezi společnostmi i úlohami
+ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", "500"))  # Počet článků v paměti
+ARTICLE_CACHE_SECONDS = float(os.getenv("ARTICLE_CACHE_SECONDS", "3600"))
+# Jistič domén článků - po DOMAIN_BREAKER_FAILURES neúspěšných staženích v řadě (0 = vypnuto) nebo při průměrné
+# latenci nad DOMAIN_BREAKER_SLOW_SECONDS (0 = nehlídá se) se doména na DOMAIN_BREAKER_COOLDOWN_SECONDS nestahuje
+# a místo textu článku se použije úryvek z NewsAPI (description/content)
+DOMAIN_BREAKER_FAILURES = int(os.getenv("DOMAIN_BREAKER_FAILURES", "3"))
+DOMAIN_BREAKER_COOLDOWN_SECONDS = float(os.getenv("DOMAIN_BREAKER_COOLDOWN_SECONDS", "600"))
+DOMAIN_BREAKER_SLOW_SECONDS = float(os.getenv("DOMAIN_BREAKER_SLOW_SECONDS", "0"))
+DOMAIN_BREAKER_MIN_SAMPLES = int(os.getenv("DOMAIN_BREAKER_MIN_SAMPLES", "5"))
+DOMAIN_LATENCY_ALPHA = float(os.getenv("DOMAIN_LATENCY_ALPHA", "0.2"))  # váha nového vzorku v EWMA
+DOMAIN_HEALTH_MAX_DOMAINS = int(os.getenv("DOMAIN_HEALTH_MAX_DOMAINS", "1000"))
+
+# Streamované zpracování požadavku - společnosti se stahují, hodnotí a ukládají postupně a texty jejich
+# článků se hned uvolní (0 = nejdřív stáhnout vše, pak hodnotit). Při překročení limitu paměti procesu
+# (RSS v MB, 0 = bez limitu) se zbývající společnosti přeskočí s chybou.
+PROCESS_STREAMING = os.getenv("PROCESS_STREAMING", "1") == "1"
+PROCESS_MEMORY_LIMIT_MB = float(os.getenv("PROCESS_MEMORY_LIMIT_MB", "0"))
+
+# Ukládání hodnocení po dnech - opakované dotazy na stejné období stahují a hodnotí jen chybějící dny
+DAILY_SENTIMENT_CACHE = os.getenv("DAILY_SENTIMENT_CACHE", "1") == "1"
+# Nejvýše tolik chybějících dní (od nejnovějších) se stahuje po dnech a uloží, ostatní chybějící dny
+# se stáhnou jedním voláním a jen se ohodnotí - NewsAPI se tak na společnost volá nejvýše N + 1 krát
+DAILY_FETCH_MAX_DAYS = int(os.getenv("DAILY_FETCH_MAX_DAYS", "3"))
+
+# Téměř shodné články (převzaté agenturní zprávy) se hodnotí jen jednou - zástupce shluku
+# se do průměru započítá s váhou velikosti shluku. Shoda = SimHash otisky n-tic slov
+# (NEAR_DUPLICATE_SHINGLE_SIZE) liší nejvýše v NEAR_DUPLICATE_MAX_DISTANCE z 64 bitů,
+# kratší texty než NEAR_DUPLICATE_MIN_WORDS slov se slučují jen při úplné shodě
+NEAR_DUPLICATE_DETECTION = os.getenv("NEAR_DUPLICATE_DETECTION", "1") == "1"
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3"))
+NEAR_DUPLICATE_SHINGLE_SIZE = int(os.getenv("NEAR_DUPLICATE_SHINGLE_SIZE", "3"))
+NEAR_DUPLICATE_MIN_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", "20"))
+
+# Předehřívání cache pro ALLOWED_COMPANIES_IN_UI - každých N sekund (0 = vypnuto, výchozí - spotřebovává
+# kvótu NewsAPI a OpenAI) se dopočítají chybějící dny z posledních CACHE_WARM_DAYS uzavřených dní,
+# nejvýše CACHE_WARM_CONCURRENCY společností souběžně. Při více procesech běží jen v jednom (zámek v DB)
+CACHE_WARM_INTERVAL_SECONDS = float(os.getenv("CACHE_WARM_INTERVAL_SECONDS", "0"))
+CACHE_WARM_START_DELAY = float(os.getenv("CACHE_WARM_START_DELAY", "60"))  # Prodleva po startu procesu
+CACHE_WARM_DAYS = int(os.getenv("CACHE_WARM_DAYS", "7"))
+CACHE_WARM_CONCURRENCY = int(os.getenv("CACHE_WARM_CONCURRENCY", "2"))
+CACHE_WARM_TIMEOUT = float(os.getenv("CACHE_WARM_TIMEOUT", "120"))  # Časový rozpočet na společnost
+
+# Režim hodnocení zpráv: "local" (lexikon), "llm" (OpenAI) nebo "local-then-llm"
+RATING_MODES = ("local", "llm", "local-then-llm")
+RATING_MODE = os.getenv("RATING_MODE", "llm")
+if RATING_MODE not in RATING_MODES:
+    # neznámý režim by jinak selhal až při zpracování požadavku (ve stavu "processing")
+    raise ValueError(f"Neznámý RATING_MODE '{RATING_MODE}', povolené: {', '.join(RATING_MODES)}")
+# Minimální jistota lokálního hodnocení, pod kterou se v režimu "local-then-llm" volá OpenAI
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "0.5"))
+
+# Fronta úloh: "thread" (zpracování ve vlákně webového procesu) nebo "queue" (jen zápis do DB,
+# zpracování obstarají samostatné procesy `python -m flask_app.worker`)
+JOB_QUEUE_MODE = os.getenv("JOB_QUEUE_MODE", "thread")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))  # Platnost zámku úlohy
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))  # Prodlužování zámku
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Max. počet pokusů o zpracování
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))  # Interval dotazování workeru
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))  # Vláken na worker
+# Po startu webového procesu (režim "thread") znovu spustí nedokončené úlohy
+JOB_RECOVER_ON_START = os.getenv("JOB_RECOVER_ON_START", "1") == "1"
+# Pravidelné úlohy na pozadí (údržba DB, dávkové hodnocení, předehřívání cache) ve webovém procesu.
+# Při více procesech webu je vhodné nastavit 0 a spouštět je v jednom workeru s --background
+WEB_BACKGROUND_TASKS = os.getenv("WEB_BACKGROUND_TASKS", "1") == "1"
+
+# Hromadné zadání /submit/bulk (NDJSON) - počet požadavků v jedné transakci a max. délka řádku v bajtech
+BULK_SUBMIT_BATCH_SIZE = int(os.getenv("BULK_SUBMIT_BATCH_SIZE", "500"))
+BULK_SUBMIT_MAX_LINE_BYTES = int(os.getenv("BULK_SUBMIT_MAX_LINE_BYTES", "65536"))
+
+# Webhooky po dokončení požadavku (/submit?callback=URL) - interval kontroly DB (0 = vypnuto),
+# počet souběžných volání, max. výsledků v jednom volání, timeout a opakování s backoffem (sekundy)
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "2"))
+WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "4"))
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "20"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_RETRY_BASE_DELAY = float(os.getenv("WEBHOOK_RETRY_BASE_DELAY", "2"))
+WEBHOOK_RETRY_MAX_DELAY = float(os.getenv("WEBHOOK_RETRY_MAX_DELAY", "600"))
+# Povolit webhooky na loopback, privátní a link-local adresy (jen pro lokální testování)
+WEBHOOK_ALLOW_PRIVATE = os.getenv("WEBHOOK_ALLOW_PRIVATE", "0") == "1"
+
+# Plánovač úloh - pořadí podle třídy priority (?priority=high|normal|low), malé požadavky
+# (nejvýše SCHEDULER_SMALL_JOB_COMPANIES společností) a dlouho čekající úlohy se posouvají o třídu výš
+SCHEDULER_SMALL_JOB_COMPANIES = int(os.getenv("SCHEDULER_SMALL_JOB_COMPANIES", "3"))
+SCHEDULER_AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "60"))
+# Kolik úloh jednoho klienta může běžet současně, než dostanou přednost úlohy ostatních klientů
+SCHEDULER_CLIENT_MAX_RUNNING = int(os.getenv("SCHEDULER_CLIENT_MAX_RUNNING", "1"))
+SCHEDULER_WINDOW = int(os.getenv("SCHEDULER_WINDOW", "50"))  # Počet kandidátů zvažovaných při výběru
+
+# Jak dlouho (s) může proces použít stav portfolia z cache bez kontroly verze v DB (0 = vždy kontrolovat)
+PORTFOLIO_CACHE_TTL = float(os.getenv("PORTFOLIO_CACHE_TTL", "0"))
+
+# Maximální počet událostí vrácených endpointem /UI/history
+HISTORY_MAX_EVENTS = int(os.getenv("HISTORY_MAX_EVENTS", "1000"))
+
+# Profilování (cProfile): "off", "flag" (jen ?profile=1 s X-Admin-Token) nebo "all"
+PROFILING = os.getenv("PROFILING", "off").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # Relativní cesta je vůči složce instance/
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))  # Starší profily se mažou
+# Token pro administrátorské endpointy (/admin/...) - bez nastavení jsou nedostupné
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Údržba DB (0 = vypnuto, výchozí - data se mažou jen po výslovném zapnutí): u dokončených požadavků
+# se po N dnech smažou texty článků (news_data, sentiment_data zůstává) a po M dnech se celé záznamy
+# přesunou do komprimovaných archivních souborů (/output/<id> je pak už nenajde)
+NEWS_DATA_RETENTION_DAYS = float(os.getenv("NEWS_DATA_RETENTION_DAYS", "0"))
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")  # Relativní cesta je vůči složce instance/
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "0"))
+# Omezení dopadu na provoz - údržba běží po dávkách s pauzou mezi nimi
+MAINTENANCE_BATCH_SIZE = int(os.getenv("MAINTENANCE_BATCH_SIZE", "200"))
+MAINTENANCE_MAX_BATCHES = int(os.getenv("MAINTENANCE_MAX_BATCHES", "50"))  # Na jeden krok a běh
+MAINTENANCE_BATCH_PAUSE = float(os.getenv("MAINTENANCE_BATCH_PAUSE", "0.2"))  # sekundy
+VACUUM_PAGES_PER_RUN = int(os.getenv("VACUUM_PAGES_PER_RUN", "1000"))  # SQLite incremental_vacuum
+
+# Komprimace velkých JSON sloupců (news_data, volitelně input_data): "zlib", "zstd" (balíček zstandard)
+# nebo "none". Hodnoty menší než JSON_COMPRESSION_MIN_BYTES se ukládají nekomprimované.
+JSON_COMPRESSION = os.getenv("JSON_COMPRESSION", "zlib")
+JSON_COMPRESSION_LEVEL = int(os.getenv("JSON_COMPRESSION_LEVEL", "6"))
+JSON_COMPRESSION_MIN_BYTES = int(os.getenv("JSON_COMPRESSION_MIN_BYTES", "256"))
+COMPRESS_INPUT_DATA = os.getenv("COMPRESS_INPUT_DATA", "0") == "1"
+
+# Long polling stavu - /output/<id>/status?wait=<s> čeká na dokončení požadavku nejvýše
+# STATUS_WAIT_MAX_SECONDS, stav v DB kontroluje jednou za STATUS_WAIT_POLL_SECONDS
+STATUS_WAIT_MAX_SECONDS = float(os.getenv("STATUS_WAIT_MAX_SECONDS", "30"))
+STATUS_WAIT_POLL_SECONDS = float(os.getenv("STATUS_WAIT_POLL_SECONDS", "0.5"))
+
+# ASGI režim (uvicorn flask_app.asgi:application) - čtecí endpointy /output/... běží asynchronně,
+# ostatní se předávají Flask aplikaci v ASGI_WSGI_THREADS vláknech. Čtení z DB je asynchronní,
+# pokud je k dispozici async ovladač (aiosqlite, asyncpg; ASGI_ASYNC_DB="auto"), jinak běží
+# v ASGI_DB_THREADS vláknech (ASGI_ASYNC_DB="0" vynutí vlákna).
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "16"))
+ASGI_DB_THREADS = int(os.getenv("ASGI_DB_THREADS", "8"))
+ASGI_ASYNC_DB = os.getenv("ASGI_ASYNC_DB", "auto").lower()
+ASGI_BODY_SPOOL_BYTES = int(os.getenv("ASGI_BODY_SPOOL_BYTES", str(1024 * 1024)))  # Větší tělo jde na disk
+
 # Databázová konfigurace
 SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///database.db")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -0,0 +1,332 @@
+"""
+Předpočítané hodnocení zpráv po společnostech a dnech (tabulka CompanyDaySentiment).
+
+Období from-to z požadavku se rozloží na jednotlivé dny. Dny, které už jsou v tabulce, se jen
+sečtou a zprávy se stahují a hodnotí jen pro chybějící dny (nejvýše DAILY_FETCH_MAX_DAYS dní zvlášť,
+viz tasks.fetch_company_articles). Ukládají se jen uzavřené dny (před dneškem v UTC), zprávy z dnešního
+dne ještě přibývají, a jen dny, které se stáhly i ohodnotily celé - den s chybou stahování nebo
+hodnocení zůstane chybějící a spočítá se znovu s dalším požadavkem.
+
+Hodnocení jednotlivých článků se ukládají do ArticleRating - z nich se při nastavené agregaci
+(útlum podle stáří, váhy zdrojů, ořez, viz rating_aggregation) počítá hodnocení za období.
+"""
+
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from flask_app.database import db, upsert
+from flask_app.models import ArticleRating, CompanyDaySentiment
+from flask_app.utils.rating_aggregation import (
+    aggregate_ratings,
+    default_options,
+    is_plain_mean,
+    published_timestamp,
+)
+from flask_app.config import DAILY_SENTIMENT_CACHE
+
+# Delší období se po dnech neukládají (NewsAPI stejně vrací jen omezený počet zpráv)
+MAX_CACHED_DAYS = 366
+
+
+def company_key(name: str) -> str:
+    """Klíč společnosti v tabulce - vyhledávání NewsAPI nerozlišuje velikost písmen."""
+    return name.strip().lower()[:100]
+
+
+def request_days(date_from: str, date_to: str) -> List[str]:
+    """
+    Rozloží období požadavku na seznam dní (YYYY-MM-DD, včetně obou krajních).
+
+    Raises:
+        ValueError: Pokud období není zadané jako dvě data (bez času), je obrácené nebo příliš dlouhé
+    """
+    if len(str(date_from)) != 10 or len(str(date_to)) != 10:
+        raise ValueError("Období musí být zadané jako data YYYY-MM-DD")
+    start = date.fromisoformat(date_from)
+    end = date.fromisoformat(date_to)
+    if end < start or (end - start).days >= MAX_CACHED_DAYS:
+        raise ValueError(f"Neplatné období {date_from} - {date_to}")
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def is_closed_day(day: str, today: Optional[str] = None) -> bool:
+    """True pro dny před dneškem (UTC) - jejich zprávy se už nemění a lze je uložit."""
+    today = today or datetime.now(timezone.utc).date().isoformat()
+    return day < today
+
+
+def article_day(article: Dict) -> Optional[str]:
+    """Den vydání článku z NewsAPI (publishedAt je ISO čas v UTC)."""
+    published_at = article.get("publishedAt") or ""
+    try:
+        return date.fromisoformat(published_at[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+def plan_company(company: Dict, rating_mode: str) -> Dict:
+    """
+    Zjistí, které dny období společnosti už jsou spočítané a které je potřeba stáhnout.
+
+    Args:
+        company (Dict): Položka vstupních dat požadavku (name, from, to)
+        rating_mode (str): Režim hodnocení - hodnocení různých režimů se nemíchají
+
+    Returns:
+        Dict: {"key", "days", "cached": {den: agregát}, "missing": [dny], "covered": [dny]};
+            "days" je None, pokud se období po dnech neukládá (pak se stahuje celé),
+            "covered" doplní stažení zpráv (chybějící dny stažené celé, viz fetch_company_articles)
+    """
+    plan = {"key": company_key(company["name"]), "days": None, "cached": {}, "missing": [], "covered": []}
+    if not DAILY_SENTIMENT_CACHE:
+        return plan
+    try:
+        days = request_days(company["from"], company["to"])
+    except (TypeError, ValueError):
+        return plan
+
+    rows = db.session.execute(
+        select(CompanyDaySentiment).where(
+            CompanyDaySentiment.company == plan["key"],
+            CompanyDaySentiment.rating_mode == rating_mode,
+            CompanyDaySentiment.day.in_(days),
+        )
+    ).scalars()
+    plan["days"] = days
+    plan["cached"] = {
+        row.day: {
+            "article_count": row.article_count,
+            "rated_count": row.rated_count,
+            "rating_sum": row.rating_sum,
+        }
+        for row in rows
+    }
+    plan["missing"] = [day for day in days if day not in plan["cached"]]
+    return plan
+
+
+def aggregate_by_day(articles: List[Dict], ratings: Dict[int, float]) -> Dict[str, Dict]:
+    """
+    Sečte hodnocení článků po dnech vydání.
+
+    Args:
+        articles (List[Dict]): Hodnocené články (ve stejném pořadí jako zprávy poslané hodnotiteli)
+        ratings (Dict[int, float]): Index článku -> hodnocení (neohodnocené články chybí)
+
+    Returns:
+        Dict[str, Dict]: Den -> {"article_count", "rated_count", "rating_sum"}
+    """
+    per_day = {}
+    for idx, article in enumerate(articles):
+        day = article_day(article)
+        if day is None:
+            continue
+        aggregate = per_day.setdefault(
+            day, {"article_count": 0, "rated_count": 0, "rating_sum": 0.0}
+        )
+        aggregate["article_count"] += 1
+        if idx in ratings:
+            aggregate["rated_count"] += 1
+            aggregate["rating_sum"] += float(ratings[idx])
+    return per_day
+
+
+def store_day_aggregates(
+    key: str,
+    rating_mode: str,
+    days: Iterable[str],
+    per_day: Dict[str, Dict],
+    now: Optional[float] = None,
+) -> int:
+    """
+    Uloží agregáty zadaných dní, jen uzavřené dny. Den bez článků se uloží s nulovými počty -
+    volající proto předává jen dny, které se stáhly a ohodnotily celé (viz complete_days).
+
+    Returns:
+        int: Počet uložených dní
+    """
+    now = time.time() if now is None else now
+    empty = {"article_count": 0, "rated_count": 0, "rating_sum": 0.0}
+    values = [
+        {"company": key, "day": day, "rating_mode": rating_mode, "computed_at": now, **per_day.get(day, empty)}
+        for day in days
+        if is_closed_day(day)
+    ]
+    if not values:
+        return 0
+    db.session.execute(
+        upsert(
+            CompanyDaySentiment,
+            values,
+            index_elements=["company", "day", "rating_mode"],
+            update_columns=("article_count", "rated_count", "rating_sum", "computed_at"),
+        )
+    )
+    db.session.commit()
+    return len(values)
+
+
+def complete_days(plan: Dict, rated_articles: List[Dict], ratings: Dict[int, float]) -> List[str]:
+    """
+    Vybere chybějící dny, které lze uložit - stažené celé (plan["covered"]) a se všemi články
+    ohodnocenými (při selhání nebo vypršení hodnocení chybí hodnocení a den se neuloží).
+
+    Returns:
+        List[str]: Dny k uložení
+    """
+    unrated_days = {
+        article_day(article) for idx, article in enumerate(rated_articles) if idx not in ratings
+    }
+    missing = set(plan["missing"])
+    return [day for day in plan.get("covered", []) if day in missing and day not in unrated_days]
+
+
+def combine_ratings(aggregates: Iterable[Dict]) -> Optional[float]:
+    """Průměrné hodnocení za období z denních agregátů (None, pokud není nic ohodnoceno)."""
+    rating_sum = 0.0
+    rated_count = 0
+    for aggregate in aggregates:
+        rating_sum += aggregate["rating_sum"]
+        rated_count += aggregate["rated_count"]
+    if not rated_count:
+        return None
+    return round(rating_sum / rated_count, 2)
+
+
+def store_article_ratings(
+    key: str,
+    rating_mode: str,
+    articles: List[Dict],
+    ratings: Dict[int, float],
+    now: Optional[float] = None,
+) -> int:
+    """
+    Uloží hodnocení jednotlivých článků (i z dnešního dne - opakované hodnocení se přepíše).
+
+    Args:
+        key (str): Klíč společnosti (viz company_key)
+        rating_mode (str): Režim hodnocení
+        articles (List[Dict]): Hodnocené články (article_id, publishedAt, source, content_source)
+        ratings (Dict[int, float]): Index článku -> hodnocení
+
+    Returns:
+        int: Počet uložených hodnocení
+    """
+    now = time.time() if now is None else now
+    values = {}
+    for idx, rating in ratings.items():
+        article = articles[idx]
+        if not article.get("article_id"):
+            continue
+        values[article["article_id"]] = {
+            "company": key,
+            "article_id": article["article_id"],
+            "rating_mode": rating_mode,
+            "day": article_day(article),
+            "published_at": published_timestamp(article.get("publishedAt")),
+            "source": str(article["source"])[:100] if article.get("source") else None,
+            "content_source": article.get("content_source", "full"),
+            "rating": float(rating),
+            "computed_at": now,
+        }
+    if not values:
+        return 0
+    db.session.execute(
+        upsert(
+            ArticleRating,
+            list(values.values()),
+            index_elements=["company", "article_id", "rating_mode"],
+            update_columns=("day", "published_at", "source", "content_source", "rating", "computed_at"),
+        )
+    )
+    db.session.commit()
+    return len(values)
+
+
+def load_article_ratings(
+    key: str, rating_mode: str, date_from: Optional[str] = None, date_to: Optional[str] = None
+) -> Dict:
+    """
+    Načte uložená hodnocení článků společnosti za období jako pole pro aggregate_ratings.
+
+    Args:
+        key (str): Klíč společnosti (viz company_key)
+        rating_mode (str): Režim hodnocení
+        date_from (Optional[str]): První den (YYYY-MM-DD, včetně)
+        date_to (Optional[str]): Poslední den (YYYY-MM-DD, včetně)
+
+    Returns:
+        Dict: {"ratings": np.ndarray, "published": np.ndarray (NaN = neznámé), "sources": List[str]}
+    """
+    query = select(ArticleRating.rating, ArticleRating.published_at, ArticleRating.source).where(
+        ArticleRating.company == key, ArticleRating.rating_mode == rating_mode
+    )
+    if date_from:
+        query = query.where(ArticleRating.day >= date_from)
+    if date_to:
+        query = query.where(ArticleRating.day <= date_to)
+    rows = db.session.execute(query).all()
+    return {
+        "ratings": np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows)),
+        "published": np.fromiter(
+            (np.nan if row[1] is None else row[1] for row in rows), dtype=np.float64, count=len(rows)
+        ),
+        "sources": [row[2] for row in rows],
+    }
+
+
+def period_rating(
+    plan: Dict,
+    rating_mode: str,
+    rated_articles: List[Dict],
+    ratings: Dict[int, float],
+    options: Optional[Dict] = None,
+) -> Optional[float]:
+    """
+    Složí hodnocení společnosti za celé období z hodnocení nově stažených článků.
+
+    Hodnocení článků se uloží (store_article_ratings). Při ukládání po dnech se nově spočítané dny
+    uloží (store_day_aggregates, jen úplné dny - viz complete_days) a výsledek se složí i s již uloženými dny, jinak je to průměr
+    hodnocení článků. Při nastavené agregaci (útlum, váhy zdrojů, ořez) se výsledek spočítá
+    z uložených hodnocení článků celého období.
+
+    Args:
+        plan (Dict): Uložené a chybějící dny společnosti (viz plan_company)
+        rating_mode (str): Režim hodnocení, pod kterým se dny uloží
+        rated_articles (List[Dict]): Hodnocené články (article_id, publishedAt, source, content_source),
+            ve stejném pořadí jako ratings
+        ratings (Dict[int, float]): Index článku -> hodnocení
+        options (Optional[Dict]): Nastavení agregace (výchozí z configu, viz rating_aggregation.default_options)
+
+    Returns:
+        Optional[float]: Průměrné hodnocení (None, pokud není nic ohodnoceno)
+    """
+    options = default_options() if options is None else options
+    store_article_ratings(plan["key"], rating_mode, rated_articles, ratings)
+    if plan["days"] is None:
+        if is_plain_mean(options):
+            return round(sum(ratings.values()) / len(ratings), 2) if ratings else None
+        indices = list(ratings)
+        return aggregate_ratings(
+            [ratings[idx] for idx in indices],
+            [published_timestamp(rated_articles[idx].get("publishedAt")) for idx in indices],
+            [rated_articles[idx].get("source") for idx in indices],
+            **options,
+        )
+
+    per_day = aggregate_by_day(rated_articles, ratings)
+    store_day_aggregates(plan["key"], rating_mode, complete_days(plan, rated_articles, ratings), per_day)
+    aggregates = list(plan["cached"].values()) + list(per_day.values())
+    if is_plain_mean(options):
+        return combine_ratings(aggregates)
+
+    stored = load_article_ratings(plan["key"], rating_mode, plan["days"][0], plan["days"][-1])
+    if len(stored["ratings"]) < sum(aggregate["rated_count"] for aggregate in aggregates):
+        # dny spočítané před ukládáním hodnocení článků - jen prostý průměr
+        print(f"[WARNING] Chybí uložená hodnocení článků pro {plan['key']}, použit prostý průměr.")
+        return combine_ratings(aggregates)
+    return aggregate_ratings(stored["ratings"], stored["published"], stored["sources"], **options)
@@ -1,4 +1,20 @@
+import json
+import zlib
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import LargeBinary, event, inspect, text
+from sqlalchemy.types import TypeDecorator
+
+from flask_app.config import (
+    JSON_COMPRESSION,
+    JSON_COMPRESSION_LEVEL,
+    JSON_COMPRESSION_MIN_BYTES,
+)
+
+try:
+    import zstandard  # Volitelná závislost pro JSON_COMPRESSION="zstd"
+except ImportError:
+    zstandard = None
 
 db = SQLAlchemy()
 
@@ -7,4 +23,208 @@ def init_db(app):
     app.config.from_object("flask_app.config")
     db.init_app(app)
     with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", set_sqlite_pragmas)
         db.create_all()  # Vytvoření tabulek při spuštění aplikace
+        add_missing_columns()
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Nová SQLite databáze se vytvoří s auto_vacuum=INCREMENTAL, aby údržba mohla po částech
+    vracet uvolněné místo (PRAGMA incremental_vacuum). U existující databáze nemá vliv,
+    převod provede až jednorázový VACUUM (python -m flask_app.worker --enable-incremental-vacuum).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.close()
+
+
+def add_missing_columns():
+    """
+    Doplní do již existujících tabulek nové sloupce a indexy z modelů.
+    db.create_all() vytváří jen chybějící tabulky, starší databáze by tak nové sloupce neměly.
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            print(f"[INFO] Přidávám sloupec {table.name}.{column.name} ({column_type})")
+            with db.engine.begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                )
+
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def upsert(model, values, index_elements, update_columns=(), update_values=None):
+    """
+    Sestaví atomický INSERT ... ON CONFLICT DO UPDATE pro aktuální databázi.
+
+    Args:
+        model: Model (tabulka), do které se vkládá
+        values (dict | list): Vkládané hodnoty (jeden řádek nebo seznam řádků)
+        index_elements (list): Sloupce unikátního klíče, na kterém se řeší konflikt
+        update_columns (Iterable[str]): Sloupce, které se při konfliktu přepíšou vkládanou hodnotou
+        update_values (dict): Další hodnoty/výrazy, které se při konfliktu nastaví
+
+    Returns:
+        Insert: SQL příkaz připravený pro db.session.execute
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(model).values(values)
+        set_ = {column: stmt.inserted[column] for column in update_columns}
+        set_.update(update_values or {})
+        return stmt.on_duplicate_key_update(**set_)
+    else:
+        raise NotImplementedError(f"Upsert není podporován pro databázi {dialect}")
+
+    stmt = insert(model).values(values)
+    set_ = {column: stmt.excluded[column] for column in update_columns}
+    set_.update(update_values or {})
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+
+# Nulový bajt na začátku odliší komprimovaná data od JSON textu
+COMPRESSED_JSON_MAGIC = b"\x00CJ"
+
+
+class CompressedValue(bytes):
+    """Hotová uložená hodnota CompressedJSON (hlavička + komprimovaná data), zapíše se beze změny."""
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON sloupec ukládaný komprimovaně jako binární data.
+
+    Uložená hodnota začíná hlavičkou COMPRESSED_JSON_MAGIC a jedním bajtem kodeku
+    (n = bez komprese, z = zlib, s = zstd). Hodnoty bez hlavičky pocházejí ze starších
+    řádků uložených přes db.JSON a čtou se jako obyčejný JSON text.
+
+    Na SQLite lze typ sloupce změnit jen v modelu (SQLite nemá pevné typy sloupců),
+    na jiných databázích je potřeba sloupec převést na binární typ.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    CODECS = {"none": b"n", "zlib": b"z", "zstd": b"s"}
+
+    def __init__(
+        self,
+        codec: str = JSON_COMPRESSION,
+        level: int = JSON_COMPRESSION_LEVEL,
+        min_size: int = JSON_COMPRESSION_MIN_BYTES,
+    ):
+        super().__init__()
+        if codec not in self.CODECS:
+            raise ValueError(
+                f"Neznámý kodek komprese '{codec}', povolené: {', '.join(self.CODECS)}"
+            )
+        if codec == "zstd" and zstandard is None:
+            print("[WARNING] Balíček zstandard není nainstalován, používám zlib.")
+            codec = "zlib"
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+
+    def compress(self, raw: bytes) -> bytes:
+        if self.codec == "none" or len(raw) < self.min_size:
+            return COMPRESSED_JSON_MAGIC + b"n" + raw
+        if self.codec == "zstd":
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(raw)
+        else:
+            compressed = zlib.compress(raw, self.level)
+        return COMPRESSED_JSON_MAGIC + self.CODECS[self.codec] + compressed
+
+    @staticmethod
+    def decompress(value: bytes) -> bytes:
+        header_size = len(COMPRESSED_JSON_MAGIC)
+        codec, payload = value[header_size : header_size + 1], value[header_size + 1 :]
+        if codec == b"n":
+            return payload
+        if codec == b"z":
+            return zlib.decompress(payload)
+        if codec == b"s":
+            if zstandard is None:
+                raise RuntimeError("Pro čtení dat komprimovaných zstd je potřeba balíček zstandard")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        raise ValueError(f"Neznámý kodek komprimovaných dat: {codec!r}")
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, CompressedValue):  # už sestavená hodnota (CompressedJSONWriter)
+            return bytes(value)
+        raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return self.compress(raw)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):  # starší řádek uložený jako JSON text
+            return json.loads(value)
+        value = bytes(value)
+        if value.startswith(COMPRESSED_JSON_MAGIC):
+            value = self.decompress(value)
+        return json.loads(value.decode("utf-8"))
+
+
+class CompressedJSONWriter:
+    """
+    Postupné sestavení hodnoty CompressedJSON z fragmentů JSON textu.
+
+    Text se komprimuje průběžně, takže v paměti je vždy jen komprimovaná část -
+    velkou hodnotu (např. news_data) není potřeba nejdřív celou sestavit jako řetězec.
+    Fragmenty musí dohromady tvořit platný JSON.
+
+    # Navod k pouziti teto tridy.
+
+    1. Zapisuj fragmenty JSON textu.
+        writer = CompressedJSONWriter()
+        writer.write('{"items":[')
+        writer.write(json.dumps(item))
+        writer.write("]}")
+
+    2. Vysledek prirad do sloupce typu CompressedJSON.
+        request_data.news_data = writer.finish()
+    """
+
+    def __init__(self, codec: str = JSON_COMPRESSION, level: int = JSON_COMPRESSION_LEVEL):
+        if codec == "zstd" and zstandard is None:
+            codec = "zlib"
+        if codec == "zstd":
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif codec == "zlib":
+            self.compressor = zlib.compressobj(level)
+        else:
+            self.compressor = None
+        self.chunks = [COMPRESSED_JSON_MAGIC + CompressedJSON.CODECS[codec]]
+        self.size = 0  # velikost nekomprimovaného textu v bajtech
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.size += len(data)
+        chunk = self.compressor.compress(data) if self.compressor else data
+        if chunk:
+            self.chunks.append(chunk)
+
+    def finish(self) -> CompressedValue:
+        if self.compressor:
+            self.chunks.append(self.compressor.flush())
+        return CompressedValue(b"".join(self.chunks))
@@ -0,0 +1,339 @@
+"""
+Perzistentní fronta úloh nad tabulkou RequestData.
+
+Úlohu si worker zabere podmíněným UPDATE (nastaví worker_id jen pokud úlohu nikdo nedrží),
+takže ji nemohou získat dva workery zároveň, i když běží v různých procesech nebo na různých strojích.
+Stav "processing" pak nastaví samotný process_request.
+Zabraná úloha má zámek (lease) s časem vypršení, který worker průběžně prodlužuje (heartbeat).
+Pokud worker spadne, zámek vyprší a recover_expired_leases vrátí úlohu zpět do fronty.
+Pořadí, ve kterém si workery úlohy berou, určuje plánovač (flask_app.scheduler).
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.config import (
+    JOB_LEASE_SECONDS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS,
+    JOB_WORKER_CONCURRENCY,
+    SCHEDULER_WINDOW,
+)
+from flask_app.scheduler import DEFAULT_PRIORITY, job_from_request, order_jobs
+from flask_app.profiling import job_profile
+from flask_app.tasks import process_request
+
+
+def make_worker_id() -> str:
+    """Vytvoří jedinečný identifikátor workeru (stroj:pid:náhodný suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def scheduled_candidates(claimable, now: float) -> List[int]:
+    """
+    Vybere kandidáty na zpracování seřazené plánovačem.
+    Zvažuje SCHEDULER_WINDOW úloh s nejvyšší prioritou a stejný počet nejstarších úloh
+    (aby se i úlohy s nízkou prioritou díky stárnutí časem dostaly na řadu).
+
+    Returns:
+        List[int]: ID úloh v pořadí, v jakém se mají zabírat
+    """
+    columns = (
+        RequestData.id,
+        RequestData.priority,
+        RequestData.client_key,
+        RequestData.cost,
+        RequestData.created_at,
+    )
+    by_priority = (
+        select(*columns)
+        .where(claimable)
+        .order_by(func.coalesce(RequestData.priority, DEFAULT_PRIORITY), RequestData.id)
+        .limit(SCHEDULER_WINDOW)
+    )
+    oldest = select(*columns).where(claimable).order_by(RequestData.id).limit(SCHEDULER_WINDOW)
+    jobs = {
+        row.id: dict(row._mapping)
+        for query in (by_priority, oldest)
+        for row in db.session.execute(query)
+    }
+    if not jobs:
+        return []
+
+    # Rozpracované úlohy jednotlivých klientů napříč všemi workery
+    running_by_client = dict(
+        db.session.execute(
+            select(RequestData.client_key, func.count())
+            .where(
+                RequestData.worker_id.is_not(None),
+                RequestData.status.in_(["pending", "processing"]),
+                RequestData.lease_expires_at >= now,
+            )
+            .group_by(RequestData.client_key)
+        ).all()
+    )
+    return [job["id"] for job in order_jobs(jobs.values(), running_by_client, now)]
+
+
+def claim_job(
+    worker_id: str,
+    request_id: Optional[int] = None,
+    lease_seconds: float = JOB_LEASE_SECONDS,
+) -> Optional[int]:
+    """
+    Zabere jednu čekající úlohu pro daného workera.
+
+    Args:
+        worker_id (str): Identifikátor workeru
+        request_id (Optional[int]): Konkrétní úloha, jinak další podle plánovače
+        lease_seconds (float): Délka platnosti zámku
+
+    Returns:
+        Optional[int]: ID zabrané úlohy nebo None, pokud není co zpracovat
+    """
+    now = time.time()
+    claimable = and_(
+        RequestData.status == "pending",
+        or_(RequestData.worker_id.is_(None), RequestData.lease_expires_at < now),
+    )
+    if request_id is not None:
+        candidates = (
+            db.session.execute(
+                select(RequestData.id).where(claimable, RequestData.id == request_id)
+            )
+            .scalars()
+            .all()
+        )
+    else:
+        candidates = scheduled_candidates(claimable, now)[:5]
+
+    for candidate_id in candidates:
+        # Stejná podmínka v UPDATE zajistí, že úlohu zabere jen jeden worker
+        result = db.session.execute(
+            update(RequestData)
+            .where(RequestData.id == candidate_id, claimable)
+            .values(
+                worker_id=worker_id,
+                lease_expires_at=now + lease_seconds,
+                heartbeat_at=now,
+                attempts=func.coalesce(RequestData.attempts, 0) + 1,
+                started_at=func.coalesce(RequestData.started_at, now),
+            )
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return candidate_id
+    return None
+
+
+def heartbeat(
+    request_id: int, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS
+) -> bool:
+    """
+    Prodlouží zámek úlohy.
+
+    Returns:
+        bool: False pokud úlohu tento worker už nedrží (zámek převzal někdo jiný)
+    """
+    now = time.time()
+    result = db.session.execute(
+        update(RequestData)
+        .where(
+            RequestData.id == request_id,
+            RequestData.worker_id == worker_id,
+            RequestData.status.in_(["pending", "processing"]),
+        )
+        .values(lease_expires_at=now + lease_seconds, heartbeat_at=now)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def release_job(request_id: int, worker_id: str) -> None:
+    """
+    Uvolní zámek úspěšně zpracované úlohy.
+    """
+    db.session.execute(
+        update(RequestData)
+        .where(RequestData.id == request_id, RequestData.worker_id == worker_id)
+        .values(worker_id=None, lease_expires_at=None)
+    )
+    db.session.commit()
+
+
+def recover_expired_leases(now: Optional[float] = None) -> int:
+    """
+    Vrátí do fronty úlohy, jejichž worker přestal posílat heartbeat.
+    Úlohy ve stavu "processing" bez zámku (zpracovávané před restartem) se berou jako vypršelé.
+    Úlohy, které vyčerpaly JOB_MAX_ATTEMPTS pokusů, se označí jako "error".
+
+    Returns:
+        int: Počet obnovených úloh
+    """
+    now = time.time() if now is None else now
+    expired = or_(
+        and_(
+            RequestData.status == "processing",
+            or_(RequestData.lease_expires_at.is_(None), RequestData.lease_expires_at < now),
+        ),
+        and_(
+            RequestData.status == "pending",
+            RequestData.worker_id.is_not(None),
+            RequestData.lease_expires_at < now,
+        ),
+    )
+    exhausted = func.coalesce(RequestData.attempts, 0) >= JOB_MAX_ATTEMPTS
+
+    failed = db.session.execute(
+        update(RequestData)
+        .where(expired, exhausted)
+        .values(status="error", worker_id=None, lease_expires_at=None)
+    )
+    recovered = db.session.execute(
+        update(RequestData)
+        .where(expired)
+        .values(status="pending", worker_id=None, lease_expires_at=None)
+    )
+    db.session.commit()
+
+    if failed.rowcount:
+        print(f"[WARNING] {failed.rowcount} úloh vyčerpalo pokusy, označeny jako error.")
+    if recovered.rowcount:
+        print(f"[INFO] Obnoveno {recovered.rowcount} úloh s vypršelým zámkem.")
+    return recovered.rowcount
+
+
+class Heartbeat(threading.Thread):
+    """Vlákno, které po dobu zpracování úlohy pravidelně prodlužuje její zámek."""
+
+    def __init__(self, request_id, app, worker_id, interval=JOB_HEARTBEAT_SECONDS):
+        super().__init__(daemon=True)
+        self.request_id = request_id
+        self.app = app
+        self.worker_id = worker_id
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    if not heartbeat(self.request_id, self.worker_id):
+                        print(
+                            f"[WARNING] Worker {self.worker_id} ztratil zámek úlohy {self.request_id}."
+                        )
+                        return
+            except Exception as e:
+                print(f"[ERROR] Heartbeat úlohy {self.request_id} selhal: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def run_claimed_job(request_id, app, worker_id):
+    """
+    Zpracuje již zabranou úlohu - spustí process_request a po dobu běhu posílá heartbeat.
+
+    Pokud zpracování selže, zámek se neuvolní - úloha zůstane zabraná, dokud zámek
+    nevyprší, a pak ji recover_expired_leases vrátí do fronty (max. JOB_MAX_ATTEMPTS).
+    """
+    heartbeat_thread = Heartbeat(request_id, app, worker_id)
+    heartbeat_thread.start()
+    try:
+        with job_profile(request_id, app):
+            process_request(request_id, app)
+    except Exception as e:
+        print(f"[ERROR] Zpracování úlohy {request_id} selhalo: {e}")
+        return
+    finally:
+        heartbeat_thread.stop()
+
+    with app.app_context():
+        release_job(request_id, worker_id)
+
+
+def process_job(request_id, app, worker_id=None):
+    """
+    Zabere konkrétní úlohu a zpracuje ji (používá se pro zpracování ve vlákně webového procesu).
+    Pokud úlohu už drží jiný worker, nic nedělá.
+    """
+    worker_id = worker_id or make_worker_id()
+    with app.app_context():
+        claimed_id = claim_job(worker_id, request_id=request_id)
+    if claimed_id is None:
+        print(f"[WARNING] Úlohu {request_id} už zpracovává jiný worker.")
+        return
+    run_claimed_job(claimed_id, app, worker_id)
+
+
+def resume_pending_jobs(app, scheduler):
+    """
+    Po restartu obnoví vypršelé úlohy a všechny čekající předá plánovači webového procesu.
+
+    Args:
+        app (Flask): Instance Flask aplikace
+        scheduler (JobScheduler): Plánovač, který úlohy zpracuje
+    """
+    with app.app_context():
+        recover_expired_leases()
+        pending = (
+            db.session.execute(
+                select(RequestData)
+                .where(RequestData.status == "pending", RequestData.worker_id.is_(None))
+                .order_by(RequestData.id)
+            )
+            .scalars()
+            .all()
+        )
+        jobs = [job_from_request(request_data) for request_data in pending]
+
+    for job in jobs:
+        print(f"[INFO] Pokračuji ve zpracování úlohy {job['id']} po restartu.")
+        scheduler.submit(job)
+
+
+def run_worker(app, concurrency=JOB_WORKER_CONCURRENCY, poll_seconds=JOB_POLL_SECONDS, once=False):
+    """
+    Smyčka samostatného workeru - bere úlohy z DB fronty a zpracovává je v až `concurrency` vláknech.
+
+    Args:
+        app (Flask): Instance Flask aplikace
+        concurrency (int): Maximální počet souběžně zpracovávaných úloh
+        poll_seconds (float): Prodleva, když ve frontě nic není
+        once (bool): Skončí, jakmile je fronta prázdná a vše je zpracováno
+    """
+    worker_id = make_worker_id()
+    running = []
+    last_recovery = 0.0
+    print(f"[INFO] Worker {worker_id} spuštěn (souběžnost {concurrency}).")
+
+    while True:
+        running = [thread for thread in running if thread.is_alive()]
+
+        with app.app_context():
+            if time.time() - last_recovery >= JOB_HEARTBEAT_SECONDS:
+                recover_expired_leases()
+                last_recovery = time.time()
+
+            request_id = claim_job(worker_id) if len(running) < concurrency else None
+
+        if request_id is not None:
+            thread = threading.Thread(
+                target=run_claimed_job, args=(request_id, app, worker_id)
+            )
+            thread.start()
+            running.append(thread)
+            continue
+
+        if once and not running:
+            return
+        time.sleep(poll_seconds)
@@ -0,0 +1,314 @@
+"""
+Údržba databáze - retence, archivace a uvolňování místa.
+
+1. Dokončeným požadavkům starším než NEWS_DATA_RETENTION_DAYS se smažou texty článků (news_data),
+   hodnocení (sentiment_data) zůstává dostupné přes /output/<id>.
+2. Dokončené požadavky starší než ARCHIVE_AFTER_DAYS se zapíšou do komprimovaného souboru
+   (gzip, jeden JSON záznam na řádek) a z DB se smažou.
+3. Na SQLite se uvolněné stránky vrátí souborovému systému přes PRAGMA incremental_vacuum.
+
+Vše běží po dávkách (MAINTENANCE_BATCH_SIZE) s krátkou pauzou mezi nimi, takže zápisový zámek
+DB se drží jen krátce a běžné požadavky nečekají. Údržbu lze bezpečně spustit z více procesů
+zároveň - archivovaný záznam smaže jen jeden z nich.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, func, null, select, update
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.config import (
+    NEWS_DATA_RETENTION_DAYS,
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_DIR,
+    MAINTENANCE_INTERVAL_SECONDS,
+    MAINTENANCE_BATCH_SIZE,
+    MAINTENANCE_MAX_BATCHES,
+    MAINTENANCE_BATCH_PAUSE,
+    VACUUM_PAGES_PER_RUN,
+)
+
+# Stavy, ve kterých se požadavek už nezpracovává a lze ho zkrátit nebo archivovat
+TERMINAL_STATUSES = ("done", "cancelled", "error")
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def backfill_created_at(now: Optional[float] = None) -> int:
+    """
+    Doplní čas vytvoření požadavkům ze starší databáze (sloupec created_at dříve neexistoval).
+    Jejich retence se tak počítá od prvního běhu údržby. Chybějící čas poslední změny
+    (updated_at) se doplní časem vytvoření.
+
+    Returns:
+        int: Počet doplněných záznamů
+    """
+    now = time.time() if now is None else now
+    result = db.session.execute(
+        update(RequestData)
+        .where(RequestData.created_at.is_(None))
+        .values(created_at=now)
+    )
+    db.session.execute(
+        update(RequestData)
+        .where(RequestData.updated_at.is_(None))
+        .values(updated_at=func.coalesce(RequestData.created_at, now))
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def compact_news_data(
+    older_than: float,
+    batch_size: int = MAINTENANCE_BATCH_SIZE,
+    max_batches: int = MAINTENANCE_MAX_BATCHES,
+    pause: float = MAINTENANCE_BATCH_PAUSE,
+) -> int:
+    """
+    Smaže texty článků (news_data) u dokončených požadavků vytvořených před `older_than`.
+
+    Args:
+        older_than (float): Unix timestamp - starší požadavky se zkrátí
+        batch_size (int): Počet záznamů v jedné transakci
+        max_batches (int): Maximální počet dávek za jeden běh
+        pause (float): Pauza mezi dávkami v sekundách
+
+    Returns:
+        int: Počet zkrácených záznamů
+    """
+    compactable = (
+        RequestData.status.in_(TERMINAL_STATUSES),
+        RequestData.created_at < older_than,
+        RequestData.news_data.is_not(None),
+    )
+    total = 0
+    for _ in range(max_batches):
+        ids = (
+            db.session.execute(
+                select(RequestData.id)
+                .where(*compactable)
+                .order_by(RequestData.id)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            break
+
+        result = db.session.execute(
+            update(RequestData)
+            .where(RequestData.id.in_(ids), *compactable)
+            .values(news_data=null())
+        )
+        db.session.commit()
+        total += result.rowcount
+
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return total
+
+
+def resolve_archive_dir(archive_dir: Optional[str] = None) -> str:
+    """Vrátí absolutní cestu k archivu (relativní cesta je vůči složce instance/ aplikace)."""
+    archive_dir = archive_dir or ARCHIVE_DIR
+    if not os.path.isabs(archive_dir):
+        archive_dir = os.path.join(current_app.instance_path, archive_dir)
+    return archive_dir
+
+
+def write_archive(records: List[Dict], archive_dir: str) -> str:
+    """
+    Zapíše záznamy do nového gzip souboru (jeden JSON objekt na řádek).
+    Soubor se nejdřív zapíše pod dočasným názvem a na disk, teprve pak se přejmenuje.
+
+    Returns:
+        str: Cesta k vytvořenému souboru
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    file_name = f"request_data-{stamp}-{records[0]['id']}-{records[-1]['id']}.ndjson.gz"
+    path = os.path.join(archive_dir, file_name)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "wb") as raw_file:
+        with gzip.GzipFile(fileobj=raw_file, mode="wb") as gz_file:
+            for record in records:
+                gz_file.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+                gz_file.write(b"\n")
+        raw_file.flush()
+        os.fsync(raw_file.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_archive(path: str) -> List[Dict]:
+    """Načte záznamy z archivního souboru vytvořeného funkcí write_archive."""
+    with gzip.open(path, "rt", encoding="utf-8") as gz_file:
+        return [json.loads(line) for line in gz_file if line.strip()]
+
+
+def archive_old_requests(
+    older_than: float,
+    archive_dir: Optional[str] = None,
+    batch_size: int = MAINTENANCE_BATCH_SIZE,
+    max_batches: int = MAINTENANCE_MAX_BATCHES,
+    pause: float = MAINTENANCE_BATCH_PAUSE,
+) -> int:
+    """
+    Přesune dokončené požadavky vytvořené před `older_than` do archivních souborů.
+
+    Každá dávka se v jedné transakci smaže z DB, zapíše do souboru a teprve pak se potvrdí.
+    Pokud zápis souboru selže, smazání se vrátí zpět - záznam se tak nikdy neztratí.
+    Pokud stejné záznamy mezitím smazal jiný proces, dávka se vrátí a archivace skončí.
+
+    Args:
+        older_than (float): Unix timestamp - starší požadavky se archivují
+        archive_dir (Optional[str]): Cílová složka, výchozí ARCHIVE_DIR
+        batch_size (int): Počet záznamů v jednom souboru / transakci
+        max_batches (int): Maximální počet dávek za jeden běh
+        pause (float): Pauza mezi dávkami v sekundách
+
+    Returns:
+        int: Počet archivovaných záznamů
+    """
+    archive_dir = resolve_archive_dir(archive_dir)
+    table = RequestData.__table__
+    archivable = (
+        RequestData.status.in_(TERMINAL_STATUSES),
+        RequestData.created_at < older_than,
+    )
+    total = 0
+    for _ in range(max_batches):
+        records = [
+            dict(row)
+            for row in db.session.execute(
+                select(table).where(*archivable).order_by(RequestData.id).limit(batch_size)
+            ).mappings()
+        ]
+        if not records:
+            break
+
+        ids = [record["id"] for record in records]
+        try:
+            deleted = db.session.execute(
+                delete(RequestData)
+                .where(RequestData.id.in_(ids), *archivable)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if deleted != len(ids):
+                db.session.rollback()
+                print("[WARNING] Archivaci právě provádí jiný proces, přeskakuji.")
+                break
+            path = write_archive(records, archive_dir)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        total += len(records)
+        print(f"[INFO] Archivováno {len(records)} požadavků do {path}")
+
+        if len(records) < batch_size:
+            break
+        time.sleep(pause)
+    return total
+
+
+def incremental_vacuum(pages: int = VACUUM_PAGES_PER_RUN) -> int:
+    """
+    Vrátí až `pages` volných stránek SQLite databáze souborovému systému.
+    Funguje jen u databáze s auto_vacuum=INCREMENTAL, jinak nic nedělá.
+
+    Returns:
+        int: Počet uvolněných stránek
+    """
+    if db.engine.dialect.name != "sqlite" or pages <= 0:
+        return 0
+
+    with db.engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            print(
+                "[INFO] Databáze nemá auto_vacuum=INCREMENTAL, uvolnění místa přeskočeno "
+                "(převod: python -m flask_app.worker --enable-incremental-vacuum)."
+            )
+            return 0
+        free_before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        # Modul sqlite3 provede u příkazu bez výsledků jen jeden krok (= jedna stránka),
+        # executescript ho nechá doběhnout celý
+        conn.connection.dbapi_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(pages)});"
+        )
+        free_after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return free_before - free_after
+
+
+def enable_incremental_vacuum() -> None:
+    """
+    Převede existující SQLite databázi na auto_vacuum=INCREMENTAL.
+    Provádí plný VACUUM (přepis celé DB se zámkem), proto se spouští jen ručně a jednorázově.
+    """
+    if db.engine.dialect.name != "sqlite":
+        print("[WARNING] Incremental vacuum je podporován jen pro SQLite.")
+        return
+    with db.engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    print("[INFO] Databáze převedena na auto_vacuum=INCREMENTAL.")
+
+
+def run_maintenance(
+    now: Optional[float] = None, archive_dir: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Provede jeden běh údržby (zkrácení, archivace, uvolnění místa) podle nastavení v configu.
+    Musí běžet v kontextu aplikace.
+
+    Returns:
+        Dict[str, int]: Počty zpracovaných záznamů / stránek pro jednotlivé kroky
+    """
+    now = time.time() if now is None else now
+    stats = {"backfilled": backfill_created_at(now), "compacted": 0, "archived": 0}
+
+    if NEWS_DATA_RETENTION_DAYS > 0:
+        stats["compacted"] = compact_news_data(now - NEWS_DATA_RETENTION_DAYS * DAY_SECONDS)
+    if ARCHIVE_AFTER_DAYS > 0:
+        stats["archived"] = archive_old_requests(
+            now - ARCHIVE_AFTER_DAYS * DAY_SECONDS, archive_dir=archive_dir
+        )
+    stats["vacuumed_pages"] = incremental_vacuum()
+
+    print(f"[INFO] Údržba DB dokončena: {stats}")
+    return stats
+
+
+class MaintenanceThread(threading.Thread):
+    """Vlákno webového procesu, které jednou za `interval` sekund spustí údržbu DB."""
+
+    def __init__(self, app, interval=MAINTENANCE_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.app = app
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    run_maintenance()
+            except Exception as e:
+                print(f"[ERROR] Údržba DB selhala: {e}")
+
+    def stop(self):
+        self.stop_event.set()
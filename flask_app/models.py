@@ -1,10 +1,144 @@
-from flask_app.database import db
+import time
+
+from sqlalchemy.orm import deferred
+
+from flask_app.database import db, CompressedJSON
+from flask_app.config import COMPRESS_INPUT_DATA
 from flask_sqlalchemy import SQLAlchemy
 
 
 class RequestData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     status = db.Column(db.String(20), default="pending")
-    input_data = db.Column(db.JSON)
-    news_data = db.Column(db.JSON, nullable=True)
+    input_data = db.Column(CompressedJSON() if COMPRESS_INPUT_DATA else db.JSON)
+    # Plné texty článků - ukládají se komprimovaně a načítají se až při prvním přístupu
+    news_data = deferred(db.Column(CompressedJSON(), nullable=True))
     sentiment_data = db.Column(db.JSON, nullable=True)
+    # Fronta úloh - kdo úlohu zpracovává a do kdy platí jeho zámek (unix timestamp)
+    worker_id = db.Column(db.String(64), nullable=True)
+    lease_expires_at = db.Column(db.Float, nullable=True)
+    heartbeat_at = db.Column(db.Float, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    # Deadline celého požadavku (unix timestamp) a požadavek na zrušení
+    deadline_at = db.Column(db.Float, nullable=True)
+    # Časový rozpočet počítaný až od začátku zpracování (sekundy) - požadavky čekající ve frontě,
+    # místo deadline_at počítaného od přijetí
+    deadline_seconds = db.Column(db.Float, nullable=True)
+    cancel_requested = db.Column(db.Boolean, default=False)
+    # Čas vytvoření požadavku (unix timestamp) - podle něj se řídí retence a archivace
+    created_at = db.Column(db.Float, nullable=True, default=time.time)
+    # Čas poslední změny záznamu (unix timestamp) - nastaví se při každém UPDATE
+    updated_at = db.Column(db.Float, nullable=True, default=time.time, onupdate=time.time)
+    # Plánování - třída priority (0 = high, 1 = normal, 2 = low), klient, počet společností
+    # a čas, kdy si úlohu poprvé zabral worker (čekání ve frontě = started_at - created_at)
+    priority = db.Column(db.Integer, default=1)
+    client_key = db.Column(db.String(64), nullable=True)
+    cost = db.Column(db.Integer, nullable=True)
+    started_at = db.Column(db.Float, nullable=True)
+    # Webhook po dokončení - URL, stav doručení ("pending", "delivered", "failed"),
+    # počet pokusů a čas dalšího pokusu (unix timestamp)
+    callback_url = db.Column(db.String(2048), nullable=True)
+    callback_state = db.Column(db.String(20), nullable=True)
+    callback_attempts = db.Column(db.Integer, default=0)
+    callback_next_at = db.Column(db.Float, nullable=True)
+    # Profilovat zpracování (/submit?profile=1 v režimu PROFILING="flag")
+    profile = db.Column(db.Boolean, default=False)
+    # Hodnotit dávkově přes Batch API (/submit?batch=1) - požadavek čeká ve stavu "rating"
+    rating_batch = db.Column(db.Boolean, default=False)
+
+    __table_args__ = (
+        db.Index("ix_request_data_status_priority", "status", "priority", "id"),
+        db.Index("ix_request_data_callback", "callback_state", "callback_next_at"),
+        # Výpis požadavků /output - filtr podle stavu a času se stránkováním podle (čas, id)
+        db.Index("ix_request_data_created", "created_at", "id"),
+        db.Index("ix_request_data_status_created", "status", "created_at", "id"),
+        db.Index("ix_request_data_status_updated", "status", "updated_at", "id"),
+    )
+
+
+class PortfolioState(db.Model):
+    # Aktuální stav akcie v portfoliu - sdílený mezi všemi procesy webu
+    company = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)  # unix timestamp
+
+
+class PortfolioVersion(db.Model):
+    # Jediný řádek (id=1) s čítačem verzí portfolia - zvyšuje se při každé změně
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class PortfolioEvent(db.Model):
+    # Append-only log změn portfolia (status 1 = nákup, 0 = prodej, čas jako unix timestamp)
+    id = db.Column(db.Integer, primary_key=True)
+    company = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.SmallInteger, nullable=False)
+    created_at = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_portfolio_event_company_created_at", "company", "created_at"),
+    )
+
+
+class TaskLease(db.Model):
+    # Zámek pravidelné úlohy na pozadí (např. předehřívání cache) - při více procesech běží
+    # úloha jen v tom, který zámek drží do expires_at (unix timestamp)
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.Float, nullable=False)
+
+
+class CompanyDaySentiment(db.Model):
+    # Předpočítané hodnocení zpráv jedné společnosti za jeden den (pro daný režim hodnocení).
+    # Průměr za libovolné období = součet rating_sum / součet rated_count přes jeho dny.
+    company = db.Column(db.String(100), primary_key=True)  # název společnosti malými písmeny
+    day = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD
+    rating_mode = db.Column(db.String(20), primary_key=True)
+    article_count = db.Column(db.Integer, nullable=False, default=0)
+    rated_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0)
+    computed_at = db.Column(db.Float, nullable=False)  # unix timestamp
+
+
+class ArticleRating(db.Model):
+    # Hodnocení jednoho článku společnosti (pro daný režim hodnocení) - z uložených hodnocení
+    # lze přepočítat vážené průměry za libovolné období bez dalšího volání OpenAI (viz rating_aggregation)
+    company = db.Column(db.String(100), primary_key=True)  # název společnosti malými písmeny
+    article_id = db.Column(db.String(16), primary_key=True)  # viz article_cache.article_id
+    rating_mode = db.Column(db.String(20), primary_key=True)
+    day = db.Column(db.String(10), nullable=True)  # YYYY-MM-DD vydání
+    published_at = db.Column(db.Float, nullable=True)  # unix timestamp vydání
+    source = db.Column(db.String(100), nullable=True)  # zdroj zprávy (Reuters, ...)
+    content_source = db.Column(db.String(10), nullable=True)  # "full" nebo "snippet"
+    rating = db.Column(db.Float, nullable=False)  # -10 až 10
+    computed_at = db.Column(db.Float, nullable=False)  # unix timestamp
+
+    __table_args__ = (db.Index("ix_article_rating_company_mode_day", "company", "rating_mode", "day"),)
+
+
+class RatingBatch(db.Model):
+    # Jedna odeslaná dávka hodnocení (JSONL soubor) - stav "submitted", "completed" nebo "failed"
+    id = db.Column(db.Integer, primary_key=True)
+    backend = db.Column(db.String(20), nullable=False)
+    external_id = db.Column(db.String(100), nullable=True)  # ID dávky u backendu
+    status = db.Column(db.String(20), nullable=False, default="submitted")
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.Float, nullable=False, default=time.time)
+    completed_at = db.Column(db.Float, nullable=True)
+
+
+class RatingBatchItem(db.Model):
+    # Odložené hodnocení zpráv jedné společnosti požadavku - stav "queued", "submitted",
+    # "done" nebo "failed"; payload obsahuje zprávy, shluky, dny článků a plán dní (viz batch_rating)
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.Integer, nullable=False, index=True)
+    company_index = db.Column(db.Integer, nullable=False)  # pořadí v sentiment_data
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    batch_id = db.Column(db.Integer, nullable=True, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(CompressedJSON(), nullable=False)
+    ratings = db.Column(db.JSON, nullable=True)  # index zprávy (str) -> hodnocení -10 až 10
+    created_at = db.Column(db.Float, nullable=False, default=time.time)
+
+    __table_args__ = (db.Index("ix_rating_batch_item_status_id", "status", "id"),)
@@ -0,0 +1,272 @@
+"""
+Sdílený stav portfolia pro /UI.
+
+Stav akcií je uložený v DB (tabulka PortfolioState), takže ho vidí všechny procesy webu stejně.
+Každý proces si drží malou cache, kterou zahodí, jakmile se v DB změní čítač verzí (PortfolioVersion).
+Běžné čtení tak stojí jen jeden dotaz na číslo verze.
+Z téhož stavu sestavené výstupy (vykreslené HTML, JSON) si cache drží až do další změny verze,
+verze zároveň slouží jako ETag odpovědí /UI.
+Každá změna se zároveň zapíše do append-only logu (PortfolioEvent), nad kterým běží dotazy na historii.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+
+from flask_app.database import db, upsert
+from flask_app.models import PortfolioEvent, PortfolioState, PortfolioVersion
+from flask_app.config import PORTFOLIO_CACHE_TTL, HISTORY_MAX_EVENTS
+
+# Převod číselného statusu z požadavku na text zobrazovaný v UI
+STATUS_LABELS = {1: "nakoupeno", 0: "prodáno"}
+DEFAULT_STATUS = "žádné změny"
+DEFAULT_UPDATED_AT = "Nikdy"
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Převede unix timestamp na text ve formátu zobrazovaném v UI."""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class PortfolioStore:
+    """
+    Read-through cache nad stavem portfolia v DB.
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor instanci se seznamem povolenych spolecnosti.
+        portfolio = PortfolioStore(ALLOWED_COMPANIES)
+
+    2. Zmeny zapis jednou transakci (seznam dvojic nazev spolecnosti, 0/1).
+        portfolio.update([("NVDA", 1), ("AAPL", 0)])
+
+    3. Aktualni stav ziskas pres get_stocks (v poradi povolenych spolecnosti).
+        stocks = portfolio.get_stocks()
+
+    4. Vystup sestaveny ze stavu (napr. vykresleny sablonou) ziskas pres get_view - sestavi se
+       jen jednou pro kazdou verzi portfolia.
+        version, html = portfolio.get_view("html", lambda stocks: render(stocks))
+    """
+
+    def __init__(self, companies: List[str], cache_ttl: float = PORTFOLIO_CACHE_TTL):
+        self.companies = list(companies)
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._cached_version: Optional[int] = None
+        self._cached_stocks: Optional[List[Dict[str, str]]] = None
+        self._checked_at = 0.0
+        # druh výstupu -> (stav, ze kterého byl sestaven, výstup)
+        self._views: Dict[str, Tuple[List[Dict[str, str]], Any]] = {}
+
+    def current_version(self) -> int:
+        """Vrátí aktuální verzi portfolia v DB (0, pokud ještě nebyla žádná změna)."""
+        version = db.session.get(PortfolioVersion, 1)
+        return version.version if version else 0
+
+    def _load_stocks(self) -> List[Dict[str, str]]:
+        rows = {row.company: row for row in PortfolioState.query.all()}
+        stocks = []
+        for company in self.companies:
+            row = rows.get(company)
+            stocks.append(
+                {
+                    "company": company,
+                    "status": row.status if row else DEFAULT_STATUS,
+                    "updated_at": (
+                        format_timestamp(row.updated_at) if row else DEFAULT_UPDATED_AT
+                    ),
+                }
+            )
+        return stocks
+
+    def get_snapshot(self) -> Tuple[int, List[Dict[str, str]]]:
+        """
+        Vrátí verzi portfolia a stav všech povolených společností.
+        Z DB se načítá jen tehdy, když se od posledního čtení změnila verze portfolia.
+
+        Returns:
+            Tuple[int, List[Dict[str, str]]]: (verze, seznam {"company", "status", "updated_at"})
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._cached_stocks is not None
+                and now - self._checked_at < self.cache_ttl
+            ):
+                return self._cached_version, self._cached_stocks
+
+            version = self.current_version()
+            if self._cached_stocks is None or version != self._cached_version:
+                self._cached_stocks = self._load_stocks()
+                self._cached_version = version
+            self._checked_at = now
+            return self._cached_version, self._cached_stocks
+
+    def get_stocks(self) -> List[Dict[str, str]]:
+        """
+        Vrátí stav všech povolených společností (viz get_snapshot).
+
+        Returns:
+            List[Dict[str, str]]: Seznam {"company", "status", "updated_at"}
+        """
+        return self.get_snapshot()[1]
+
+    def get_view(self, kind: str, build: Callable[[List[Dict[str, str]]], Any]) -> Tuple[int, Any]:
+        """
+        Vrátí výstup sestavený ze stavu portfolia (např. vykreslené HTML nebo serializovaný JSON).
+        Funkce build se volá jen při první žádosti o daný druh výstupu po změně stavu.
+
+        Args:
+            kind (str): Druh výstupu (klíč cache, např. "html" nebo "json")
+            build (Callable): Sestaví výstup ze seznamu společností (výsledek get_stocks)
+
+        Returns:
+            Tuple[int, Any]: (verze portfolia, výstup)
+        """
+        version, stocks = self.get_snapshot()
+        with self._lock:
+            cached = self._views.get(kind)
+            if cached is not None and cached[0] is stocks:
+                return version, cached[1]
+
+        value = build(stocks)
+        with self._lock:
+            # mezitím mohl jiný požadavek načíst novější stav - ten starší se neukládá
+            if stocks is self._cached_stocks:
+                self._views[kind] = (stocks, value)
+        return version, value
+
+    def update(self, updates: List[Tuple[str, int]]) -> int:
+        """
+        Atomicky uloží změny stavu, zapíše je do logu událostí a zvýší verzi portfolia
+        (vše jednou transakcí).
+
+        Args:
+            updates (List[Tuple[str, int]]): Dvojice (název společnosti, 1 = nakoupeno / 0 = prodáno)
+                v pořadí, v jakém přišly - u opakované společnosti platí poslední změna
+
+        Returns:
+            int: Nová verze portfolia
+        """
+        if not updates:
+            return self.current_version()
+
+        now = time.time()
+        latest = dict(updates)
+        rows = [
+            {"company": company, "status": STATUS_LABELS[status], "updated_at": now}
+            for company, status in latest.items()
+        ]
+        events = [
+            {"company": company, "status": status, "created_at": now}
+            for company, status in updates
+        ]
+        try:
+            db.session.execute(insert(PortfolioEvent), events)
+            db.session.execute(
+                upsert(
+                    PortfolioState,
+                    rows,
+                    index_elements=["company"],
+                    update_columns=["status", "updated_at"],
+                )
+            )
+            db.session.execute(
+                upsert(
+                    PortfolioVersion,
+                    {"id": 1, "version": 1},
+                    index_elements=["id"],
+                    update_values={"version": PortfolioVersion.version + 1},
+                )
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        with self._lock:
+            # Vlastní změnu uvidí tento proces hned, i při nenulovém TTL
+            self._cached_stocks = None
+            self._views.clear()
+        return self.current_version()
+
+
+def get_history(
+    company: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    last: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Vrátí historii změn portfolia a souhrnné statistiky za zvolené období.
+
+    Args:
+        company (Optional[str]): Omezení na jednu společnost
+        since (Optional[float]): Začátek období (unix timestamp, včetně)
+        until (Optional[float]): Konec období (unix timestamp, včetně)
+        last (Optional[int]): Vrátí jen posledních N událostí (max. HISTORY_MAX_EVENTS)
+
+    Returns:
+        Dict[str, Any]: {"events": [...] (od nejnovější), "aggregates": {...}}
+    """
+    conditions = []
+    if company is not None:
+        conditions.append(PortfolioEvent.company == company)
+    if since is not None:
+        conditions.append(PortfolioEvent.created_at >= since)
+    if until is not None:
+        conditions.append(PortfolioEvent.created_at <= until)
+
+    limit = min(last, HISTORY_MAX_EVENTS) if last else HISTORY_MAX_EVENTS
+    events = db.session.execute(
+        select(PortfolioEvent)
+        .where(*conditions)
+        .order_by(PortfolioEvent.created_at.desc(), PortfolioEvent.id.desc())
+        .limit(limit)
+    ).scalars().all()
+
+    # Agregace počítá databáze nad celým obdobím (nezávisle na limitu)
+    grouped = db.session.execute(
+        select(
+            PortfolioEvent.company,
+            PortfolioEvent.status,
+            func.count(),
+            func.min(PortfolioEvent.created_at),
+            func.max(PortfolioEvent.created_at),
+        )
+        .where(*conditions)
+        .group_by(PortfolioEvent.company, PortfolioEvent.status)
+    ).all()
+
+    by_company: Dict[str, Dict[str, Any]] = {}
+    for row_company, status, count, first_at, last_at in grouped:
+        stats = by_company.setdefault(
+            row_company,
+            {"count": 0, "buy": 0, "sell": 0, "first_at": first_at, "last_at": last_at},
+        )
+        stats["count"] += count
+        stats["buy" if status == 1 else "sell"] += count
+        stats["first_at"] = min(stats["first_at"], first_at)
+        stats["last_at"] = max(stats["last_at"], last_at)
+
+    return {
+        "events": [
+            {
+                "company": event.company,
+                "status": STATUS_LABELS[event.status],
+                "status_code": event.status,
+                "timestamp": event.created_at,
+                "updated_at": format_timestamp(event.created_at),
+            }
+            for event in events
+        ],
+        "aggregates": {
+            "count": sum(stats["count"] for stats in by_company.values()),
+            "buy": sum(stats["buy"] for stats in by_company.values()),
+            "sell": sum(stats["sell"] for stats in by_company.values()),
+            "by_company": by_company,
+        },
+    }
@@ -0,0 +1,200 @@
+"""
+Volitelné profilování zpracování požadavků (cProfile) s úložištěm profilů na disku.
+
+Režim určuje PROFILING:
+- "off" (výchozí) - nic se neregistruje ani nekontroluje, zpracování běží beze změny
+- "flag" - profiluje se jen HTTP požadavek s ?profile=1 (a úloha z /submit?profile=1),
+  pokud má hlavičku X-Admin-Token s hodnotou ADMIN_TOKEN
+- "all" - profiluje se každý HTTP požadavek i každá úloha process_request
+
+Profily (binární pstats) se ukládají do PROFILE_DIR jako kruhový buffer - nejvýše PROFILE_MAX_FILES
+souborů, nejstarší se mažou. Výpis a stažení přes /admin/profiles (vyžaduje ADMIN_TOKEN).
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from flask import current_app, g, request
+from sqlalchemy import select
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.config import ADMIN_TOKEN, PROFILING, PROFILE_DIR, PROFILE_MAX_FILES
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.prof$")
+SAFE_LABEL_PATTERN = re.compile(r"[^\w.-]+")
+
+# Zápis a promazávání kruhového bufferu z více vláken
+_ring_lock = threading.Lock()
+
+
+def is_admin() -> bool:
+    """True, pokud HTTP požadavek nese platný X-Admin-Token (bez nastaveného ADMIN_TOKEN nikdy)."""
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def resolve_profile_dir(profile_dir: Optional[str] = None) -> str:
+    """Vrátí absolutní cestu ke složce profilů (relativní cesta je vůči složce instance/ aplikace)."""
+    profile_dir = profile_dir or PROFILE_DIR
+    if not os.path.isabs(profile_dir):
+        profile_dir = os.path.join(current_app.instance_path, profile_dir)
+    return profile_dir
+
+
+def save_profile(
+    profiler: cProfile.Profile,
+    kind: str,
+    label: str,
+    profile_dir: str,
+    max_files: Optional[int] = None,
+) -> str:
+    """
+    Uloží profil do kruhového bufferu a smaže nejstarší profily nad limit max_files.
+
+    Returns:
+        str: Název uloženého souboru
+    """
+    max_files = PROFILE_MAX_FILES if max_files is None else max_files
+    label = SAFE_LABEL_PATTERN.sub("_", label)[:60] or "unknown"
+    name = f"{int(time.time() * 1000)}-{kind}-{label}-{uuid.uuid4().hex[:6]}.prof"
+    os.makedirs(profile_dir, exist_ok=True)
+    tmp_path = os.path.join(profile_dir, f".{name}.tmp")
+    profiler.dump_stats(tmp_path)
+    with _ring_lock:
+        os.replace(tmp_path, os.path.join(profile_dir, name))
+        names = sorted(
+            entry for entry in os.listdir(profile_dir) if PROFILE_NAME_PATTERN.match(entry)
+        )
+        for old_name in names[: max(0, len(names) - max(1, max_files))]:
+            try:
+                os.remove(os.path.join(profile_dir, old_name))
+            except FileNotFoundError:
+                pass
+    return name
+
+
+@contextmanager
+def profile_block(kind: str, label: str, profile_dir: str, enabled: bool = True):
+    """
+    Profiluje blok kódu (jen aktuální vlákno) a výsledek uloží do kruhového bufferu.
+
+    Args:
+        kind (str): Druh profilu ("job", "http")
+        label (str): Popis (ID požadavku, endpoint)
+        profile_dir (str): Složka profilů (viz resolve_profile_dir)
+        enabled (bool): False = blok běží bez profilování
+    """
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # ve vlákně už běží jiný profiler
+        print(f"[WARNING] Profilování nelze spustit: {e}")
+        profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            try:
+                name = save_profile(profiler, kind, label, profile_dir)
+                print(f"[DEBUG] Profil uložen: {name}")
+            except OSError as e:
+                print(f"[ERROR] Uložení profilu selhalo: {e}")
+
+
+def list_profiles(profile_dir: str) -> List[Dict]:
+    """Seznam uložených profilů od nejnovějšího (name, size, created_at)."""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for name in os.listdir(profile_dir):
+        if not PROFILE_NAME_PATTERN.match(name):
+            continue
+        path = os.path.join(profile_dir, name)
+        stat = os.stat(path)
+        profiles.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+
+def profile_path(profile_dir: str, name: str) -> Optional[str]:
+    """Cesta k profilu podle názvu (None pro neplatný název nebo neexistující soubor)."""
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(profile_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def format_profile(path: str, sort_by: str = "cumulative", limit: int = 50) -> str:
+    """Textový výpis profilu (pstats) - nejnáročnější funkce podle sort_by."""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats(sort_by).print_stats(limit)
+    return output.getvalue()
+
+
+def should_profile_job(request_id: int) -> bool:
+    """Rozhodne, zda profilovat úlohu process_request (v režimu "off" bez přístupu k DB)."""
+    if PROFILING == "all":
+        return True
+    if PROFILING != "flag":
+        return False
+    return bool(
+        db.session.execute(select(RequestData.profile).where(RequestData.id == request_id)).scalar()
+    )
+
+
+@contextmanager
+def job_profile(request_id: int, app):
+    """Profiluje zpracování úlohy, pokud to režim PROFILING a příznak požadavku vyžadují."""
+    if PROFILING not in ("flag", "all"):
+        yield
+        return
+    with app.app_context():
+        enabled = should_profile_job(request_id)
+        profile_dir = resolve_profile_dir()
+    with profile_block("job", f"request-{request_id}", profile_dir, enabled=enabled):
+        yield
+
+
+def init_profiling(app) -> None:
+    """
+    Zaregistruje profilování HTTP handlerů (v režimu PROFILING="off" se neregistruje nic).
+    """
+    if PROFILING not in ("flag", "all"):
+        return
+
+    @app.before_request
+    def start_request_profile():
+        if PROFILING == "flag" and not (request.args.get("profile") == "1" and is_admin()):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return  # ve vlákně už běží jiný profiler
+        g.profiler = profiler
+
+    @app.teardown_request
+    def stop_request_profile(exc=None):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return
+        profiler.disable()
+        try:
+            save_profile(profiler, "http", request.endpoint or "unknown", resolve_profile_dir())
+        except OSError as e:
+            print(f"[ERROR] Uložení profilu selhalo: {e}")
@@ -0,0 +1,125 @@
+"""
+Výpis požadavků (/output) s filtrem podle stavu a času a stránkováním podle klíče (keyset).
+
+Stránka se čte od nejnovějších záznamů podle (created_at, id) nebo (updated_at, id) a další stránka
+začíná za posledním vráceným záznamem (kurzor), takže dotaz používá index
+ix_request_data_status_created / ix_request_data_status_updated / ix_request_data_created
+a jeho cena nezávisí na tom, kolikátá stránka se čte.
+"""
+
+import base64
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.maintenance import TERMINAL_STATUSES
+
+REQUEST_STATUSES = ("pending", "processing", "rating") + TERMINAL_STATUSES
+SORT_COLUMNS = {"created": RequestData.created_at, "updated": RequestData.updated_at}
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value: float, request_id: int) -> str:
+    """Zakóduje pozici posledního záznamu stránky do neprůhledného kurzoru."""
+    return base64.urlsafe_b64encode(json.dumps([value, request_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Dekóduje kurzor z encode_cursor.
+
+    Raises:
+        ValueError: Pokud kurzor není platný
+    """
+    try:
+        value, request_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(value), int(request_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Neplatný kurzor") from e
+
+
+def list_requests(
+    statuses: Optional[Sequence[str]] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    sort: str = "created",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict:
+    """
+    Vrátí stránku požadavků od nejnovějších (bez vstupních a výstupních dat).
+
+    Args:
+        statuses (Optional[Sequence[str]]): Jen požadavky v těchto stavech (None = všechny)
+        since (Optional[float]): Čas (podle sort) od - unix timestamp, včetně
+        until (Optional[float]): Čas (podle sort) do - unix timestamp, včetně
+        sort (str): "created" (čas vytvoření) nebo "updated" (čas poslední změny)
+        limit (int): Počet záznamů na stránce (nejvýše MAX_PAGE_SIZE)
+        cursor (Optional[str]): Kurzor další stránky z předchozí odpovědi
+
+    Returns:
+        Dict: {"requests": [...], "next_cursor": kurzor další stránky nebo None}
+
+    Raises:
+        ValueError: Neznámý stav, řazení nebo neplatný kurzor
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Neznámé řazení '{sort}'")
+    unknown = set(statuses or ()) - set(REQUEST_STATUSES)
+    if unknown:
+        raise ValueError(f"Neznámý stav {', '.join(sorted(unknown))}")
+    column = SORT_COLUMNS[sort]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = select(
+        RequestData.id,
+        RequestData.status,
+        RequestData.created_at,
+        RequestData.updated_at,
+        RequestData.started_at,
+        RequestData.priority,
+        RequestData.client_key,
+        RequestData.attempts,
+        RequestData.cost,
+        RequestData.worker_id,
+    ).where(column.is_not(None))
+    if statuses:
+        query = query.where(RequestData.status.in_(list(statuses)))
+    if since is not None:
+        query = query.where(column >= since)
+    if until is not None:
+        query = query.where(column <= until)
+    if cursor:
+        value, request_id = decode_cursor(cursor)
+        # "column <= value" omezí rozsah indexu, samotné OR by index procházelo od začátku
+        query = query.where(
+            column <= value, or_(column < value, and_(column == value, RequestData.id < request_id))
+        )
+    # o jeden záznam víc - pozná se tak, zda existuje další stránka
+    rows = db.session.execute(
+        query.order_by(column.desc(), RequestData.id.desc()).limit(limit + 1)
+    ).all()
+
+    requests: List[Dict] = [
+        {
+            "request_id": row.id,
+            "status": row.status,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "started_at": row.started_at,
+            "priority": row.priority,
+            "client_key": row.client_key,
+            "attempts": row.attempts,
+            "cost": row.cost,
+            "worker_id": row.worker_id,
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = requests[-1]
+        next_cursor = encode_cursor(last[f"{sort}_at"], last["request_id"])
+    return {"requests": requests, "next_cursor": next_cursor}
@@ -0,0 +1,278 @@
+"""
+Plánovač úloh process_request - třídy priority, zvýhodnění malých úloh a férové dělení mezi klienty.
+
+Pořadí čekajících úloh určuje schedule_key:
+1. Klienti, kteří už mají rozběhnuto SCHEDULER_CLIENT_MAX_RUNNING úloh, jdou až za ostatní
+   (jeden klient s mnoha velkými požadavky tak nezablokuje ostatní).
+2. Efektivní třída priority - požadovaná třída (high/normal/low), malé požadavky
+   (SJF - shortest job first) a úlohy čekající déle než SCHEDULER_AGING_SECONDS se posunou o třídu výš.
+3. Klient s menším počtem běžících úloh, menší požadavek, dříve zadaný požadavek.
+
+Stejná politika se používá na dvou místech:
+- JobScheduler - omezený pool vláken webového procesu (JOB_QUEUE_MODE="thread")
+- claim_job v job_queue - výběr z DB fronty pro samostatné workery (JOB_QUEUE_MODE="queue")
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.config import (
+    JOB_WORKER_CONCURRENCY,
+    SCHEDULER_SMALL_JOB_COMPANIES,
+    SCHEDULER_AGING_SECONDS,
+    SCHEDULER_CLIENT_MAX_RUNNING,
+)
+
+PRIORITY_CLASSES = {"high": 0, "normal": 1, "low": 2}
+PRIORITY_NAMES = {value: name for name, value in PRIORITY_CLASSES.items()}
+DEFAULT_PRIORITY = PRIORITY_CLASSES["normal"]
+
+
+def parse_priority(value: Optional[str]) -> int:
+    """
+    Převede název třídy priority z URL parametru na číslo.
+
+    Raises:
+        ValueError: Pokud třída neexistuje
+    """
+    if value is None:
+        return DEFAULT_PRIORITY
+    try:
+        return PRIORITY_CLASSES[value.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Neznámá priorita '{value}', povolené: {', '.join(PRIORITY_CLASSES)}"
+        )
+
+
+def priority_name(priority: Optional[int]) -> str:
+    return PRIORITY_NAMES.get(priority, PRIORITY_NAMES[DEFAULT_PRIORITY])
+
+
+def job_cost(input_data) -> int:
+    """Odhad náročnosti požadavku - počet společností."""
+    return len(input_data) if isinstance(input_data, list) else 1
+
+
+def effective_class(job: Dict, now: float) -> int:
+    """Třída priority po zvýhodnění malých a dlouho čekajících úloh (0 = nejvyšší)."""
+    priority = job.get("priority")
+    priority = DEFAULT_PRIORITY if priority is None else priority
+    boost = 1 if (job.get("cost") or 1) <= SCHEDULER_SMALL_JOB_COMPANIES else 0
+    if SCHEDULER_AGING_SECONDS > 0 and job.get("created_at"):
+        boost += int(max(0.0, now - job["created_at"]) // SCHEDULER_AGING_SECONDS)
+    return max(0, priority - boost)
+
+
+def schedule_key(job: Dict, running_by_client: Dict[str, int], now: float) -> tuple:
+    """Klíč řazení čekajících úloh - menší klíč se spustí dřív."""
+    running = running_by_client.get(job.get("client_key"), 0)
+    return (
+        running >= SCHEDULER_CLIENT_MAX_RUNNING,
+        effective_class(job, now),
+        running,
+        job.get("cost") or 1,
+        job.get("created_at") or 0.0,
+        job["id"],
+    )
+
+
+def order_jobs(
+    jobs: Iterable[Dict], running_by_client: Dict[str, int], now: Optional[float] = None
+) -> List[Dict]:
+    """
+    Seřadí čekající úlohy podle plánovací politiky.
+
+    Args:
+        jobs (Iterable[Dict]): Úlohy s klíči id, priority, client_key, cost, created_at
+        running_by_client (Dict[str, int]): Počet právě běžících úloh jednotlivých klientů
+        now (Optional[float]): Aktuální čas (unix timestamp)
+
+    Returns:
+        List[Dict]: Úlohy v pořadí, v jakém se mají spustit
+    """
+    now = time.time() if now is None else now
+    return sorted(jobs, key=lambda job: schedule_key(job, running_by_client, now))
+
+
+def job_from_request(request_data: RequestData) -> Dict:
+    """Vytvoří z řádku RequestData záznam úlohy pro plánovač."""
+    return {
+        "id": request_data.id,
+        "priority": request_data.priority,
+        "client_key": request_data.client_key,
+        "cost": request_data.cost
+        if request_data.cost is not None
+        else job_cost(request_data.input_data),
+        "created_at": request_data.created_at,
+    }
+
+
+class JobScheduler:
+    """
+    Omezený pool vláken webového procesu - spouští nejvýše `concurrency` úloh najednou
+    a další vybírá podle plánovací politiky (order_jobs).
+    Vlákna se spustí až s první úlohou.
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor planovac s funkci, ktera ulohu zpracuje.
+        scheduler = JobScheduler(app, runner=process_job)
+
+    2. Po ulozeni pozadavku do DB ho predej planovaci.
+        scheduler.submit(job_from_request(new_request))
+
+    3. Stav fronty (pocty a cekani podle trid) vraci stats.
+        scheduler.stats()
+    """
+
+    def __init__(
+        self,
+        app,
+        runner: Callable,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+    ):
+        self.app = app
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.condition = threading.Condition()
+        self.waiting: Dict[int, Dict] = {}
+        self.running_by_client = Counter()
+        self.running_by_class = Counter()
+        self.workers: List[threading.Thread] = []
+        self.class_stats = {
+            name: {"submitted": 0, "started": 0, "completed": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for name in PRIORITY_CLASSES
+        }
+
+    def submit(self, job: Dict) -> None:
+        """Zařadí úlohu do fronty (úloha, která už čeká, se znovu nepřidá)."""
+        with self.condition:
+            if job["id"] in self.waiting:
+                return
+            self.waiting[job["id"]] = job
+            self.class_stats[priority_name(job.get("priority"))]["submitted"] += 1
+            self._ensure_workers()
+            self.condition.notify()
+
+    def _ensure_workers(self) -> None:
+        self.workers = [worker for worker in self.workers if worker.is_alive()]
+        while len(self.workers) < self.concurrency:
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def _take_next(self) -> Dict:
+        """Vybere a odebere další úlohu (volá se s drženým zámkem)."""
+        job = order_jobs(self.waiting.values(), self.running_by_client)[0]
+        del self.waiting[job["id"]]
+
+        class_name = priority_name(job.get("priority"))
+        self.running_by_client[job.get("client_key")] += 1
+        self.running_by_class[class_name] += 1
+
+        waited = max(0.0, time.time() - (job.get("created_at") or time.time()))
+        stats = self.class_stats[class_name]
+        stats["started"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        return job
+
+    def _finish(self, job: Dict) -> None:
+        with self.condition:
+            client_key = job.get("client_key")
+            class_name = priority_name(job.get("priority"))
+            self.running_by_client[client_key] -= 1
+            if self.running_by_client[client_key] <= 0:
+                del self.running_by_client[client_key]
+            self.running_by_class[class_name] -= 1
+            self.class_stats[class_name]["completed"] += 1
+
+    def _work(self) -> None:
+        while True:
+            with self.condition:
+                while not self.waiting:
+                    self.condition.wait()
+                job = self._take_next()
+            try:
+                self.runner(job["id"], self.app)
+            except Exception as e:
+                print(f"[ERROR] Zpracování úlohy {job['id']} selhalo: {e}")
+            finally:
+                self._finish(job)
+
+    def stats(self) -> Dict:
+        """Vrátí stav fronty - počty čekajících a běžících úloh a čekání podle tříd priority."""
+        with self.condition:
+            queued_by_class = Counter(
+                priority_name(job.get("priority")) for job in self.waiting.values()
+            )
+            queued_by_client = Counter(job.get("client_key") for job in self.waiting.values())
+            classes = {}
+            for name, stats in self.class_stats.items():
+                started = stats["started"]
+                classes[name] = {
+                    "queued": queued_by_class[name],
+                    "running": self.running_by_class[name],
+                    "submitted": stats["submitted"],
+                    "started": started,
+                    "completed": stats["completed"],
+                    "avg_wait_seconds": round(stats["wait_total"] / started, 3) if started else None,
+                    "max_wait_seconds": round(stats["wait_max"], 3),
+                }
+            clients = {
+                str(client_key): {
+                    "queued": queued_by_client[client_key],
+                    "running": self.running_by_client[client_key],
+                }
+                for client_key in set(queued_by_client) | set(self.running_by_client)
+            }
+            return {
+                "concurrency": self.concurrency,
+                "queued": len(self.waiting),
+                "running": sum(self.running_by_client.values()),
+                "classes": classes,
+                "clients": clients,
+            }
+
+
+def get_queue_stats(window_seconds: float = 3600.0, now: Optional[float] = None) -> Dict:
+    """
+    Stav DB fronty podle tříd priority - počet čekajících a zpracovávaných úloh
+    a průměrné/maximální čekání úloh spuštěných za posledních `window_seconds` sekund.
+    """
+    now = time.time() if now is None else now
+    priority = func.coalesce(RequestData.priority, DEFAULT_PRIORITY)
+
+    classes = {
+        name: {"pending": 0, "processing": 0, "avg_wait_seconds": None, "max_wait_seconds": None}
+        for name in PRIORITY_CLASSES
+    }
+    counts = db.session.execute(
+        select(priority, RequestData.status, func.count())
+        .where(RequestData.status.in_(["pending", "processing"]))
+        .group_by(priority, RequestData.status)
+    ).all()
+    for class_value, status, count in counts:
+        classes[priority_name(class_value)][status] += count
+
+    wait = RequestData.started_at - RequestData.created_at
+    waits = db.session.execute(
+        select(priority, func.avg(wait), func.max(wait))
+        .where(RequestData.started_at >= now - window_seconds)
+        .group_by(priority)
+    ).all()
+    for class_value, avg_wait, max_wait in waits:
+        classes[priority_name(class_value)].update(
+            {
+                "avg_wait_seconds": round(avg_wait, 3) if avg_wait is not None else None,
+                "max_wait_seconds": round(max_wait, 3) if max_wait is not None else None,
+            }
+        )
+    return {"window_seconds": window_seconds, "classes": classes}
@@ -1,4 +1,7 @@
 import json
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
 
 import requests
 import threading
@@ -7,13 +10,479 @@ from newsapi import NewsApiClient
 from newspaper import Article  # Knihovna na stahování článků
 from flask_app.database import db
 from flask_app.models import RequestData
-from flask_app.config import NEWS_API_KEY, LIST_SIZE  # Načtení API klíče
-from sqlalchemy import create_engine
-
-from flask_app.utils.news_rating import NewsRating
+from flask_app.config import (
+    NEWS_API_KEY,
+    LIST_SIZE,
+    RATING_MODE,
+    REQUEST_DEADLINE_SECONDS,
+    ARTICLE_DOWNLOAD_TIMEOUT,
+    ARTICLE_FULLTEXT_BUDGET,
+    PROCESS_STREAMING,
+    DAILY_FETCH_MAX_DAYS,
+)  # Načtení API klíče
+from sqlalchemy import create_engine, select
+
+from flask_app.daily_sentiment import article_day, period_rating, plan_company
+from flask_app.batch_rating import queue_company_rating
+from flask_app.webhooks import notify_webhooks
+from flask_app.utils.article_cache import (
+    ARTICLE_DOWNLOADS,
+    SharedArticlesWriter,
+    article_id,
+    split_shared_articles,
+)
+from flask_app.utils.deadline import Deadline
+from flask_app.utils.domain_health import DOMAIN_HEALTH, article_domain
+from flask_app.utils.memory import memory_limit_exceeded
+from flask_app.utils.near_duplicates import expand_cluster_ratings, select_representatives
+from flask_app.utils.lexicon_rating import create_news_rater
+from flask_app.utils.news_rating import MAX_NEWS_COUNT
+from flask_app.utils.rate_limit import NEWSAPI_LIMITER, call_with_retry
 
 newsapi = NewsApiClient(api_key=NEWS_API_KEY)
 
+DOWNLOAD_ERROR_TEXT = "[ERROR] Nepodařilo se stáhnout článek"
+DOMAIN_SKIPPED_TEXT = "[ERROR] Doména článku je dočasně odpojena"
+# Zkrácený obsah z NewsAPI končí počtem zbývajících znaků, např. "... [+2145 chars]"
+SNIPPET_SUFFIX = re.compile(r"\s*\[\+\d+ chars\]\s*$")
+
+
+def is_cancel_requested(request_id):
+    """Zjistí z DB, zda bylo o zrušení požadavku požádáno (přes /output/<id>/cancel)."""
+    return bool(
+        db.session.execute(
+            select(RequestData.cancel_requested).where(RequestData.id == request_id)
+        ).scalar()
+    )
+
+
+def download_article_text(article_url, timeout):
+    """
+    Stáhne a vyparsuje plný text článku.
+
+    Args:
+        article_url (str): URL článku
+        timeout (float): Timeout HTTP požadavku v sekundách
+
+    Returns:
+        str: Text článku, nebo DOWNLOAD_ERROR_TEXT při chybě
+    """
+    full_content = DOWNLOAD_ERROR_TEXT
+    try:
+        news_article = Article(article_url, language="en", request_timeout=timeout)
+        news_article.download()
+        news_article.parse()
+        full_content = news_article.text.strip() if news_article.text else full_content
+    except Exception as e:
+        print(f"[ERROR] Chyba při stahování článku {article_url}: {e}")
+    return full_content
+
+
+def fetch_article_text(article_url, timeout):
+    """
+    Stáhne text článku přes jistič domény - odpojenou doménu nestahuje vůbec,
+    výsledek a dobu stahování zaznamená do DOMAIN_HEALTH.
+
+    Returns:
+        str: Text článku, DOWNLOAD_ERROR_TEXT při chybě nebo DOMAIN_SKIPPED_TEXT pro odpojenou doménu
+    """
+    domain = article_domain(article_url)
+    if not DOMAIN_HEALTH.allow(domain):
+        return DOMAIN_SKIPPED_TEXT
+    started = time.monotonic()
+    text = download_article_text(article_url, timeout)
+    DOMAIN_HEALTH.record(domain, not text.startswith("[ERROR]"), time.monotonic() - started)
+    return text
+
+
+def article_snippet(article):
+    """
+    Úryvek článku z NewsAPI (description a zkrácený content) - náhrada textu,
+    když se článek nepodaří stáhnout.
+
+    Returns:
+        str: Úryvek, nebo prázdný řetězec
+    """
+    description = (article.get("description") or "").strip()
+    content = SNIPPET_SUFFIX.sub("", article.get("content") or "").strip()
+    # content často začíná stejným textem jako description
+    if not content or description.startswith(content):
+        return description
+    if content.startswith(description):
+        return content
+    return f"{description} {content}"
+
+
+def download_articles(articles_list, deadline, job_articles=None):
+    """
+    Stáhne plné texty článků souběžně (sdílený pool ARTICLE_DOWNLOAD_WORKERS vláken) v rámci deadlinu.
+
+    Identita článku je dána normalizovanou URL - duplicitní články se vynechají a každý článek
+    se v rámci úlohy stahuje jen jednou (job_articles sdílí stažení mezi společnostmi),
+    souběžné úlohy sdílí stahování i cache přes ARTICLE_DOWNLOADS.
+    Po vypršení deadlinu nebo zrušení požadavku se na stahování dál nečeká, na články s úryvkem
+    z NewsAPI se čeká nejvýše ARTICLE_FULLTEXT_BUDGET sekund.
+    Článkům, které nestihly doběhnout, se nepodařilo stáhnout nebo jsou z odpojené domény
+    (viz fetch_article_text), se místo textu použije úryvek z NewsAPI, jinak zůstane chybový text.
+    Nedokončená stahování uvolní hned jen bez job_articles, jinak je uvolní volající jednou
+    za celou úlohu (release_job_articles).
+
+    Args:
+        articles_list (list): Články z NewsAPI
+        deadline (Deadline): Časový rozpočet požadavku
+        job_articles (dict): Stahování článků celé úlohy (article_id -> Future)
+
+    Returns:
+        list: Naformátované články (article_id, title, url, publishedAt, source, content,
+            content_source - "full", "snippet" nebo None při chybě)
+    """
+    owned = job_articles is None
+    job_articles = {} if owned else job_articles
+
+    valid_articles = []
+    seen_ids = set()
+    for article in articles_list:
+        if not article.get("url", ""):
+            print(f"[WARNING] Článek bez platné URL, přeskočeno.")
+            continue  # Přeskočení nevalidního článku
+        key = article_id(article["url"])
+        if key in seen_ids:
+            continue  # Stejný článek pod jinou variantou URL
+        seen_ids.add(key)
+        valid_articles.append((key, article))
+
+    futures = []
+    for key, article in valid_articles:
+        if key not in job_articles:
+            _, job_articles[key] = ARTICLE_DOWNLOADS.acquire(
+                article["url"],
+                fetch_article_text,
+                deadline.timeout(ARTICLE_DOWNLOAD_TIMEOUT),
+            )
+        futures.append(job_articles[key])
+
+    # Na plný text článku s úryvkem z NewsAPI se čeká jen ARTICLE_FULLTEXT_BUDGET sekund,
+    # pak se hodnotí úryvek (rozběhnuté stahování doběhne na pozadí do cache)
+    hedged = {
+        future for (_, article), future in zip(valid_articles, futures) if article_snippet(article)
+    }
+    budget_at = time.monotonic() + ARTICLE_FULLTEXT_BUDGET if ARTICLE_FULLTEXT_BUDGET > 0 else None
+    pending = {future for future in futures if not future.done()}
+    over_budget = 0
+    while pending and not deadline.should_stop():
+        timeout = min(deadline.remaining(), 1.0)
+        if budget_at is not None:
+            if time.monotonic() >= budget_at:
+                over_budget = len(pending & hedged)
+                pending -= hedged
+                budget_at = None
+                continue
+            timeout = min(timeout, budget_at - time.monotonic())
+        _, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+    if over_budget:
+        print(f"[INFO] {over_budget} článků nestihlo limit {ARTICLE_FULLTEXT_BUDGET:g} s, použit úryvek.")
+    if pending:
+        print(
+            f"[WARNING] {deadline.reason()} - nedokončeno {len(pending)} stahování článků."
+        )
+    if owned:
+        release_job_articles(job_articles)
+
+    formatted_articles = []
+    for (key, article), future in zip(valid_articles, futures):
+        full_content = DOWNLOAD_ERROR_TEXT
+        if future.done() and not future.cancelled():
+            full_content = future.result()
+
+        content_source = "full"
+        if full_content.startswith("[ERROR]"):
+            snippet = article_snippet(article)
+            content_source = "snippet" if snippet else None
+            formatted_content = snippet or full_content
+        else:
+            # Odstranění úvodu o autorovi článku
+            temp_text = full_content.split("\n\n")
+            if len(temp_text) > 1:
+                del temp_text[0]
+            formatted_content = " ".join(temp_text).strip()
+
+        formatted_articles.append(
+            {
+                "article_id": key,
+                "title": article.get("title", "Bez názvu"),
+                "url": article["url"],
+                "publishedAt": article.get("publishedAt", "Neznámé datum"),
+                "source": article.get("source", {}).get("name", "Neznámý zdroj"),
+                "content": formatted_content,
+                "content_source": content_source,
+            }
+        )
+    return formatted_articles
+
+
+def release_job_articles(job_articles):
+    """
+    Uvolní nedokončená stahování úlohy v ARTICLE_DOWNLOADS - každý článek jen jednou,
+    i když ho sdílí víc společností (nezačaté stahování, o které nikdo nestojí, se zruší).
+
+    Args:
+        job_articles (dict): Stahování článků úlohy (article_id -> Future)
+    """
+    for key, future in job_articles.items():
+        if not future.done():
+            ARTICLE_DOWNLOADS.release(key, future)
+
+
+def fetch_company_articles(company, plan, deadline, job_articles=None):
+    """
+    Získá zprávy jedné společnosti přes NewsAPI a stáhne jejich plné texty.
+
+    Při ukládání po dnech se stahují jen dny, které ještě nejsou spočítané (plan z plan_company).
+    Nejvýše DAILY_FETCH_MAX_DAYS z nich (od nejnovějších) se stahuje každý zvlášť - NewsAPI vrací
+    nejvýše LIST_SIZE zpráv, u delšího rozsahu by ostatní dny zůstaly bez zpráv jen kvůli oříznutí
+    výsledku. Zbylé chybějící dny se stáhnou jedním voláním, ohodnotí se, ale neuloží (doplní je
+    další požadavky). Dny stažené zvlášť a celé (včetně textů článků) se zapíšou do plan["covered"]
+    a jen ty se pak mohou uložit (viz period_rating).
+
+    Args:
+        company (dict): Položka vstupních dat (name, from, to)
+        plan (dict): Uložené a chybějící dny společnosti
+        deadline (Deadline): Časový rozpočet požadavku
+        job_articles (dict): Stahování článků sdílená v rámci úlohy (viz download_articles)
+
+    Returns:
+        dict: {"company", "articles", "cached_days"}
+
+    Raises:
+        ValueError: Pokud NewsAPI nevrátí žádná data
+    """
+    if plan["days"] is None:
+        articles_list = search_articles(company["name"], company["from"], company["to"], deadline)
+        fetched_days = []
+    elif not plan["missing"]:
+        print(f"[INFO] Všech {len(plan['days'])} dní pro {company['name']} je už spočítáno.")
+        return {"company": company["name"], "articles": [], "cached_days": len(plan["cached"])}
+    else:
+        articles_list, fetched_days = [], []
+        daily = sorted(plan["missing"], reverse=True)[: max(DAILY_FETCH_MAX_DAYS, 0)]
+        for day in daily:
+            if fetched_days and deadline.should_stop():
+                print(f"[WARNING] {deadline.reason()}, zbývající dny {company['name']} se nestahují.")
+                break
+            # NewsAPI může vrátit i zprávy z okraje sousedního dne - ty patří k jinému dni
+            articles_list += [
+                article
+                for article in search_articles(company["name"], day, day, deadline)
+                if article_day(article) == day
+            ]
+            fetched_days.append(day)
+
+        # ostatní chybějící dny jedním voláním - hodnotí se, ale neukládají
+        rest = [day for day in plan["missing"] if day not in daily]
+        if rest and not (fetched_days and deadline.should_stop()):
+            articles_list += [
+                article
+                for article in search_articles(company["name"], rest[0], rest[-1], deadline)
+                if article_day(article) in rest
+            ]
+
+    if not articles_list:
+        print(f"[WARNING] Nebyly nalezeny žádné zprávy pro {company['name']}.")
+
+    formatted_articles = download_articles(articles_list, deadline, job_articles)
+
+    # den s nestaženým článkem (bez textu i úryvku) není úplný a neuloží se
+    incomplete_days = {
+        article_day(article)
+        for article in formatted_articles
+        if not article.get("content") or article.get("content_source", "full") is None
+    }
+    plan["covered"] = [day for day in fetched_days if day not in incomplete_days]
+
+    print(f"[INFO] Nalezeno {len(formatted_articles)} zpráv pro {company['name']}.")
+    return {
+        "company": company["name"],
+        "articles": formatted_articles,
+        "cached_days": len(plan["cached"]),
+    }
+
+
+def search_articles(name, date_from, date_to, deadline):
+    """
+    Vyhledá zprávy společnosti za období přes NewsAPI (nejvýše LIST_SIZE nejrelevantnějších).
+
+    Raises:
+        ValueError: Pokud NewsAPI nevrátí žádná data
+    """
+    # Volání přes sdílený limiter, při 429/5xx se opakuje s backoffem
+    articles = call_with_retry(
+        newsapi.get_everything,
+        limiter=NEWSAPI_LIMITER,
+        timeout=deadline.remaining(),
+        q=name,  # Název společnosti
+        from_param=date_from,  # Datum "od"
+        to=date_to,  # Datum "do"
+        language="en",
+        sort_by="relevancy",
+        page_size=LIST_SIZE,  # Omezení stažených stránek - najdeš v configu
+    )
+
+    if articles is None or "articles" not in articles:
+        raise ValueError(f"API nevrátilo žádná data pro {name}.")
+    return articles.get("articles", [])
+
+
+def prepare_company_rating(result):
+    """
+    Vybere články společnosti s textem a seskupí téměř shodné články do shluků.
+
+    Args:
+        result (dict): Výsledek fetch_company_articles
+
+    Returns:
+        tuple: (hodnocené články, jejich texty, shluky indexů - zástupce je první)
+    """
+    # Extrakce textů článků pro danou společnost
+    rated_articles = [
+        article
+        for article in result["articles"]
+        # jen články s textem nebo úryvkem (ne chybový text nestaženého článku)
+        if article.get("content") and article.get("content_source", "full") is not None
+    ]
+    news_texts = [
+        f"{article.get('title', '')} {article.get('content', '')}".strip()  # Spojení title a content
+        for article in rated_articles
+    ]
+    if not news_texts:
+        return rated_articles, news_texts, []
+
+    # Téměř shodné články (převzaté zprávy) se hodnotí jen jednou - zástupcem shluku
+    clusters = select_representatives(news_texts)
+    for members in clusters:
+        for idx in members[1:]:
+            rated_articles[idx]["duplicate_of"] = rated_articles[members[0]].get("article_id")
+    if len(clusters) < len(news_texts):
+        print(f"[INFO] {len(news_texts)} zpráv pro {result['company']} tvoří {len(clusters)} shluků.")
+    return rated_articles, news_texts, clusters
+
+
+def rate_company_articles(result, plan, news_rater, deadline):
+    """
+    Ohodnotí stažené zprávy společnosti a složí hodnocení za celé období.
+
+    Téměř shodné články se hodnotí jednou (zástupce shluku s váhou velikosti shluku),
+    nově spočítané dny se uloží do CompanyDaySentiment.
+
+    Args:
+        result (dict): Výsledek fetch_company_articles
+        plan (dict): Uložené a chybějící dny společnosti
+        news_rater: Hodnotitel zpráv (create_news_rater)
+        deadline (Deadline): Časový rozpočet požadavku
+
+    Returns:
+        Optional[float]: Průměrné hodnocení (None, pokud není nic ohodnoceno)
+    """
+    rated_articles, news_texts, clusters = prepare_company_rating(result)
+
+    ratings = {}
+    if news_texts:
+        representatives = [news_texts[members[0]] for members in clusters]
+
+        # Hodnocení jednotlivých zpráv přes zvolený hodnotitel (NewsRating / lexikon) po částech
+        # MAX_NEWS_COUNT zpráv (hodnotitel víc zpráv najednou nepřijme), hodnocení zástupce
+        # platí pro celý shluk (váha = velikost shluku)
+        cluster_ratings = {}
+        for start in range(0, len(representatives), MAX_NEWS_COUNT):
+            json_string = json.dumps(representatives[start : start + MAX_NEWS_COUNT])
+            chunk = news_rater.rate_news_articles(json_string, timeout=deadline.remaining())
+            cluster_ratings.update({start + idx: rating for idx, rating in chunk.items()})
+        ratings = expand_cluster_ratings(cluster_ratings, clusters)
+
+    # Uložení nově spočítaných dní a složení hodnocení za celé období
+    return period_rating(plan, RATING_MODE, rated_articles, ratings)
+
+
+def fetch_result(company, plans, deadline, job_articles=None):
+    """
+    Získá zprávy jedné společnosti a chyby převede na výsledek s klíčem "error".
+
+    Returns:
+        dict: Výsledek fetch_company_articles nebo {"company", "error"}
+    """
+    print(f"\n[INFO] Získávám zprávy pro společnost: {company['name']}")
+    try:
+        plan = plans[company["name"]] = plan_company(company, RATING_MODE)
+        return fetch_company_articles(company, plan, deadline, job_articles)
+
+    except ValueError as ve:
+        print(f"[ERROR] {ve}")
+        return {"company": company["name"], "error": str(ve)}
+
+    except Exception as e:
+        print(f"[ERROR] Neočekávaná chyba při zpracování zpráv pro {company['name']}: {e}")
+        return {"company": company["name"], "error": str(e)}
+
+
+def content_sources(articles):
+    """
+    Spočítá hodnocené články podle zdroje textu.
+
+    Returns:
+        dict: Zdroj ("full", "snippet") -> počet článků (prázdný, pokud není co hodnotit)
+    """
+    sources = {}
+    for article in articles:
+        source = article.get("content_source", "full")
+        if article.get("content") and source is not None:
+            sources[source] = sources.get(source, 0) + 1
+    return sources
+
+
+def rate_result(result, plans, news_rater, deadline, defer=None):
+    """
+    Ohodnotí výsledek jedné společnosti, chyby zaznamená a vrátí hodnocení None.
+
+    Args:
+        defer (Optional[Callable]): Odložené (dávkové) hodnocení - defer(result, plan) zařadí
+            zprávy do dávky a vrátí True; hodnocení pak zatím zůstane None
+
+    Returns:
+        dict: {"company_name", "rating"} a u ohodnocených článků "content_sources" (viz content_sources)
+    """
+    print(f"\n[INFO] Zpracovávám zprávy pro společnost: {result['company']}")
+    try:
+        if deadline.should_stop():
+            print(f"[WARNING] {deadline.reason()}, hodnocení {result['company']} přeskočeno.")
+            return {"company_name": result["company"], "rating": None}
+        if "articles" not in result:
+            print(f"[WARNING] Žádné články pro hodnocení společnosti {result['company']}")
+            return {"company_name": result["company"], "rating": None}
+
+        # zdroj textů hodnocených článků (plný text nebo úryvek z NewsAPI)
+        sources = content_sources(result["articles"])
+        if defer is not None and defer(result, plans[result["company"]]):
+            print(f"[INFO] Hodnocení {result['company']} zařazeno do dávky.")
+            return {"company_name": result["company"], "rating": None, "content_sources": sources}
+
+        average_rating = rate_company_articles(
+            result, plans[result["company"]], news_rater, deadline
+        )
+        if average_rating is None:
+            print(
+                f"[WARNING] Žádné textové obsahy pro hodnocení společnosti {result['company']}"
+            )
+        else:
+            print(f"[INFO] Průměrné hodnocení pro {result['company']}: {average_rating}")
+
+        # Uložení názvu společnosti, hodnocení a zdrojů textů do výstupu
+        entry = {"company_name": result["company"], "rating": average_rating}
+        if sources:
+            entry["content_sources"] = sources
+        return entry
+    except Exception as e:
+        print(f"[ERROR] Chyba při zpracování hodnocení pro {result['company']}: {e}")
+        return {"company_name": result["company"], "rating": None}
+
 
 def process_request(request_id, app):
     """
@@ -27,9 +496,22 @@ def process_request(request_id, app):
        - Získá zprávy pomocí NewsAPI
        - Stáhne a zpracuje plný obsah každého článku
        - Formátuje a ukládá informace o článku
-    5. Vypočítá hodnocení sentimentu zpráv pomocí NewsRating
+    5. Vypočítá hodnocení sentimentu zpráv pomocí NewsRating (téměř shodné články hodnotí
+       jednou a hodnocení započítá s váhou velikosti shluku)
     6. Uloží výsledky sentimentu do databáze
-    7. Aktualizuje stav požadavku na "done"
+    7. Aktualizuje stav požadavku na "done" (nebo "cancelled", pokud byl zrušen)
+
+    Hodnocení se ukládá po společnostech a dnech (CompanyDaySentiment) - stahují a hodnotí
+    se jen dny, které ještě nejsou spočítané, a výsledek se složí z uložených dní.
+
+    Ve streamovaném režimu (PROCESS_STREAMING) se každá společnost stáhne, ohodnotí a zapíše
+    do news_data (průběžně komprimovaně), než se začne další - texty článků se hned uvolní.
+    Při překročení PROCESS_MEMORY_LIMIT_MB se zbývající společnosti přeskočí.
+
+    Všechny fáze hlídají deadline požadavku (deadline_at, nebo deadline_seconds od začátku
+    zpracování, výchozí REQUEST_DEADLINE_SECONDS).
+    Po jeho vypršení se zbývající stahování a hodnocení přeskočí a požadavek skončí
+    s tím, co stihl zpracovat.
 
     Parametry:
         request_id (int): Jedinečný identifikátor požadavku ke zpracování
@@ -66,6 +548,15 @@ def process_request(request_id, app):
             print(f"[ERROR] Request ID {request_id} nebyl nalezen v databázi.")
             return
 
+        # Požadavek zrušený ještě před začátkem zpracování
+        if request_data.status == "cancelled" or request_data.cancel_requested:
+            request_data.status = "cancelled"
+            db.session.commit()
+            if request_data.callback_url:
+                notify_webhooks()
+            print(f"[INFO] Request ID {request_id} byl zrušen před zpracováním.")
+            return
+
         # Výpis vstupních dat do konzole
         print(f"\n[INFO] Zpracovávám request ID: {request_id}")
         print(f"[INFO] Vstupní data: {request_data.input_data}")
@@ -74,144 +565,68 @@ def process_request(request_id, app):
         request_data.status = "processing"
         db.session.commit()
 
-        results = []
-        print(f"[DEBUG] request_data.input_data: {request_data.input_data}")
-        # Postupné zpracování každé společnosti
-        for company in request_data.input_data:
-            print(f"\n[INFO] Získávám zprávy pro společnost: {company['name']}")
-            try:
-                articles = newsapi.get_everything(
-                    q=company["name"],  # Název společnosti
-                    from_param=company["from"],  # Datum "od"
-                    to=company["to"],  # Datum "do"
-                    language="en",
-                    sort_by="relevancy",
-                    page_size=LIST_SIZE,  # Omezení stažených stránek - najdeš v configu
-                )
-
-                if articles is None or "articles" not in articles:
-                    raise ValueError(f"API nevrátilo žádná data pro {company['name']}.")
-
-                articles_list = articles.get("articles", [])
-
-                if not articles_list:
-                    print(
-                        f"[WARNING] Nebyly nalezeny žádné zprávy pro {company['name']}."
-                    )
-
-                formatted_articles = []
-                for article in articles_list:
-                    full_content = "[ERROR] Nepodařilo se stáhnout článek"
-                    article_url = article.get("url", "")
-
-                    if not article_url:
-                        print(f"[WARNING] Článek bez platné URL, přeskočeno.")
-                        continue  # Přeskočení nevalidního článku
-
-                    try:
-                        news_article = Article(article_url, language="en")
-                        news_article.download()
-                        news_article.parse()
-                        full_content = (
-                            news_article.text.strip()
-                            if news_article.text
-                            else full_content
-                        )
-                    except Exception as e:
-                        print(f"[ERROR] Chyba při stahování článku {article_url}: {e}")
-
-                    # Odstranění úvodu o autorovi článku
-                    temp_text = full_content.split("\n\n")
-                    if len(temp_text) > 1:
-                        del temp_text[0]
-                    formatted_content = " ".join(temp_text).strip()
-
-                    formatted_articles.append(
-                        {
-                            "title": article.get("title", "Bez názvu"),
-                            "url": article_url,
-                            "publishedAt": article.get("publishedAt", "Neznámé datum"),
-                            "source": article.get("source", {}).get(
-                                "name", "Neznámý zdroj"
-                            ),
-                            "content": formatted_content,
-                        }
-                    )
-
-                print(
-                    f"[INFO] Nalezeno {len(formatted_articles)} zpráv pro {company['name']}."
-                )
-                # přidání zpráv do výsledků
-                results.append(
-                    {"company": company["name"], "articles": formatted_articles}
-                )
-
-            except ValueError as ve:
-                print(f"[ERROR] {ve}")
-                # přidání chyby do výsledků
-                results.append({"company": company["name"], "error": str(ve)})
-
-            except Exception as e:
-                print(
-                    f"[ERROR] Neočekávaná chyba při zpracování zpráv pro {company['name']}: {e}"
+        # Deadline celého požadavku (nastavený při /submit, u /submit/bulk rozpočet od začátku
+        # zpracování, jinak výchozí z configu)
+        deadline = Deadline(
+            request_data.deadline_at
+            or time.time() + (request_data.deadline_seconds or REQUEST_DEADLINE_SECONDS),
+            cancel_check=lambda: is_cancel_requested(request_id),
+        )
+
+        news_rater = create_news_rater(RATING_MODE)  # režim hodnocení najdeš v configu
+        # Dávkové hodnocení (/submit?batch=1) - zprávy se jen zařadí do dávky (viz batch_rating)
+        batch_items = []
+
+        def defer(result, plan):
+            rated_articles, news_texts, clusters = prepare_company_rating(result)
+            if not news_texts:
+                return False
+            batch_items.append(
+                queue_company_rating(
+                    request_id,
+                    len(sentiment_results),
+                    [news_texts[members[0]] for members in clusters],
+                    clusters,
+                    rated_articles,
+                    plan,
+                    RATING_MODE,
                 )
-                # přidání chyby do výsledků
-                results.append({"company": company["name"], "error": str(e)})
+            )
+            return True
 
-        # Implementace AI zpracování
-        news_rater = NewsRating()
+        if not (request_data.rating_batch and RATING_MODE == "llm"):
+            defer = None
+        results = []  # jen v nestreamovaném režimu
         sentiment_results = []
-
+        plans = {}  # název společnosti -> uložené a chybějící dny
+        # Ve streamovaném režimu se výsledky společností průběžně zapisují (komprimovaně) a texty
+        # článků se hned uvolní; sdílení stažení mezi společnostmi zajistí cache ARTICLE_DOWNLOADS
+        news_writer = SharedArticlesWriter() if PROCESS_STREAMING else None
+        job_articles = None if PROCESS_STREAMING else {}
+        print(f"[DEBUG] request_data.input_data: {request_data.input_data}")
+        # Postupné zpracování každé společnosti
+        for company in request_data.input_data:
+            if deadline.should_stop():
+                print(f"[WARNING] {deadline.reason()}, přeskakuji {company['name']}.")
+                result = {"company": company["name"], "error": deadline.reason()}
+            elif memory_limit_exceeded():
+                print(f"[WARNING] Překročen limit paměti procesu, přeskakuji {company['name']}.")
+                result = {"company": company["name"], "error": "Překročen limit paměti"}
+            else:
+                result = fetch_result(company, plans, deadline, job_articles)
+
+            if news_writer is None:
+                results.append(result)
+                continue
+            sentiment_results.append(rate_result(result, plans, news_rater, deadline, defer))
+            news_writer.add(result)
+            result = None  # texty článků společnosti se uvolní
+        if job_articles:
+            release_job_articles(job_articles)
+
+        # Hodnocení v nestreamovaném režimu - až po stažení zpráv všech společností
         for result in results:
-            print(f"\n[INFO] Zpracovávám zprávy pro společnost: {result['company']}")
-            try:
-                if "articles" in result and result["articles"]:
-                    # Extrakce textů článků pro danou společnost
-                    news_texts = [
-                        f"{article.get('title', '')} {article.get('content', '')}".strip()  # Spojení title a content
-                        for article in result["articles"]
-                        if article.get("content")  # Zachováváme podmínku pro obsah
-                    ]
-
-                    if news_texts:
-                        # Konverze seznamu zpráv na JSON řetězec
-                        json_string = json.dumps(news_texts)
-
-                        # Získání hodnocení přes NewsRating
-                        average_rating = news_rater.rate_news(json_string)
-
-                        # Uložení pouze názvu společnosti a hodnocení do výstupu
-                        sentiment_results.append(
-                            {
-                                "company_name": result["company"],
-                                "rating": average_rating,
-                            }
-                        )
-
-                        print(
-                            f"[INFO] Průměrné hodnocení pro {result['company']}: {average_rating}"
-                        )
-                    else:
-                        print(
-                            f"[WARNING] Žádné textové obsahy pro hodnocení společnosti {result['company']}"
-                        )
-                        sentiment_results.append(
-                            {"company_name": result["company"], "rating": None}
-                        )
-                else:
-                    print(
-                        f"[WARNING] Žádné články pro hodnocení společnosti {result['company']}"
-                    )
-                    sentiment_results.append(
-                        {"company_name": result["company"], "rating": None}
-                    )
-            except Exception as e:
-                print(
-                    f"[ERROR] Chyba při zpracování hodnocení pro {result['company']}: {e}"
-                )
-                sentiment_results.append(
-                    {"company_name": result["company"], "rating": None}
-                )
+            sentiment_results.append(rate_result(result, plans, news_rater, deadline, defer))
 
         # Uložení výstupu do DB
         request_data = db.session.get(RequestData, request_id)
@@ -219,8 +634,25 @@ def process_request(request_id, app):
             if item["rating"] is not None:
                 item["rating"] = float(item["rating"])  # Zajištění, že rating je float
         request_data.sentiment_data = sentiment_results  # sentiment_data
-        request_data.news_data = json.dumps(results)  # news_data
-        request_data.status = "done"
+        # Text článku se uloží jen jednou, výsledky společností na něj odkazují přes article_id
+        if news_writer is not None:
+            request_data.news_data = news_writer.finish()  # news_data
+        else:
+            request_data.news_data = json.dumps(split_shared_articles(results))  # news_data
+        if deadline.cancelled():
+            for item in batch_items:
+                db.session.expunge(item)  # zrušený požadavek se už hodnotit nebude
+            request_data.status = "cancelled"
+        elif batch_items:
+            # dokončí ho batch_rating.finalize_requests po ohodnocení všech položek
+            request_data.status = "rating"
+        else:
+            request_data.status = "done"
         db.session.commit()
+        if batch_items and request_data.status == "rating":
+            print(f"[INFO] Request ID {request_id} čeká na dávkové hodnocení ({len(batch_items)} společností).\n")
+            return
+        if request_data.callback_url:
+            notify_webhooks()  # vysledek se posle na callback URL
 
         print(f"[INFO] Request ID {request_id} byl úspěšně zpracován.\n")
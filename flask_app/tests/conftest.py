@@ -0,0 +1,11 @@
+import pytest
+from unittest.mock import patch
+
+from flask_app.utils.rate_limit import RateLimiter
+
+
+@pytest.fixture(autouse=True)
+def unlimited_newsapi():
+    # kazdy den obdobi je jedno volani NewsAPI - sdileny limiter procesu by testy zdrzoval
+    with patch("flask_app.tasks.NEWSAPI_LIMITER", RateLimiter("NewsAPI", 0)):
+        yield
@@ -559,3 +559,68 @@ def test_parse_openai_response_out_of_range():
         mock_response.choices[0].message.content = '{"0": 20}'
         with pytest.raises(ValueError):
             rater.parse_openai_response(mock_response)
+
+
+def _openai_response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+def test_build_response_format_requires_every_index():
+    from flask_app.utils.news_rating import build_response_format
+
+    schema = build_response_format([0, 3])["json_schema"]["schema"]
+    assert schema["required"] == ["0", "3"]
+    assert schema["additionalProperties"] is False
+
+
+def test_call_openai_api_structured_output():
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "mock-key"}):
+        rater = NewsRating()
+    create = MagicMock(return_value=_openai_response('{"2": 5}'))
+    rater.client = MagicMock()
+    rater.client.chat.completions.create = create
+    rater.call_openai_api(["Tesla delays delivery."], indices=[2])
+    kwargs = create.call_args.kwargs
+    assert "\n2: Tesla delays delivery." in kwargs["messages"][1]["content"]
+    assert kwargs["response_format"]["json_schema"]["schema"]["required"] == ["2"]
+
+
+def test_parse_partial_ratings_skips_invalid_items():
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "mock-key"}):
+        rater = NewsRating()
+    response = _openai_response('{"0": 6.5, "1": 20, "2": "n/a", "7": 5}')
+    assert rater.parse_partial_ratings(response, [0, 1, 2]) == {0: pytest.approx(3)}
+    assert rater.parse_partial_ratings(_openai_response("NOT JSON"), [0]) == {}
+
+
+def test_rate_news_articles_repairs_only_missing_indices(sample_news_json):
+    from flask_app.utils.news_rating import get_rating_stats
+
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "mock-key"}):
+        rater = NewsRating()
+    before = get_rating_stats()
+    responses = [_openai_response('{"0": 6.5, "1": 11}'), _openai_response('{"1": 5, "2": 10}')]
+    with patch.object(rater, "call_openai_api", side_effect=responses) as call:
+        ratings = rater.rate_news_articles(sample_news_json)
+
+    assert ratings == {0: pytest.approx(3), 1: 0, 2: 10}
+    repair_news = call.call_args_list[1].args[0]
+    assert repair_news == ["Tesla delays delivery.", "Google reports strong earnings."]
+    assert call.call_args_list[1].kwargs["indices"] == [1, 2]
+    after = get_rating_stats()
+    assert after["repair_calls"] - before["repair_calls"] == 1
+    assert after["repaired_items"] - before["repaired_items"] == 2
+    assert after["batches_ok"] - before["batches_ok"] == 1
+
+
+def test_rate_news_articles_fails_after_repair_attempts(sample_news_json):
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "mock-key"}):
+        rater = NewsRating()
+    with patch("flask_app.utils.news_rating.RATING_REPAIR_ATTEMPTS", 1), patch.object(
+        rater, "call_openai_api", return_value=_openai_response('{"0": 5}')
+    ) as call:
+        with pytest.raises(ValueError, match="Chybějící hodnocení"):
+            rater.rate_news_articles(sample_news_json)
+    assert call.call_count == 2
@@ -0,0 +1,197 @@
+import pytest
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.tasks import download_articles, process_request
+from flask_app.utils.article_cache import (
+    ARTICLE_DOWNLOADS,
+    SharedArticleDownloads,
+    article_id,
+    normalize_url,
+    split_shared_articles,
+)
+from flask_app.utils.deadline import Deadline
+
+
+@pytest.fixture(autouse=True)
+def clear_article_cache():
+    ARTICLE_DOWNLOADS.clear()
+    yield
+    ARTICLE_DOWNLOADS.clear()
+
+
+def _article(url, title="Title"):
+    return {
+        "url": url,
+        "title": title,
+        "publishedAt": "2025-03-01T10:00:00Z",
+        "source": {"name": "Example"},
+    }
+
+
+# ====================== TESTY NORMALIZACE URL ======================
+
+
+def test_normalize_url_variants():
+    canonical = normalize_url("https://example.com/news/article?id=1&page=2")
+    for url in [
+        "http://www.Example.com/news/article/?page=2&id=1",
+        "https://example.com:443/news/article?id=1&page=2#comments",
+        "https://example.com/news/article?utm_source=x&id=1&fbclid=abc&page=2",
+    ]:
+        assert normalize_url(url) == canonical
+    assert article_id("http://www.example.com/a/") == article_id("https://example.com/a")
+    assert article_id("https://example.com/a") != article_id("https://example.com/b")
+
+
+# ====================== TESTY SDÍLENÉHO STAHOVÁNÍ ======================
+
+
+def test_shared_download_runs_once():
+    downloads = SharedArticleDownloads(workers=2, cache_size=10, cache_seconds=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_download(url, timeout):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        return "Author\n\nText"
+
+    key, first = downloads.acquire("https://example.com/shared", slow_download, 5)
+    started.wait(5)
+    _, second = downloads.acquire("http://www.example.com/shared/", slow_download, 5)
+    assert second is first
+
+    release.set()
+    assert first.result(5) == "Author\n\nText"
+    # Z cache - bez dalšího stahování
+    _, cached = downloads.acquire("https://example.com/shared", slow_download, 5)
+    assert cached.result(0) == "Author\n\nText"
+    assert calls == ["https://example.com/shared"]
+    downloads.release(key, cached)
+
+
+def test_shared_download_errors_not_cached():
+    downloads = SharedArticleDownloads(workers=1, cache_size=10, cache_seconds=60)
+    _, future = downloads.acquire("https://example.com/x", lambda url, timeout: "[ERROR] boom", 5)
+    assert future.result(5) == "[ERROR] boom"
+    _, future = downloads.acquire("https://example.com/x", lambda url, timeout: "Text", 5)
+    assert future.result(5) == "Text"
+
+
+def test_download_articles_skips_duplicate_urls():
+    calls = []
+
+    def download(url, timeout):
+        calls.append(url)
+        return "Author\n\nText"
+
+    articles = [
+        _article("https://example.com/dup-1"),
+        _article("https://www.example.com/dup-1/?utm_source=feed"),
+        _article("https://example.com/dup-2"),
+    ]
+    with patch("flask_app.tasks.download_article_text", side_effect=download):
+        formatted = download_articles(articles, Deadline(time.time() + 5))
+
+    assert len(formatted) == 2
+    assert len(calls) == 2
+    assert formatted[0]["article_id"] == article_id("https://example.com/dup-1")
+    assert formatted[0]["content"] == "Text"
+
+
+def test_process_request_shares_articles_between_companies():
+    with app.app_context():
+        db.create_all()
+        new_request = RequestData(
+            status="pending",
+            input_data=[
+                {"name": "Alpha Corp", "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"},
+                {"name": "Beta Corp", "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"},
+            ],
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+    articles = [_article("https://example.com/merger"), _article("https://example.com/other")]
+    with patch("flask_app.tasks.RATING_MODE", "local"), patch(
+        "flask_app.tasks.newsapi.get_everything", return_value={"articles": articles}
+    ), patch(
+        "flask_app.tasks.download_article_text", return_value="Author\n\nText"
+    ) as download:
+        process_request(request_id, app)
+
+    assert download.call_count == 2
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        assert request_data.status == "done"
+        assert request_data.sentiment_data[0]["content_sources"] == {"full": 2}
+        news_data = json.loads(request_data.news_data)
+    assert len(news_data["articles"]) == 2
+    assert [len(company["articles"]) for company in news_data["companies"]] == [2, 2]
+    assert "content" not in news_data["companies"][0]["articles"][0]
+
+
+def test_non_streaming_releases_shared_article_once():
+    with app.app_context():
+        db.create_all()
+        new_request = RequestData(
+            status="pending",
+            input_data=[
+                {"name": "Gamma Corp", "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"},
+                {"name": "Delta Corp", "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"},
+            ],
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+    url = "https://example.com/slow-shared"
+    key = article_id(url)
+    finish = threading.Event()
+
+    def slow_download(url, *args, **kwargs):
+        finish.wait(5)
+        return "Author\n\nText"
+
+    articles = [{**_article(url), "description": "Shares surged on strong growth"}]
+    with patch("flask_app.tasks.RATING_MODE", "local"), patch(
+        "flask_app.tasks.PROCESS_STREAMING", False
+    ), patch("flask_app.tasks.ARTICLE_FULLTEXT_BUDGET", 0.1), patch(
+        "flask_app.tasks.newsapi.get_everything", return_value={"articles": articles}
+    ), patch("flask_app.tasks.download_article_text", side_effect=slow_download):
+        # stejny clanek stahuje i jina soubezna uloha
+        _, other_job = ARTICLE_DOWNLOADS.acquire(url, lambda url, timeout: slow_download(url), 5)
+        try:
+            process_request(request_id, app)
+            # uloha uvolnila clanek jednou, ceka na nej dal jen druha uloha
+            assert ARTICLE_DOWNLOADS.waiters.get(key) == 1
+            assert not other_job.cancelled()
+        finally:
+            finish.set()
+            ARTICLE_DOWNLOADS.release(key, other_job)
+
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        assert request_data.status == "done"
+        assert [entry["content_sources"] for entry in request_data.sentiment_data] == [{"snippet": 1}] * 2
+
+
+def test_split_shared_articles():
+    results = [
+        {"name": "A", "articles": [{"article_id": "1", "url": "https://x.cz/1", "content": "T"}]},
+        {"name": "B", "articles": [{"article_id": "1", "url": "https://x.cz/1", "content": "T"}]},
+        {"name": "C", "error": "Chyba"},
+    ]
+    stored = split_shared_articles(results)
+    assert stored["articles"] == {"1": {"url": "https://x.cz/1", "content": "T"}}
+    assert stored["companies"][1] == {"name": "B", "articles": [{"article_id": "1", "url": "https://x.cz/1"}]}
+    assert stored["companies"][2] == {"name": "C", "error": "Chyba"}
+    assert "content" in results[0]["articles"][0]
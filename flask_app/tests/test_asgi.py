@@ -0,0 +1,186 @@
+import pytest
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.asgi import ASGIApplication, build_environ
+
+
+@pytest.fixture(scope="module")
+def asgi_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    return ASGIApplication(app, wsgi_threads=2)
+
+
+@pytest.fixture
+def client():
+    with app.test_client() as testing_client:
+        yield testing_client
+
+
+def _request(application, method, path, body=b"", headers=()):
+    """Zavolá ASGI aplikaci a vrátí (status, hlavičky, tělo)."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 12345),
+    }
+    incoming = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    return (
+        start["status"],
+        {name.decode(): value.decode() for name, value in start["headers"]},
+        b"".join(message.get("body", b"") for message in sent[1:]),
+    )
+
+
+def _add_request(**values):
+    with app.app_context():
+        request_data = RequestData(input_data=[{"name": "Apple"}], **values)
+        db.session.add(request_data)
+        db.session.commit()
+        return request_data.id
+
+
+# ====================== TESTY ASGI REŽIMU ======================
+
+
+def test_read_endpoints_match_flask(asgi_app, client):
+    done_id = _add_request(
+        status="done",
+        news_data=json.dumps({"companies": [], "articles": {}}),
+        sentiment_data=[{"company_name": "Apple", "rating": 1.5}],
+    )
+    pending_id = _add_request(status="pending")
+    for path in [
+        f"/output/{done_id}/status",
+        f"/output/{done_id}/all",
+        f"/output/{done_id}",
+        f"/output/{pending_id}",
+        "/output/999999/status",
+        "/output/999999/all",
+        f"/output/{done_id}/status?wait=abc",
+    ]:
+        expected = client.get(path)
+        status, headers, body = _request(asgi_app, "GET", path)
+        assert (status, body) == (expected.status_code, expected.data), path
+        assert headers["content-type"] == "application/json"
+
+
+def test_status_long_poll_returns_on_completion(asgi_app):
+    request_id = _add_request(status="processing")
+
+    def finish():
+        time.sleep(0.3)
+        with app.app_context():
+            db.session.get(RequestData, request_id).status = "done"
+            db.session.commit()
+
+    threading.Thread(target=finish).start()
+    started = time.monotonic()
+    with patch("flask_app.asgi.STATUS_WAIT_POLL_SECONDS", 0.05):
+        status, _, body = _request(asgi_app, "GET", f"/output/{request_id}/status?wait=5")
+    assert status == 200
+    assert json.loads(body) == {"request_id": request_id, "status": "done"}
+    assert time.monotonic() - started < 3
+
+
+def test_status_long_poll_times_out_with_current_status(asgi_app, client):
+    request_id = _add_request(status="pending")
+    with patch("flask_app.asgi.STATUS_WAIT_POLL_SECONDS", 0.05):
+        status, _, body = _request(asgi_app, "GET", f"/output/{request_id}/status?wait=0.2")
+    assert json.loads(body)["status"] == "pending"
+    with patch("flask_app.app.STATUS_WAIT_POLL_SECONDS", 0.05):
+        response = client.get(f"/output/{request_id}/status?wait=0.2")
+    assert response.data == body
+
+
+def test_other_routes_go_through_flask(asgi_app):
+    status, headers, body = _request(asgi_app, "GET", "/")
+    assert status == 200
+    assert headers["content-type"].startswith("text/html")
+
+    payload = json.dumps([{"name": "Apple", "from": "2025-03-01", "to": "2025-03-05"}]).encode()
+    with patch("flask_app.app.scheduler.submit") as submit:
+        status, _, body = _request(
+            asgi_app,
+            "POST",
+            "/submit?priority=low",
+            body=payload,
+            headers=[("Content-Type", "application/json"), ("Content-Length", str(len(payload)))],
+        )
+    assert status == 200
+    assert submit.call_count == 1
+    assert "request_id" in json.loads(body)
+
+
+def test_bulk_submit_streams_through_bridge(asgi_app):
+    lines = b"\n".join(
+        json.dumps({"name": f"Company {idx}", "from": "2025-03-01", "to": "2025-03-05"}).encode()
+        for idx in range(3)
+    )
+    with patch("flask_app.app.scheduler.submit"):
+        status, headers, body = _request(
+            asgi_app,
+            "POST",
+            "/submit/bulk",
+            body=lines + b"\n{broken\n",
+            headers=[("Content-Type", "application/x-ndjson")],
+        )
+    results = [json.loads(line) for line in body.splitlines()]
+    assert status == 200
+    assert headers["content-type"] == "application/x-ndjson"
+    assert results[-1] == {"done": True, "accepted": 3, "rejected": 1}
+
+
+def test_build_environ_headers_and_path():
+    scope = {
+        "method": "GET",
+        "path": "/UI/history",
+        "query_string": b"company=NVDA",
+        "headers": [(b"content-type", b"text/plain"), (b"x-a", b"1"), (b"x-a", b"2")],
+    }
+    environ = build_environ(scope, None)
+    assert environ["PATH_INFO"] == "/UI/history"
+    assert environ["QUERY_STRING"] == "company=NVDA"
+    assert environ["CONTENT_TYPE"] == "text/plain"
+    assert environ["HTTP_X_A"] == "1,2"
+
+
+def test_lifespan_startup_and_shutdown():
+    application = ASGIApplication(app, wsgi_threads=1)
+    incoming = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(application({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert application.reader.mode in ("async", "threads")
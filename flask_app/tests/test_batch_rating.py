@@ -0,0 +1,199 @@
+import pytest
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import select, update
+
+from flask_app.app import app, db
+from flask_app.models import RatingBatch, RatingBatchItem, RequestData
+from flask_app.tasks import process_request
+from flask_app.batch_rating import (
+    LocalBatchBackend,
+    create_batch_backend,
+    lexicon_responder,
+    read_batch_output,
+    item_requests,
+    run_batch_rating,
+    submit_batches,
+)
+from flask_app.utils.article_cache import ARTICLE_DOWNLOADS
+from flask_app.utils.news_rating import MAX_NEWS_COUNT, build_chat_request
+
+
+@pytest.fixture(autouse=True)
+def batch_env(tmp_path, monkeypatch):
+    ARTICLE_DOWNLOADS.clear()
+    monkeypatch.setenv("OPEN_AI_API_KEY", "test-key")
+    monkeypatch.setattr("flask_app.batch_rating.RATING_BATCH_DIR", str(tmp_path))
+    with app.app_context():
+        db.create_all()
+        # fronta je spolecna pro celou DB - polozky z jinych testu nesmi ovlivnit tento
+        db.session.execute(RatingBatchItem.__table__.delete())
+        db.session.execute(RatingBatch.__table__.delete())
+        db.session.commit()
+    yield tmp_path
+    ARTICLE_DOWNLOADS.clear()
+
+
+def _submit(companies, rating_batch=True):
+    with app.app_context():
+        new_request = RequestData(
+            status="pending",
+            rating_batch=rating_batch,
+            input_data=[
+                {"name": name, "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"}
+                for name in companies
+            ],
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+    def get_everything(q, **kwargs):
+        return {
+            "articles": [
+                {"url": f"https://example.com/{q}/{idx}", "title": f"{q} news {idx}", "source": {"name": "S"}}
+                for idx in range(3)
+            ]
+        }
+
+    sentences = ["Strong growth and record profit.", "New factory opens in Texas.", "Chief executive resigns today."]
+    with patch("flask_app.tasks.RATING_MODE", "llm"), patch(
+        "flask_app.tasks.newsapi.get_everything", side_effect=get_everything
+    ), patch("flask_app.tasks.download_article_text", side_effect=lambda url, *args, **kwargs: f"Author\n\n{url} {sentences[int(url[-1])]}"), patch(
+        "flask_app.utils.news_rating.NewsRating.rate_news_articles"
+    ) as rate_news_articles:
+        process_request(request_id, app)
+    return request_id, rate_news_articles
+
+
+def _request(request_id):
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        return request_data.status, request_data.sentiment_data
+
+
+def _items(request_id):
+    with app.app_context():
+        return db.session.execute(
+            select(RatingBatchItem).where(RatingBatchItem.request_id == request_id)
+        ).scalars().all()
+
+
+# ====================== TESTY DÁVKOVÉHO HODNOCENÍ ======================
+
+
+def test_batch_request_waits_and_finishes(batch_env):
+    first, rate_news_articles = _submit([f"A{uuid.uuid4().hex[:6]}", f"B{uuid.uuid4().hex[:6]}"])
+    second, _ = _submit([f"C{uuid.uuid4().hex[:6]}"])
+
+    # hodnoceni se jen zaradi do davky, OpenAI se primo nevola
+    rate_news_articles.assert_not_called()
+    assert _request(first)[0] == "rating"
+    assert [item.company_index for item in _items(first)] == [0, 1]
+    assert all(item.status == "queued" for item in _items(second))
+
+    backend = LocalBatchBackend(str(batch_env / "local"), responder=lambda body: '{"0": 10, "1": 10, "2": 10}')
+    with app.app_context():
+        stats = run_batch_rating(backend, force=True)
+        assert stats["submitted"] == 3
+        assert db.session.execute(select(RatingBatch).order_by(RatingBatch.id.desc())).scalars().first().item_count == 3
+        stats = run_batch_rating(backend)
+    assert stats["completed"] == 1 and stats["finalized"] == 2
+
+    for request_id in (first, second):
+        status, sentiment = _request(request_id)
+        assert status == "done"
+        assert all(entry["rating"] == 10.0 for entry in sentiment)
+        assert _items(request_id) == []
+
+
+def test_batch_repairs_only_missing_indices(batch_env):
+    request_id, _ = _submit([f"R{uuid.uuid4().hex[:6]}"])
+    bodies = []
+
+    def responder(body):
+        bodies.append(body)
+        return '{"0": 0, "1": "n/a"}' if len(bodies) == 1 else '{"1": 10, "2": 10}'
+
+    backend = LocalBatchBackend(str(batch_env / "local"), responder=responder)
+    with app.app_context():
+        run_batch_rating(backend, force=True)
+        run_batch_rating(backend, force=True)  # vysledek + opravna davka
+        item = _items(request_id)[0]
+        assert item.status == "submitted" and item.attempts == 1
+        run_batch_rating(backend)
+
+    # opravne volani se pta jen na chybejici indexy
+    prompt = bodies[1]["messages"][1]["content"]
+    assert "\n1: " in prompt and "\n2: " in prompt and "\n0: " not in prompt
+    status, sentiment = _request(request_id)
+    assert status == "done"
+    assert sentiment[0]["rating"] == pytest.approx((-10 + 10 + 10) / 3, abs=0.01)
+
+
+def test_cancel_request_waiting_for_batch(batch_env):
+    request_id, _ = _submit([f"X{uuid.uuid4().hex[:6]}"])
+    client = app.test_client()
+    response = client.post(f"/output/{request_id}/cancel")
+    assert response.get_json()["status"] == "cancelled"
+    assert _items(request_id) == []
+    assert client.get("/queue/stats").get_json()["batch"]["items"].get("queued", 0) == 0
+
+
+def test_non_batch_request_rates_directly(batch_env):
+    request_id, rate_news_articles = _submit([f"D{uuid.uuid4().hex[:6]}"], rating_batch=False)
+    rate_news_articles.assert_called_once()
+    assert _request(request_id)[0] == "done"
+    assert _items(request_id) == []
+
+
+def test_lexicon_responder_and_output_parsing(batch_env):
+    body = build_chat_request(["Record profit and strong growth.", "Bankruptcy and fraud."])
+    ratings = json.loads(lexicon_responder(body))
+    assert set(ratings) == {"0", "1"}
+    assert ratings["0"] > 5 > ratings["1"]
+
+    path = batch_env / "out.jsonl"
+    path.write_text(
+        json.dumps({"custom_id": "item-1", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "{}"}}]}}})
+        + "\n"
+        + json.dumps({"custom_id": "item-2", "response": {"status_code": 500, "body": {}}})
+        + "\n"
+    )
+    assert read_batch_output(str(path)) == {"item-1": "{}", "item-2": None}
+
+    with pytest.raises(ValueError):
+        create_batch_backend("neznamy")
+
+
+def test_submit_skips_batch_claimed_by_other_process(batch_env):
+    request_id, _ = _submit([f"D{uuid.uuid4().hex[:6]}"])
+
+    def claim_by_other_process(**kwargs):
+        # jiny proces zabere polozky mezi vyberem kandidatu a podminenym UPDATE
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(RatingBatchItem).where(RatingBatchItem.status == "queued").values(status="submitted")
+            )
+        return RatingBatch(**kwargs)
+
+    backend = MagicMock()
+    backend.name = "local"
+    with app.app_context():
+        with patch("flask_app.batch_rating.RatingBatch", side_effect=claim_by_other_process):
+            assert submit_batches(backend, force=True) == 0
+        assert db.session.execute(select(RatingBatch)).scalars().all() == []
+    backend.submit.assert_not_called()
+    assert list(batch_env.glob("*.jsonl")) == []
+    assert all(item.status == "submitted" and item.batch_id is None for item in _items(request_id))
+
+
+def test_item_requests_split_by_max_news_count():
+    item = RatingBatchItem(id=5, payload={"news": ["text"] * (MAX_NEWS_COUNT + 3)}, ratings={"1": 2.0})
+    # ohodnocena zprava se znovu neposila, zbytek po nejvyse MAX_NEWS_COUNT zpravach
+    assert item_requests(item) == [
+        ("item-5", [0] + list(range(2, MAX_NEWS_COUNT + 1))),
+        ("item-5-1", [MAX_NEWS_COUNT + 1, MAX_NEWS_COUNT + 2]),
+    ]
@@ -0,0 +1,88 @@
+import pytest
+import io
+import json
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.bulk_submit import bulk_submit, iter_ndjson_lines, parse_line
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    with app.test_client() as testing_client:
+        yield testing_client
+
+
+def _company(name):
+    return {"name": name, "from": "2025-03-01", "to": "2025-03-05"}
+
+
+# ====================== TESTY HROMADNÉHO ZADÁNÍ ======================
+
+
+def test_iter_ndjson_lines_skips_blank_and_truncates_long_lines():
+    stream = io.BytesIO(b'{"a": 1}\n\n' + b"x" * 50 + b'\n{"b": 2}')
+    lines = list(iter_ndjson_lines(stream, max_line_bytes=20))
+    assert [number for number, _ in lines] == [1, 3, 4]
+    assert len(lines[1][1]) == 21
+    assert lines[2][1] == b'{"b": 2}'
+
+
+def test_parse_line():
+    assert parse_line(json.dumps(_company("Apple")).encode()) == [_company("Apple")]
+    assert parse_line(json.dumps([_company("A"), _company("B")]).encode())[1]["name"] == "B"
+    for line in [b"{not json", b"[]", b'"Apple"', b'{"name": "Apple"}', b"[1]"]:
+        with pytest.raises(ValueError):
+            parse_line(line)
+
+
+def test_bulk_submit_batches_and_enqueues(client):
+    lines = [(idx + 1, json.dumps(_company(f"Company {idx}")).encode()) for idx in range(5)]
+    lines.insert(2, (10, b"{broken"))
+    enqueued = []
+    options = {"deadline_seconds": 60, "priority": 2, "client_key": "batch"}
+
+    with app.app_context():
+        with patch("flask_app.bulk_submit.db.session.commit", wraps=db.session.commit) as commit:
+            results = [json.loads(line) for line in bulk_submit(lines, options, enqueued.append, batch_size=2)]
+        assert commit.call_count == 3
+
+        assert results[-1] == {"done": True, "accepted": 5, "rejected": 1}
+        assert {"line": 10, "error": "Invalid JSON format"} in results
+        ids = [result["request_id"] for result in results if "request_id" in result]
+        assert [job["id"] for job in enqueued] == ids
+        stored = db.session.get(RequestData, ids[0])
+        assert (stored.status, stored.priority, stored.client_key) == ("pending", 2, "batch")
+        # rozpocet se pocita az od zacatku zpracovani, ne od nahrani
+        assert (stored.deadline_at, stored.deadline_seconds) == (None, 60)
+        assert stored.input_data == [_company("Company 0")]
+
+
+def test_submit_bulk_endpoint(client):
+    body = "\n".join(
+        [json.dumps(_company("Apple")), json.dumps([_company("Tesla"), _company("Nvidia")]), "[]"]
+    )
+    with patch("flask_app.app.scheduler.submit") as submit:
+        response = client.post(
+            "/submit/bulk?priority=high", data=body, content_type="application/x-ndjson"
+        )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [result["line"] for result in results[:3]] == [1, 2, 3]
+    assert "error" in results[2]
+    assert results[-1] == {"done": True, "accepted": 2, "rejected": 1}
+    assert submit.call_count == 2
+
+    with app.app_context():
+        stored = db.session.get(RequestData, results[1]["request_id"])
+        assert (stored.cost, stored.priority) == (2, 0)
+
+
+def test_submit_bulk_invalid_priority(client):
+    response = client.post("/submit/bulk?priority=urgent", data=b"")
+    assert response.status_code == 400
@@ -0,0 +1,106 @@
+import pytest
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import CompanyDaySentiment, TaskLease
+from flask_app.cache_warmer import CacheWarmer, claim_warm_run, get_warm_stats, warm_window
+
+
+@pytest.fixture
+def warm_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        db.session.query(CompanyDaySentiment).delete()
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.query(CompanyDaySentiment).delete()
+        db.session.commit()
+
+
+def _articles(window):
+    return [
+        {
+            "url": f"https://example.com/warm/{day}",
+            "title": "Shares surged on strong growth",
+            "publishedAt": f"{day}T10:00:00Z",
+            "source": {"name": "Example"},
+        }
+        for day in window
+    ]
+
+
+# ====================== TESTY PŘEDEHŘÍVÁNÍ CACHE ======================
+
+
+def test_warm_window_ends_yesterday():
+    now = datetime(2025, 3, 10, 12, tzinfo=timezone.utc).timestamp()
+    assert warm_window(3, now=now) == ["2025-03-07", "2025-03-08", "2025-03-09"]
+
+
+def test_warmer_fills_window_and_reports_freshness(warm_app):
+    window = warm_window()
+    warmer = CacheWarmer(app, companies=["WARM1", "WARM2"], concurrency=2)
+
+    with patch("flask_app.tasks.RATING_MODE", "local"), patch(
+        "flask_app.tasks.newsapi.get_everything", return_value={"articles": _articles(window)}
+    ) as get_everything, patch(
+        "flask_app.tasks.download_article_text", return_value="Author\n\nText"
+    ), patch("flask_app.tasks.DAILY_FETCH_MAX_DAYS", len(window)):
+        run = warmer.run_once()
+        assert run == {**run, "warmed": 2, "errors": 0}
+        # kazdy den okna zvlast pro obe spolecnosti
+        assert get_everything.call_count == 2 * len(window)
+        assert {call.kwargs["from_param"] for call in get_everything.call_args_list} == set(window)
+
+        # Druhý průchod - okno je spočítané, NewsAPI se nevolá
+        assert warmer.run_once()["warmed"] == 0
+        assert get_everything.call_count == 2 * len(window)
+
+        with app.app_context():
+            stats = get_warm_stats(["WARM1", "WARM2", "COLD"])
+    assert stats["companies"]["WARM1"]["cached_days"] == len(window)
+    assert stats["companies"]["WARM1"]["age_seconds"] < 60
+    assert stats["companies"]["COLD"] == {
+        "cached_days": 0,
+        "missing_days": len(window),
+        "last_computed_at": None,
+        "age_seconds": None,
+    }
+    assert warmer.stats()["runs"] == 2
+    assert warmer.stats()["companies"]["WARM2"]["error"] is None
+
+
+def test_warm_lease_allows_one_process_per_interval(warm_app):
+    with app.app_context():
+        db.session.query(TaskLease).delete()
+        db.session.commit()
+        assert claim_warm_run("web-1", 100, now=1000.0)
+        # jiny proces (i tentyz) behem intervalu nic nespousti
+        assert not claim_warm_run("web-2", 100, now=1050.0)
+        assert not claim_warm_run("web-1", 100, now=1050.0)
+        # po vyprseni zamku ho ziska kdokoli
+        assert claim_warm_run("worker-1", 100, now=1091.0)
+        assert db.session.get(TaskLease, "cache_warm").owner == "worker-1"
+        db.session.query(TaskLease).delete()
+        db.session.commit()
+
+
+def test_warmer_records_errors(warm_app):
+    warmer = CacheWarmer(app, companies=["BROKEN"])
+    with patch("flask_app.tasks.RATING_MODE", "local"), patch(
+        "flask_app.tasks.newsapi.get_everything", side_effect=RuntimeError("API down")
+    ):
+        assert warmer.run_once()["errors"] == 1
+    assert warmer.stats()["companies"]["BROKEN"]["error"] == "API down"
+
+
+def test_cache_stats_endpoint(warm_app):
+    response = app.test_client().get("/cache/stats")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert set(body) == {"db", "warmer"}
+    assert "AAPL" in body["db"]["companies"]
@@ -0,0 +1,99 @@
+import pytest
+import json
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.database import COMPRESSED_JSON_MAGIC, CompressedJSON
+
+
+@pytest.fixture
+def json_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+
+
+NEWS_DATA = [
+    {
+        "company": "Apple",
+        "articles": [{"title": "Apple beats estimates", "content": "Strong growth. " * 200}],
+    }
+]
+
+
+# ====================== TESTY KOMPRIMOVANÉHO JSON ======================
+
+
+def test_compressed_json_roundtrip():
+    column_type = CompressedJSON(codec="zlib", min_size=16)
+    stored = column_type.process_bind_param(NEWS_DATA, None)
+
+    assert stored.startswith(COMPRESSED_JSON_MAGIC + b"z")
+    assert len(stored) < len(json.dumps(NEWS_DATA)) / 5
+    assert column_type.process_result_value(stored, None) == NEWS_DATA
+
+
+def test_compressed_json_small_values_stay_uncompressed():
+    column_type = CompressedJSON(codec="zlib", min_size=256)
+    stored = column_type.process_bind_param({"a": 1}, None)
+
+    assert stored == COMPRESSED_JSON_MAGIC + b'n{"a":1}'
+    assert column_type.process_result_value(stored, None) == {"a": 1}
+    assert column_type.process_bind_param(None, None) is None
+
+
+def test_compressed_json_reads_legacy_json_text():
+    column_type = CompressedJSON()
+    assert column_type.process_result_value('[{"company": "Apple"}]', None) == [
+        {"company": "Apple"}
+    ]
+    assert column_type.process_result_value(b'"text"', None) == "text"
+
+
+def test_compressed_json_invalid_codec():
+    with pytest.raises(ValueError):
+        CompressedJSON(codec="lz4")
+
+
+def test_compressed_json_zstd_without_package():
+    with patch("flask_app.database.zstandard", None):
+        assert CompressedJSON(codec="zstd").codec == "zlib"
+        with pytest.raises(RuntimeError):
+            CompressedJSON.decompress(COMPRESSED_JSON_MAGIC + b"s" + b"data")
+
+
+def test_news_data_column_compressed_in_db(json_app):
+    with app.app_context():
+        new_request = RequestData(status="done", input_data=[], news_data=NEWS_DATA)
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+        stored = db.session.execute(
+            text("SELECT news_data FROM request_data WHERE id = :id"), {"id": request_id}
+        ).scalar()
+        assert bytes(stored).startswith(COMPRESSED_JSON_MAGIC)
+
+        db.session.expire_all()
+        assert db.session.get(RequestData, request_id).news_data == NEWS_DATA
+
+
+def test_news_data_column_reads_legacy_rows(json_app):
+    with app.app_context():
+        new_request = RequestData(status="done", input_data=[])
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+        # Řádek uložený dřívějším typem db.JSON
+        db.session.execute(
+            text("UPDATE request_data SET news_data = :value WHERE id = :id"),
+            {"value": json.dumps(NEWS_DATA), "id": request_id},
+        )
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(RequestData, request_id).news_data == NEWS_DATA
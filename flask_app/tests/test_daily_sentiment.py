@@ -0,0 +1,203 @@
+import pytest
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import CompanyDaySentiment, RequestData
+from flask_app.utils.article_cache import ARTICLE_DOWNLOADS
+from flask_app.utils.domain_health import DOMAIN_HEALTH
+from flask_app.tasks import DOWNLOAD_ERROR_TEXT, process_request
+from flask_app.utils.news_rating import MAX_NEWS_COUNT
+from flask_app.daily_sentiment import (
+    aggregate_by_day,
+    combine_ratings,
+    complete_days,
+    is_closed_day,
+    request_days,
+)
+
+
+@pytest.fixture
+def daily_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        db.session.query(CompanyDaySentiment).delete()
+        db.session.commit()
+    ARTICLE_DOWNLOADS.clear()
+    DOMAIN_HEALTH.clear()
+    yield app
+    with app.app_context():
+        db.session.query(CompanyDaySentiment).delete()
+        db.session.commit()
+
+
+def _days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def _article(day, title):
+    return {
+        "url": f"https://example.com/{day}/{title}",
+        "title": title,
+        "publishedAt": f"{day}T10:00:00Z",
+        "source": {"name": "Example"},
+    }
+
+
+def _run_request(company, date_from, date_to, articles, download=True):
+    with app.app_context():
+        new_request = RequestData(
+            status="pending",
+            input_data=[{"name": company, "from": date_from, "to": date_to}],
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+    with patch("flask_app.tasks.RATING_MODE", "local"), patch(
+        "flask_app.tasks.newsapi.get_everything", return_value={"articles": articles}
+    ) as get_everything, ExitStack() as stack:
+        if download:
+            stack.enter_context(patch("flask_app.tasks.download_article_text", return_value="Author\n\nText"))
+        process_request(request_id, app)
+
+    with app.app_context():
+        rating = db.session.get(RequestData, request_id).sentiment_data[0]["rating"]
+    return rating, get_everything
+
+
+# ====================== TESTY DENNÍCH AGREGÁTŮ ======================
+
+
+def test_request_days():
+    assert request_days("2025-03-01", "2025-03-03") == ["2025-03-01", "2025-03-02", "2025-03-03"]
+    for date_from, date_to in [
+        ("2025-03-03", "2025-03-01"),
+        ("2025-03-01T10:00:00", "2025-03-03"),
+        ("2020-01-01", "2025-01-01"),
+    ]:
+        with pytest.raises(ValueError):
+            request_days(date_from, date_to)
+
+
+def test_is_closed_day():
+    assert is_closed_day("2025-03-01", today="2025-03-02")
+    assert not is_closed_day("2025-03-02", today="2025-03-02")
+
+
+def test_aggregate_and_combine():
+    articles = [
+        _article("2025-03-01", "a"),
+        _article("2025-03-01", "b"),
+        _article("2025-03-02", "c"),
+    ]
+    per_day = aggregate_by_day(articles, {0: 4.0, 1: 2.0})
+    assert per_day["2025-03-01"] == {"article_count": 2, "rated_count": 2, "rating_sum": 6.0}
+    assert per_day["2025-03-02"] == {"article_count": 1, "rated_count": 0, "rating_sum": 0.0}
+
+    cached = {"article_count": 1, "rated_count": 1, "rating_sum": -3.0}
+    assert combine_ratings([cached, *per_day.values()]) == 1.0
+    assert combine_ratings([]) is None
+
+
+def test_process_request_reuses_stored_days(daily_app):
+    first_day, second_day, third_day = _days_ago(4), _days_ago(3), _days_ago(2)
+    articles = [
+        _article(first_day, "Company shares surged on strong growth"),
+        _article(second_day, "Company faces lawsuit and losses"),
+    ]
+
+    rating, get_everything = _run_request("Daily Corp", first_day, second_day, articles)
+    assert rating is not None
+    # kazdy chybejici den se stahuje zvlast od nejnovejsiho (vysledek NewsAPI je omezen na LIST_SIZE zprav)
+    assert [(call.kwargs["from_param"], call.kwargs["to"]) for call in get_everything.call_args_list] == [
+        (second_day, second_day),
+        (first_day, first_day),
+    ]
+
+    # Stejné období - vše je spočítané, NewsAPI se nevolá
+    cached_rating, get_everything = _run_request("Daily Corp", first_day, second_day, [])
+    assert cached_rating == rating
+    get_everything.assert_not_called()
+
+    # Rozšířené období - stahuje se jen chybějící den
+    _, get_everything = _run_request("daily corp", first_day, third_day, [])
+    assert get_everything.call_args.kwargs["from_param"] == third_day
+    assert get_everything.call_args.kwargs["to"] == third_day
+
+    with app.app_context():
+        days = db.session.query(CompanyDaySentiment).filter_by(company="daily corp").count()
+    assert days == 3
+
+
+def test_process_request_does_not_store_today(daily_app):
+    today = datetime.now(timezone.utc).date().isoformat()
+    _run_request("Today Corp", today, today, [_article(today, "Shares rose")])
+    _, get_everything = _run_request("Today Corp", today, today, [])
+    get_everything.assert_called_once()
+
+
+def test_incomplete_days_are_not_stored(daily_app):
+    first_day, second_day = _days_ago(6), _days_ago(5)
+    articles = [
+        _article(first_day, "Company shares surged on strong growth"),
+        _article(second_day, "Company faces lawsuit and losses"),
+    ]
+
+    def download(url, *args, **kwargs):
+        return DOWNLOAD_ERROR_TEXT if second_day in url else "Author\n\nText"
+
+    with patch("flask_app.tasks.download_article_text", side_effect=download):
+        rating, _ = _run_request("Partial Corp", first_day, second_day, articles, download=False)
+    assert rating is not None
+    with app.app_context():
+        stored = [row.day for row in db.session.query(CompanyDaySentiment).filter_by(company="partial corp")]
+    # den s nestazenym clankem (bez uryvku) zustava chybejici
+    assert stored == [first_day]
+
+    # selhani hodnoceni - zadny den se neulozi
+    with patch("flask_app.utils.lexicon_rating.LexiconRating.rate_news_articles", side_effect=RuntimeError):
+        rating, _ = _run_request("Failed Corp", first_day, second_day, articles)
+    assert rating is None
+    with app.app_context():
+        assert db.session.query(CompanyDaySentiment).filter_by(company="failed corp").count() == 0
+
+
+def test_daily_fetch_is_capped(daily_app):
+    window = [_days_ago(days) for days in range(12, 7, -1)]
+    articles = [_article(day, f"Shares surged {day}") for day in window]
+
+    with patch("flask_app.tasks.DAILY_FETCH_MAX_DAYS", 2):
+        rating, get_everything = _run_request("Capped Corp", window[0], window[-1], articles)
+    assert rating is not None
+    # dva nejnovejsi dny zvlast, zbytek jednim volanim
+    assert [(call.kwargs["from_param"], call.kwargs["to"]) for call in get_everything.call_args_list] == [
+        (window[4], window[4]),
+        (window[3], window[3]),
+        (window[0], window[2]),
+    ]
+    with app.app_context():
+        stored = sorted(row.day for row in db.session.query(CompanyDaySentiment).filter_by(company="capped corp"))
+    assert stored == window[3:]
+
+
+def test_all_fetched_articles_are_rated(daily_app):
+    day = _days_ago(9)
+    # vic zprav nez MAX_NEWS_COUNT - hodnoti se po castech a den se ulozi
+    articles = [_article(day, f"Company {idx} shares surged") for idx in range(MAX_NEWS_COUNT + 3)]
+
+    rating, _ = _run_request("Many Corp", day, day, articles)
+    assert rating is not None
+    with app.app_context():
+        row = db.session.query(CompanyDaySentiment).filter_by(company="many corp").one()
+    assert row.rated_count == MAX_NEWS_COUNT + 3
+
+
+def test_complete_days():
+    plan = {"missing": ["2025-03-01", "2025-03-02", "2025-03-03"], "covered": ["2025-03-01", "2025-03-02"]}
+    articles = [_article("2025-03-01", "a"), _article("2025-03-02", "b")]
+    # 2025-03-03 se nestahl, 2025-03-02 nema hodnoceni
+    assert complete_days(plan, articles, {0: 1.0}) == ["2025-03-01"]
+    assert complete_days({**plan, "covered": []}, articles, {0: 1.0, 1: 2.0}) == []
@@ -0,0 +1,168 @@
+import pytest
+import os
+import time
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.tasks import download_articles, process_request
+from flask_app.utils.deadline import Deadline
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    with app.test_client() as testing_client:
+        yield testing_client
+
+
+def _add_request(status="pending", **kwargs):
+    with app.app_context():
+        new_request = RequestData(
+            status=status,
+            input_data=[{"name": "Test Company", "from": "2025-03-01", "to": "2025-03-05"}],
+            **kwargs,
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        return new_request.id
+
+
+# ====================== TESTY DEADLINE ======================
+
+
+def test_deadline_remaining_and_timeout():
+    deadline = Deadline(time.time() + 10)
+    assert 9 < deadline.remaining() <= 10
+    assert deadline.timeout(7) == 7
+    assert not deadline.should_stop()
+
+    assert Deadline(time.time() - 1).should_stop()
+    assert Deadline(None).remaining() == float("inf")
+
+
+def test_deadline_cancel_check_is_throttled():
+    calls = []
+
+    def cancel_check():
+        calls.append(1)
+        return len(calls) > 1
+
+    deadline = Deadline(None, cancel_check=cancel_check, check_interval=60)
+    assert not deadline.cancelled()
+    assert not deadline.cancelled()
+    assert len(calls) == 1
+    assert deadline.reason() == "Deadline exceeded"
+
+
+def test_download_articles_stops_at_deadline():
+    articles = [{"url": f"https://example.com/{i}", "title": f"T{i}"} for i in range(3)]
+
+    def slow_download(url, timeout):
+        time.sleep(0.5 if url.endswith("/2") else 0)
+        return "Author\n\nText"
+
+    with patch("flask_app.tasks.download_article_text", side_effect=slow_download):
+        started = time.monotonic()
+        result = download_articles(articles, Deadline(time.time() + 0.2))
+
+    assert time.monotonic() - started < 0.5
+    assert [article["content"] for article in result[:2]] == ["Text", "Text"]
+    assert result[2]["content"].startswith("[ERROR]")
+
+
+def test_download_articles_uses_snippet_after_budget():
+    articles = [
+        {"url": f"https://budget.example.com/{i}", "title": f"T{i}", "description": f"Snippet {i}"}
+        for i in range(2)
+    ] + [{"url": "https://budget.example.com/plain", "title": "Bez úryvku"}]
+
+    def download(url, timeout):
+        time.sleep({"0": 0, "1": 1.0, "plain": 0.3}[url.rsplit("/", 1)[1]])
+        return "Author\n\nFull text"
+
+    with patch("flask_app.tasks.download_article_text", side_effect=download), patch(
+        "flask_app.tasks.ARTICLE_FULLTEXT_BUDGET", 0.15
+    ):
+        started = time.monotonic()
+        result = download_articles(articles, Deadline(time.time() + 5))
+
+    # clanek bez uryvku se stahne cely, na ostatni se ceka jen do limitu
+    assert time.monotonic() - started < 0.9
+    assert [(article["content"], article["content_source"]) for article in result] == [
+        ("Full text", "full"),
+        ("Snippet 1", "snippet"),
+        ("Full text", "full"),
+    ]
+
+
+def test_process_request_with_expired_deadline(client):
+    request_id = _add_request(deadline_at=time.time() - 1)
+    with patch("flask_app.tasks.newsapi.get_everything") as get_everything:
+        with patch.dict(os.environ, {"OPEN_AI_API_KEY": "fake-key"}):
+            process_request(request_id, app)
+    get_everything.assert_not_called()
+
+    response = client.get(f"/output/{request_id}")
+    assert response.status_code == 200
+    assert response.get_json()[0]["rating"] is None
+
+
+def test_deadline_seconds_counts_from_processing_start(client):
+    # hromadny pozadavek cekal ve fronte dele nez jeho rozpocet
+    request_id = _add_request(deadline_seconds=30, created_at=time.time() - 3600)
+    with patch("flask_app.tasks.newsapi.get_everything", return_value={"articles": []}) as get_everything:
+        with patch.dict(os.environ, {"OPEN_AI_API_KEY": "fake-key"}):
+            process_request(request_id, app)
+    assert get_everything.called
+
+
+def test_submit_deadline_starts_with_processing(client):
+    data = [{"name": "Apple", "from": "2025-03-01", "to": "2025-03-05"}]
+    with patch("flask_app.app.scheduler.submit"):
+        response = client.post("/submit?deadline=42", json=data)
+    assert response.status_code == 200
+    with app.app_context():
+        stored = db.session.get(RequestData, response.get_json()["request_id"])
+        # cekani ve fronte se do rozpoctu nezapocitava
+        assert (stored.deadline_at, stored.deadline_seconds) == (None, 42)
+
+
+def test_submit_invalid_deadline(client):
+    data = [{"name": "Apple", "from": "2025-03-01", "to": "2025-03-05"}]
+    for value in ("abc", "-5", "0"):
+        response = client.post(f"/submit?deadline={value}", json=data)
+        assert response.status_code == 400
+
+
+# ====================== TESTY ZRUŠENÍ POŽADAVKU ======================
+
+
+def test_cancel_pending_request(client):
+    request_id = _add_request()
+    response = client.post(f"/output/{request_id}/cancel")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "cancelled"
+
+    # Worker, který si úlohu stihl vzít, ji nezpracuje
+    with patch("flask_app.tasks.newsapi.get_everything") as get_everything:
+        process_request(request_id, app)
+    get_everything.assert_not_called()
+    assert client.get(f"/output/{request_id}/status").get_json()["status"] == "cancelled"
+
+
+def test_cancel_running_request(client):
+    request_id = _add_request(status="processing")
+    response = client.post(f"/output/{request_id}/cancel")
+    assert response.status_code == 202
+    assert response.get_json()["status"] == "cancelling"
+    with app.app_context():
+        assert db.session.get(RequestData, request_id).cancel_requested
+
+
+def test_cancel_finished_or_missing_request(client):
+    request_id = _add_request(status="done")
+    assert client.post(f"/output/{request_id}/cancel").status_code == 409
+    assert client.post("/output/999999/cancel").status_code == 404
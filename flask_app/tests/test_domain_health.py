@@ -0,0 +1,119 @@
+import pytest
+import time
+from unittest.mock import patch
+
+from flask_app.app import app
+from flask_app.tasks import DOWNLOAD_ERROR_TEXT, article_snippet, download_articles
+from flask_app.utils.article_cache import ARTICLE_DOWNLOADS
+from flask_app.utils.deadline import Deadline
+from flask_app.utils.domain_health import (
+    CLOSED,
+    DOMAIN_HEALTH,
+    HALF_OPEN,
+    OPEN,
+    DomainHealth,
+    article_domain,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_domain_health():
+    ARTICLE_DOWNLOADS.clear()
+    DOMAIN_HEALTH.clear()
+    yield
+    ARTICLE_DOWNLOADS.clear()
+    DOMAIN_HEALTH.clear()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _article(url, description=None, content=None):
+    return {
+        "url": url,
+        "title": "Title",
+        "description": description,
+        "content": content,
+        "publishedAt": "2025-03-01T10:00:00Z",
+        "source": {"name": "Example"},
+    }
+
+
+# ====================== TESTY JISTIČE DOMÉN ======================
+
+
+def test_breaker_opens_after_failures_and_recovers():
+    clock = FakeClock()
+    health = DomainHealth(failure_threshold=2, cooldown=60, clock=clock)
+    for _ in range(2):
+        assert health.allow("paywall.com")
+        health.record("paywall.com", ok=False, latency=5.0)
+    assert health.state("paywall.com") == OPEN
+    assert not health.allow("paywall.com")
+
+    # po cooldown projde jedno zkusebni stazeni, dalsi pozadavky se dal preskakuji
+    clock.now = 61
+    assert health.allow("paywall.com")
+    assert health.state("paywall.com") == HALF_OPEN
+    assert not health.allow("paywall.com")
+    health.record("paywall.com", ok=True, latency=0.5)
+    assert health.state("paywall.com") == CLOSED
+
+    stats = health.stats()
+    assert stats["states"] == {CLOSED: 1, OPEN: 0, HALF_OPEN: 0}
+    domain = stats["domains"]["paywall.com"]
+    assert domain["trips"] == 1 and domain["short_circuited"] == 2
+    assert domain["success_rate"] == pytest.approx(1 / 3, abs=0.001)
+
+
+def test_breaker_trips_on_slow_domain():
+    health = DomainHealth(failure_threshold=3, slow_seconds=2.0, min_samples=2, alpha=0.5, clock=FakeClock())
+    health.record("slow.com", ok=True, latency=1.0)
+    assert health.state("slow.com") == CLOSED
+    health.record("slow.com", ok=True, latency=6.0)
+    assert health.state("slow.com") == OPEN
+    assert health.stats()["domains"]["slow.com"]["latency_ewma"] == 3.5
+
+
+def test_article_domain_and_snippet():
+    assert article_domain("http://WWW.Example.com/a?utm_source=x") == "example.com"
+    assert article_snippet(_article("https://x.com", "Shares rose.", "Shares rose. More text… [+2145 chars]")) == (
+        "Shares rose. More text…"
+    )
+    assert article_snippet(_article("https://x.com", "Shares rose.", "Other text")) == "Shares rose. Other text"
+    assert article_snippet(_article("https://x.com")) == ""
+
+
+def test_download_articles_skips_open_domain_and_uses_snippet():
+    calls = []
+
+    def download(url, timeout):
+        calls.append(url)
+        return DOWNLOAD_ERROR_TEXT if "paywall" in url else "Author\n\nFull text"
+
+    articles = [
+        _article(f"https://paywall.com/{idx}", description=f"Snippet {idx}") for idx in range(5)
+    ] + [_article("https://ok.com/1"), _article("https://paywall.com/nosnippet")]
+    with patch("flask_app.tasks.download_article_text", side_effect=download), patch.object(
+        DOMAIN_HEALTH, "failure_threshold", 2
+    ):
+        # stahuje se postupne, aby jistic videl chyby drive nez dalsi stazeni
+        result = []
+        for article in articles:
+            result += download_articles([article], Deadline(time.time() + 5))
+
+    assert sum("paywall.com" in url for url in calls) == 2
+    assert [article["content_source"] for article in result] == ["snippet"] * 5 + ["full", None]
+    assert result[4]["content"] == "Snippet 4"
+    assert result[5]["content"] == "Full text"
+    assert result[6]["content"].startswith("[ERROR]")
+
+    stats = app.test_client().get("/queue/stats").get_json()["domains"]
+    assert stats["states"][OPEN] == 1
+    assert stats["domains"]["paywall.com"]["short_circuited"] == 4
+    assert stats["domains"]["paywall.com"]["retry_in_seconds"] > 0
@@ -0,0 +1,129 @@
+import pytest
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.job_queue import (
+    claim_job,
+    heartbeat,
+    recover_expired_leases,
+    process_job,
+    run_worker,
+)
+
+
+@pytest.fixture
+def queue_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        db.session.query(RequestData).delete()
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.query(RequestData).delete()
+        db.session.commit()
+
+
+def _add_request(status="pending", **kwargs):
+    with app.app_context():
+        new_request = RequestData(status=status, input_data=[], **kwargs)
+        db.session.add(new_request)
+        db.session.commit()
+        return new_request.id
+
+
+# ====================== TESTY FRONTY ÚLOH ======================
+
+
+def test_claim_job_only_once(queue_app):
+    request_id = _add_request()
+    with app.app_context():
+        assert claim_job("worker-a") == request_id
+        assert claim_job("worker-b") is None
+
+        request_data = db.session.get(RequestData, request_id)
+        assert request_data.status == "pending"
+        assert request_data.worker_id == "worker-a"
+        assert request_data.attempts == 1
+        assert request_data.lease_expires_at > time.time()
+
+
+def test_heartbeat_extends_lease(queue_app):
+    request_id = _add_request()
+    with app.app_context():
+        claim_job("worker-a", lease_seconds=1)
+        assert heartbeat(request_id, "worker-a", lease_seconds=100)
+        assert not heartbeat(request_id, "worker-b")
+        request_data = db.session.get(RequestData, request_id)
+        assert request_data.lease_expires_at > time.time() + 50
+
+
+def test_recover_expired_leases(queue_app):
+    expired_id = _add_request(
+        status="processing", worker_id="dead", lease_expires_at=time.time() - 10, attempts=1
+    )
+    orphan_id = _add_request(status="processing")
+    alive_id = _add_request(
+        status="processing", worker_id="alive", lease_expires_at=time.time() + 100, attempts=1
+    )
+    exhausted_id = _add_request(
+        status="processing", worker_id="dead", lease_expires_at=time.time() - 10, attempts=99
+    )
+
+    with app.app_context():
+        assert recover_expired_leases() == 2
+        assert db.session.get(RequestData, expired_id).status == "pending"
+        assert db.session.get(RequestData, orphan_id).status == "pending"
+        assert db.session.get(RequestData, alive_id).status == "processing"
+        assert db.session.get(RequestData, exhausted_id).status == "error"
+
+
+def test_failed_job_keeps_lease_until_expiry(queue_app):
+    request_id = _add_request()
+    with patch("flask_app.job_queue.process_request", side_effect=Exception("boom")):
+        process_job(request_id, app)
+
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        assert request_data.worker_id is not None
+        assert request_data.attempts == 1
+        assert claim_job("worker-b") is None
+
+        # Po vypršení zámku se úloha vrátí do fronty
+        assert recover_expired_leases(now=time.time() + 10_000) == 1
+        assert db.session.get(RequestData, request_id).status == "pending"
+
+
+def test_run_worker_processes_queue(queue_app):
+    first_id = _add_request()
+    second_id = _add_request()
+
+    def fake_process(request_id, app):
+        with app.app_context():
+            request_data = db.session.get(RequestData, request_id)
+            request_data.status = "done"
+            db.session.commit()
+
+    with patch("flask_app.job_queue.process_request", side_effect=fake_process):
+        run_worker(app, concurrency=2, poll_seconds=0.01, once=True)
+
+    with app.app_context():
+        for request_id in (first_id, second_id):
+            request_data = db.session.get(RequestData, request_id)
+            assert request_data.status == "done"
+            assert request_data.worker_id is None
+
+
+def test_import_starts_no_background_threads():
+    # import v novem procesu - worker ani jednorazove prikazy nesmi spustit ulohy webu
+    code = (
+        "import sys, threading, flask_app.worker; "
+        "print(threading.active_count(), sys.modules['flask_app.app']._background_started)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-2:] == ["1", "False"]
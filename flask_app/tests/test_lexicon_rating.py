@@ -0,0 +1,118 @@
+import pytest
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from flask_app.utils.lexicon_rating import (
+    LexiconRating,
+    TieredRating,
+    create_news_rater,
+)
+from flask_app.utils.news_rating import MAX_NEWS_COUNT, MAX_NEWS_LENGTH, NewsRating
+
+
+# ====================== TESTY LexiconRating ======================
+
+
+def test_lexicon_positive_and_negative_news():
+    rater = LexiconRating()
+    ratings = rater.rate_news_items(
+        [
+            "Nvidia shares surged after earnings beat and record profit.",
+            "Tesla shares plunged after a recall and a lawsuit over losses.",
+        ]
+    )
+    assert ratings[0] > 0
+    assert ratings[1] < 0
+
+
+def test_lexicon_rating_scale():
+    rater = LexiconRating()
+    ratings = rater.rate_news_items(["surge " * 200, "fraud " * 200, "the company"])
+    assert all(-10 <= value <= 10 for value in ratings.values())
+    assert ratings[2] == 0
+
+
+def test_lexicon_negation():
+    rater = LexiconRating()
+    ratings = rater.rate_news_items(["profit growth", "no profit no growth"])
+    assert ratings[0] > 0
+    assert ratings[1] < 0
+
+
+def test_lexicon_rate_news_json():
+    rater = LexiconRating()
+    rating, confidence = rater.rate_news_with_confidence(
+        json.dumps(["Apple stock rallied on strong growth.", "Apple beats estimates."])
+    )
+    assert rating > 0
+    assert 0 <= confidence <= 1
+    assert rater.rate_news(json.dumps(["Apple beats estimates."])) > 0
+
+
+def test_lexicon_uses_same_limits_as_llm():
+    # text za MAX_NEWS_LENGTH a zpravy za MAX_NEWS_COUNT se nehodnoti v zadnem rezimu
+    news = ["the company " * (MAX_NEWS_LENGTH // 12) + "surged"] + ["Shares rose."] * MAX_NEWS_COUNT
+    rater = LexiconRating()
+    ratings = rater.rate_news_articles(json.dumps(news))
+    assert sorted(ratings) == list(range(MAX_NEWS_COUNT))
+    assert ratings[0] == 0
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "test-key"}):
+        assert rater.process_news(json.dumps(news)) == NewsRating().process_news(json.dumps(news))
+
+
+def test_lexicon_empty_and_invalid_input():
+    rater = LexiconRating()
+    with pytest.raises(ValueError):
+        rater.rate_news(json.dumps([]))
+    with pytest.raises(ValueError):
+        rater.rate_news("not a json")
+
+
+# ====================== TESTY REŽIMŮ HODNOCENÍ ======================
+
+
+def test_create_news_rater_local_without_api_key():
+    with patch.dict(os.environ, {}, clear=True):
+        assert isinstance(create_news_rater("local"), LexiconRating)
+
+
+def test_create_news_rater_modes():
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "mock-key"}):
+        assert isinstance(create_news_rater("llm"), NewsRating)
+        assert isinstance(create_news_rater("local-then-llm"), TieredRating)
+        with pytest.raises(ValueError):
+            create_news_rater("unknown")
+
+
+def test_unknown_rating_mode_fails_at_startup():
+    # config se nacte v novem procesu, aby se nezmenil modul sdileny ostatnimi testy
+    result = subprocess.run(
+        [sys.executable, "-c", "import flask_app.config"],
+        env={**os.environ, "RATING_MODE": "unknown"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "RATING_MODE" in result.stderr
+
+
+def test_tiered_rating_keeps_confident_local_result():
+    rater = TieredRating(confidence_threshold=0.1)
+    with patch.object(NewsRating, "rate_news") as llm_rate:
+        rating = rater.rate_news(
+            json.dumps(["Shares surged on record profit and strong growth."])
+        )
+    assert rating > 0
+    llm_rate.assert_not_called()
+
+
+def test_tiered_rating_falls_back_to_llm():
+    rater = TieredRating(confidence_threshold=0.5)
+    with patch.dict(os.environ, {"OPEN_AI_API_KEY": "mock-key"}):
+        with patch.object(NewsRating, "rate_news", return_value=4.2) as llm_rate:
+            rating = rater.rate_news(json.dumps(["The company held a meeting."]))
+    assert rating == 4.2
+    llm_rate.assert_called_once()
@@ -0,0 +1,127 @@
+import pytest
+import os
+import time
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.maintenance import (
+    DAY_SECONDS,
+    archive_old_requests,
+    backfill_created_at,
+    compact_news_data,
+    incremental_vacuum,
+    read_archive,
+    run_maintenance,
+)
+
+
+@pytest.fixture
+def maintenance_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        db.session.query(RequestData).delete()
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.query(RequestData).delete()
+        db.session.commit()
+
+
+def _add_request(status="done", age_days=0.0, **kwargs):
+    with app.app_context():
+        new_request = RequestData(
+            status=status,
+            input_data=[{"name": "Apple"}],
+            news_data='[{"company": "Apple", "articles": []}]',
+            sentiment_data=[{"company_name": "Apple", "rating": 5.0}],
+            created_at=time.time() - age_days * DAY_SECONDS,
+            **kwargs,
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        return new_request.id
+
+
+# ====================== TESTY ÚDRŽBY DB ======================
+
+
+def test_compact_news_data_keeps_sentiment(maintenance_app):
+    old_id = _add_request(age_days=10)
+    new_id = _add_request(age_days=1)
+    pending_id = _add_request(status="pending", age_days=10)
+
+    with app.app_context():
+        compacted = compact_news_data(time.time() - 7 * DAY_SECONDS, batch_size=1, pause=0)
+        assert compacted == 1
+
+        old_request = db.session.get(RequestData, old_id)
+        assert old_request.news_data is None
+        assert old_request.sentiment_data == [{"company_name": "Apple", "rating": 5.0}]
+        assert db.session.get(RequestData, new_id).news_data is not None
+        assert db.session.get(RequestData, pending_id).news_data is not None
+
+
+def test_archive_old_requests(maintenance_app, tmp_path):
+    old_ids = [_add_request(age_days=100) for _ in range(3)]
+    processing_id = _add_request(status="processing", age_days=100)
+    recent_id = _add_request(age_days=1)
+
+    with app.app_context():
+        archived = archive_old_requests(
+            time.time() - 90 * DAY_SECONDS, archive_dir=str(tmp_path), batch_size=2, pause=0
+        )
+        assert archived == 3
+        for request_id in old_ids:
+            assert db.session.get(RequestData, request_id) is None
+        assert db.session.get(RequestData, processing_id) is not None
+        assert db.session.get(RequestData, recent_id) is not None
+
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2
+    assert all(name.endswith(".ndjson.gz") for name in files)
+    records = [record for name in files for record in read_archive(tmp_path / name)]
+    assert [record["id"] for record in records] == old_ids
+    assert records[0]["sentiment_data"] == [{"company_name": "Apple", "rating": 5.0}]
+
+
+def test_archive_keeps_rows_when_write_fails(maintenance_app, tmp_path):
+    request_id = _add_request(age_days=100)
+    blocked_dir = tmp_path / "file"
+    blocked_dir.write_text("not a directory")
+
+    with app.app_context():
+        with pytest.raises(OSError):
+            archive_old_requests(time.time(), archive_dir=str(blocked_dir), pause=0)
+        assert db.session.get(RequestData, request_id) is not None
+
+
+def test_backfill_created_at(maintenance_app):
+    request_id = _add_request()
+    with app.app_context():
+        db.session.get(RequestData, request_id).created_at = None
+        db.session.commit()
+
+        assert backfill_created_at(now=123.0) == 1
+        assert db.session.get(RequestData, request_id).created_at == 123.0
+
+
+def test_run_maintenance(maintenance_app, tmp_path):
+    _add_request(age_days=100)
+    compact_id = _add_request(age_days=10)
+
+    with app.app_context():
+        # ve vychozim nastaveni se nic nemaze ani nearchivuje
+        stats = run_maintenance(archive_dir=str(tmp_path))
+        assert stats.get("archived", 0) == 0 and stats.get("compacted", 0) == 0
+        assert db.session.get(RequestData, compact_id).news_data is not None
+
+        with patch("flask_app.maintenance.NEWS_DATA_RETENTION_DAYS", 7), patch(
+            "flask_app.maintenance.ARCHIVE_AFTER_DAYS", 90
+        ):
+            stats = run_maintenance(archive_dir=str(tmp_path))
+        assert stats["archived"] == 1
+        assert stats["compacted"] == 2  # zkrátí se i archivovaný záznam
+        assert db.session.get(RequestData, compact_id).news_data is None
+        assert incremental_vacuum(pages=0) == 0
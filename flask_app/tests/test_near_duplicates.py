@@ -0,0 +1,111 @@
+import pytest
+import json
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.tasks import process_request
+from flask_app.utils.article_cache import ARTICLE_DOWNLOADS
+from flask_app.utils.near_duplicates import (
+    cluster_near_duplicates,
+    expand_cluster_ratings,
+    hamming_distance,
+    simhash,
+    tokenize,
+)
+
+WIRE_STORY = (
+    "Acme Corporation reported quarterly revenue of 12 billion dollars on Tuesday, beating analyst "
+    "estimates as demand for its cloud services continued to grow. The company raised its full year "
+    "guidance and announced a new share buyback program worth 5 billion dollars, sending its shares "
+    "higher in after hours trading. Chief executive Jane Doe said the results reflected strong "
+    "execution across all business segments and continued investment in artificial intelligence."
+)
+REPUBLISHED = WIRE_STORY.replace("on Tuesday", "on Tuesday evening") + " (Reporting by Wire Desk)"
+OTHER_STORY = (
+    "Regulators opened an investigation into Acme Corporation over alleged accounting irregularities "
+    "in its hardware division, according to people familiar with the matter. The probe focuses on "
+    "revenue recognition practices between 2021 and 2023 and could lead to fines. Acme declined to "
+    "comment, and its shares fell sharply in early trading as investors weighed the legal risks."
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_article_cache():
+    ARTICLE_DOWNLOADS.clear()
+    yield
+    ARTICLE_DOWNLOADS.clear()
+
+
+# ====================== TESTY SIMHASH SHLUKOVÁNÍ ======================
+
+
+def test_simhash_distance_of_similar_texts():
+    original = simhash(tokenize(WIRE_STORY))
+    assert hamming_distance(original, simhash(tokenize(REPUBLISHED))) <= 10
+    assert hamming_distance(original, simhash(tokenize(OTHER_STORY))) > 10
+
+
+def test_cluster_near_duplicates():
+    texts = [WIRE_STORY, OTHER_STORY, REPUBLISHED, "Short note", "short note!", "Other note"]
+    clusters = cluster_near_duplicates(texts, max_distance=10)
+    # Zástupcem je nejdelší text shluku
+    assert sorted(clusters) == [[1], [2, 0], [4, 3], [5]]
+
+
+def test_cluster_near_duplicates_threshold():
+    texts = [WIRE_STORY, REPUBLISHED]
+    assert len(cluster_near_duplicates(texts, max_distance=64)) == 1
+    assert len(cluster_near_duplicates(texts, max_distance=-1)) == 2
+
+
+def test_expand_cluster_ratings():
+    clusters = [[2, 0], [1], [3]]
+    assert expand_cluster_ratings({0: 4.0, 2: -1.0}, clusters) == {0: 4.0, 2: 4.0, 3: -1.0}
+
+
+def test_process_request_rates_cluster_once():
+    with app.app_context():
+        db.create_all()
+        new_request = RequestData(
+            status="pending",
+            input_data=[{"name": "Acme", "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"}],
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+    articles = [
+        {"url": f"https://site{idx}.example/acme", "title": "Acme beats estimates", "source": {"name": "S"}}
+        for idx in range(3)
+    ] + [{"url": "https://news.example/probe", "title": "Acme probe", "source": {"name": "S"}}]
+    texts = {
+        "https://site0.example/acme": WIRE_STORY,
+        "https://site1.example/acme": REPUBLISHED,
+        "https://site2.example/acme": WIRE_STORY + " Copyright Wire.",
+        "https://news.example/probe": OTHER_STORY,
+    }
+    rated_texts = []
+
+    def rate(self, json_string, timeout=None):
+        rated_texts.extend(json.loads(json_string))
+        return {idx: 4.0 if "beats" in text else -2.0 for idx, text in enumerate(json.loads(json_string))}
+
+    with patch("flask_app.tasks.RATING_MODE", "local"), patch(
+        "flask_app.utils.near_duplicates.NEAR_DUPLICATE_MAX_DISTANCE", 10
+    ), patch(
+        "flask_app.tasks.newsapi.get_everything", return_value={"articles": articles}
+    ), patch(
+        "flask_app.tasks.download_article_text", side_effect=lambda url, timeout: f"Author\n\n{texts[url]}"
+    ), patch(
+        "flask_app.utils.lexicon_rating.LexiconRating.rate_news_articles", rate
+    ):
+        process_request(request_id, app)
+
+    assert len(rated_texts) == 2
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        # (3 * 4.0 - 2.0) / 4 - hodnocení zástupce s váhou velikosti shluku
+        assert request_data.sentiment_data[0]["rating"] == 2.5
+        stored = json.loads(request_data.news_data)["companies"][0]["articles"]
+    assert sum("duplicate_of" in article for article in stored) == 2
@@ -0,0 +1,189 @@
+import pytest
+import time
+from unittest.mock import patch
+
+from flask import render_template
+
+from flask_app.app import app, db
+from flask_app.models import PortfolioEvent, PortfolioState, PortfolioVersion
+from flask_app.portfolio import PortfolioStore, get_history
+
+COMPANIES = ["NVDA", "AAPL", "TSLA"]
+
+
+@pytest.fixture
+def portfolio_app():
+    app.config["TESTING"] = True
+
+    def clean():
+        with app.app_context():
+            db.create_all()
+            db.session.query(PortfolioState).delete()
+            db.session.query(PortfolioVersion).delete()
+            db.session.query(PortfolioEvent).delete()
+            db.session.commit()
+
+    clean()
+    yield app
+    clean()
+
+
+# ====================== TESTY SDÍLENÉHO PORTFOLIA ======================
+
+
+def test_portfolio_defaults(portfolio_app):
+    with app.app_context():
+        store = PortfolioStore(COMPANIES)
+        stocks = store.get_stocks()
+    assert [stock["company"] for stock in stocks] == COMPANIES
+    assert all(stock["status"] == "žádné změny" for stock in stocks)
+    assert all(stock["updated_at"] == "Nikdy" for stock in stocks)
+
+
+def test_portfolio_update_bumps_version(portfolio_app):
+    with app.app_context():
+        store = PortfolioStore(COMPANIES)
+        assert store.current_version() == 0
+        assert store.update([("NVDA", 1)]) == 1
+        assert store.update([("NVDA", 0), ("AAPL", 1)]) == 2
+
+        stocks = {stock["company"]: stock for stock in store.get_stocks()}
+    assert stocks["NVDA"]["status"] == "prodáno"
+    assert stocks["AAPL"]["status"] == "nakoupeno"
+    assert stocks["TSLA"]["status"] == "žádné změny"
+    assert stocks["NVDA"]["updated_at"] != "Nikdy"
+
+
+def test_portfolio_shared_between_processes(portfolio_app):
+    """Dvě instance simulují dva procesy webu se sdílenou DB."""
+    with app.app_context():
+        first = PortfolioStore(COMPANIES)
+        second = PortfolioStore(COMPANIES)
+        second.get_stocks()  # naplnění cache druhého procesu
+
+        first.update([("TSLA", 1)])
+        stocks = {stock["company"]: stock for stock in second.get_stocks()}
+    assert stocks["TSLA"]["status"] == "nakoupeno"
+
+
+def test_portfolio_cache_hit_skips_reload(portfolio_app):
+    with app.app_context():
+        store = PortfolioStore(COMPANIES)
+        store.update([("NVDA", 1)])
+        store.get_stocks()
+        with patch.object(store, "_load_stocks") as load:
+            store.get_stocks()
+            store.get_stocks()
+        load.assert_not_called()
+
+
+def test_ui_post_invalid_entry_is_not_applied(portfolio_app):
+    with app.test_client() as client:
+        response = client.post("/UI", json=[{"name": "NVDA", "status": 1}, "invalid"])
+        assert response.status_code == 400
+
+        response = client.get("/UI", headers={"Accept": "application/json"})
+    nvda = next(s for s in response.get_json()["stocks"] if s["company"] == "NVDA")
+    assert nvda["status"] == "žádné změny"
+
+
+def test_portfolio_view_built_once_per_version(portfolio_app):
+    builds = []
+
+    def build(stocks):
+        builds.append([stock["status"] for stock in stocks])
+        return len(builds)
+
+    with app.app_context():
+        store = PortfolioStore(COMPANIES)
+        other = PortfolioStore(COMPANIES)
+        assert store.get_view("html", build) == (0, 1)
+        assert store.get_view("html", build) == (0, 1)
+        assert store.get_view("json", build) == (0, 2)
+
+        store.update([("NVDA", 1)])
+        assert store.get_view("html", build) == (1, 3)
+        # zmena z jineho procesu se projevi pres cislo verze v DB
+        other.update([("AAPL", 0)])
+        assert store.get_view("html", build) == (2, 4)
+        assert store.get_view("html", build) == (2, 4)
+    assert builds[-1] == ["nakoupeno", "prodáno", "žádné změny"]
+
+
+def test_ui_etag_and_not_modified(portfolio_app):
+    json_headers = {"Accept": "application/json"}
+    with app.test_client() as client, patch(
+        "flask_app.app.render_template", wraps=render_template
+    ) as render:
+        first = client.get("/UI", headers=json_headers)
+        etag = first.headers["ETag"]
+        assert first.headers["Cache-Control"] == "no-cache"
+        assert "Accept" in first.headers["Vary"]
+
+        cached = client.get("/UI", headers={**json_headers, "If-None-Match": etag})
+        assert cached.status_code == 304 and cached.data == b""
+
+        html = client.get("/UI")
+        assert html.headers["ETag"] != etag
+        assert client.get("/UI").data == html.data
+        assert render.call_count == 1
+
+        client.post("/UI", json=[{"name": "NVDA", "status": 1}])
+        changed = client.get("/UI", headers={**json_headers, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    nvda = next(s for s in changed.get_json()["stocks"] if s["company"] == "NVDA")
+    assert nvda["status"] == "nakoupeno"
+
+
+# ====================== TESTY HISTORIE PORTFOLIA ======================
+
+
+def test_events_logged_in_order(portfolio_app):
+    with app.app_context():
+        store = PortfolioStore(COMPANIES)
+        store.update([("NVDA", 1), ("AAPL", 0), ("NVDA", 0)])
+
+        history = get_history()
+        stocks = {stock["company"]: stock for stock in store.get_stocks()}
+
+    assert history["aggregates"]["count"] == 3
+    assert history["aggregates"]["buy"] == 1
+    assert history["aggregates"]["sell"] == 2
+    assert history["aggregates"]["by_company"]["NVDA"]["count"] == 2
+    # Poslední změna v dávce určuje aktuální stav
+    assert stocks["NVDA"]["status"] == "prodáno"
+
+
+def test_history_time_range_and_last(portfolio_app):
+    with app.app_context():
+        store = PortfolioStore(COMPANIES)
+        with patch("flask_app.portfolio.time.time", return_value=1000.0):
+            store.update([("NVDA", 1)])
+        with patch("flask_app.portfolio.time.time", return_value=2000.0):
+            store.update([("NVDA", 0), ("TSLA", 1)])
+
+        assert get_history(until=1500)["aggregates"]["count"] == 1
+        assert get_history(since=1500, company="NVDA")["aggregates"]["count"] == 1
+
+        last = get_history(last=1)
+    assert len(last["events"]) == 1
+    assert last["events"][0]["timestamp"] == 2000.0
+    # Agregace se počítá za celé období, nejen za posledních N událostí
+    assert last["aggregates"]["count"] == 3
+
+
+def test_ui_history_endpoint(portfolio_app):
+    with app.test_client() as client:
+        client.post("/UI", json=[{"name": "NVDA", "status": 1}, {"name": "AAPL", "status": 0}])
+
+        today = time.strftime("%Y-%m-%d")
+        response = client.get(f"/UI/history?company=NVDA&from={today}&to={today}")
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["aggregates"]["count"] == 1
+        assert data["events"][0]["company"] == "NVDA"
+        assert data["events"][0]["status"] == "nakoupeno"
+
+        assert client.get("/UI/history?from=yesterday").status_code == 400
+        assert client.get("/UI/history?last=0").status_code == 400
+        assert client.get("/UI/history?company=XXX").status_code == 400
@@ -0,0 +1,116 @@
+import pytest
+import os
+import pstats
+from flask import Flask
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.profiling import (
+    init_profiling,
+    job_profile,
+    list_profiles,
+    profile_block,
+    profile_path,
+)
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    with patch("flask_app.profiling.PROFILE_DIR", str(tmp_path)):
+        yield str(tmp_path)
+
+
+def _busy():
+    return sum(i * i for i in range(1000))
+
+
+# ====================== TESTY PROFILOVÁNÍ ======================
+
+
+def test_profile_block_ring_is_bounded(profile_dir):
+    with patch("flask_app.profiling.PROFILE_MAX_FILES", 3):
+        for idx in range(5):
+            with profile_block("job", f"request-{idx}", profile_dir):
+                _busy()
+    profiles = list_profiles(profile_dir)
+    assert len(profiles) == 3
+    assert "request-4" in profiles[0]["name"]
+    stats = pstats.Stats(os.path.join(profile_dir, profiles[0]["name"]))
+    assert any(func[2] == "_busy" for func in stats.stats)
+
+
+def test_profile_block_disabled_and_errors(profile_dir):
+    with profile_block("job", "off", profile_dir, enabled=False):
+        _busy()
+    assert list_profiles(profile_dir) == []
+
+    with pytest.raises(RuntimeError):
+        with profile_block("job", "failing", profile_dir):
+            raise RuntimeError("boom")
+    assert len(list_profiles(profile_dir)) == 1
+
+
+def test_profile_path_rejects_traversal(profile_dir):
+    assert profile_path(profile_dir, "../database.db") is None
+    assert profile_path(profile_dir, "missing.prof") is None
+
+
+def test_job_profile_modes(profile_dir):
+    with app.app_context():
+        db.create_all()
+        flagged = RequestData(status="done", input_data=[], profile=True)
+        plain = RequestData(status="done", input_data=[])
+        db.session.add_all([flagged, plain])
+        db.session.commit()
+        flagged_id, plain_id = flagged.id, plain.id
+
+    with job_profile(flagged_id, app):
+        _busy()
+    assert list_profiles(profile_dir) == []  # PROFILING="off"
+
+    with patch("flask_app.profiling.PROFILING", "flag"):
+        for request_id in (flagged_id, plain_id):
+            with job_profile(request_id, app):
+                _busy()
+    names = [profile["name"] for profile in list_profiles(profile_dir)]
+    assert len(names) == 1 and f"request-{flagged_id}-" in names[0]
+
+
+def test_http_profiling_hooks(profile_dir):
+    test_app = Flask(__name__)
+    test_app.instance_path = profile_dir
+
+    @test_app.route("/slow")
+    def slow():
+        return str(_busy())
+
+    with patch("flask_app.profiling.PROFILING", "flag"), patch(
+        "flask_app.profiling.ADMIN_TOKEN", "secret"
+    ):
+        init_profiling(test_app)
+        client = test_app.test_client()
+        client.get("/slow?profile=1")
+        assert list_profiles(profile_dir) == []
+        client.get("/slow?profile=1", headers={"X-Admin-Token": "secret"})
+    assert "-http-slow-" in list_profiles(profile_dir)[0]["name"]
+
+
+def test_admin_profiles_endpoint(profile_dir):
+    with profile_block("job", "request-1", profile_dir):
+        _busy()
+    name = list_profiles(profile_dir)[0]["name"]
+    client = app.test_client()
+
+    assert client.get("/admin/profiles").status_code == 403
+    with patch("flask_app.profiling.ADMIN_TOKEN", "secret"):
+        headers = {"X-Admin-Token": "secret"}
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        listing = client.get("/admin/profiles", headers=headers).get_json()
+        assert listing["profiles"][0]["name"] == name
+
+        download = client.get(f"/admin/profiles/{name}", headers=headers)
+        assert download.status_code == 200 and len(download.data) > 0
+        text = client.get(f"/admin/profiles/{name}?format=text&limit=5", headers=headers)
+        assert "_busy" in text.get_data(as_text=True)
+        assert client.get("/admin/profiles/nope.prof", headers=headers).status_code == 404
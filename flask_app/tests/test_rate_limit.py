@@ -0,0 +1,121 @@
+import pytest
+from unittest.mock import MagicMock
+
+from flask_app.utils.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    backoff_delay,
+    call_with_retry,
+    get_retry_after,
+    is_retryable,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = MagicMock(status_code=status_code, headers=headers or {})
+
+
+# ====================== TESTY TOKEN BUCKET / LIMITERU ======================
+
+
+def test_token_bucket_waits_when_empty():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)  # 1 token za sekundu
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    clock.now += 10
+    assert bucket.reserve(1) == 0
+
+
+def test_rate_limiter_requests_and_tokens():
+    clock = FakeClock()
+    limiter = RateLimiter("test", 120, 600, clock=clock, sleep=clock.sleep)
+    limiter.acquire(tokens=600)
+    assert clock.now == 0
+    # Tokenů je málo -> čeká se na doplnění 300 tokenů (10 tokenů/s)
+    limiter.acquire(tokens=300)
+    assert clock.now == pytest.approx(30.0)
+
+
+def test_rate_limiter_pause_and_timeout():
+    clock = FakeClock()
+    limiter = RateLimiter("test", 0, clock=clock, sleep=clock.sleep)
+    limiter.pause(5)
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=1)
+    limiter.acquire()
+    assert clock.now == pytest.approx(5.0)
+
+
+def test_rate_limiter_timeout_refunds_reservation():
+    clock = FakeClock()
+    limiter = RateLimiter("test", 60, 600, clock=clock, sleep=clock.sleep)
+    limiter.acquire(tokens=600)
+    for _ in range(3):
+        with pytest.raises(TimeoutError):
+            limiter.acquire(tokens=300, timeout=1)
+    # neuspesne pokusy nic nespotrebovaly - po doplneni 300 tokenu (30 s) se neceka
+    clock.now += 30
+    limiter.acquire(tokens=300, timeout=0)
+    assert clock.now == pytest.approx(30.0)
+
+
+# ====================== TESTY OPAKOVÁNÍ ======================
+
+
+def test_retry_after_parsing():
+    assert get_retry_after(HTTPError(429, {"retry-after": "7"})) == 7.0
+    assert get_retry_after(HTTPError(429)) is None
+    assert get_retry_after(Exception("x")) is None
+
+
+def test_is_retryable():
+    assert is_retryable(HTTPError(429))
+    assert is_retryable(HTTPError(503))
+    assert not is_retryable(HTTPError(400))
+    assert not is_retryable(Exception("API error"))
+
+    newsapi_error = Exception("rate limited")
+    newsapi_error.get_code = lambda: "rateLimited"
+    assert is_retryable(newsapi_error)
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base_delay=1, max_delay=8) <= 8
+    assert backoff_delay(0, retry_after=10, base_delay=1) >= 10
+
+
+def test_call_with_retry_honors_retry_after():
+    delays = []
+    func = MagicMock(side_effect=[HTTPError(429, {"Retry-After": "3"}), "ok"])
+    assert call_with_retry(func, sleep=delays.append, max_attempts=3) == "ok"
+    assert func.call_count == 2
+    assert delays[0] >= 3
+
+
+def test_call_with_retry_does_not_retry_other_errors():
+    func = MagicMock(side_effect=ValueError("bad request"))
+    with pytest.raises(ValueError):
+        call_with_retry(func, sleep=lambda _: None)
+    assert func.call_count == 1
+
+
+def test_call_with_retry_gives_up():
+    func = MagicMock(side_effect=HTTPError(503))
+    with pytest.raises(HTTPError):
+        call_with_retry(func, sleep=lambda _: None, max_attempts=3)
+    assert func.call_count == 3
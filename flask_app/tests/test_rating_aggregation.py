@@ -0,0 +1,110 @@
+import pytest
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+
+from flask_app.app import app, db
+from flask_app.models import ArticleRating, CompanyDaySentiment
+from flask_app.daily_sentiment import load_article_ratings, period_rating
+from flask_app.utils.rating_aggregation import (
+    aggregate_ratings,
+    is_plain_mean,
+    parse_source_weights,
+    published_timestamp,
+)
+
+PLAIN = {"half_life_days": 0.0, "source_weights": {}, "trim": 0.0}
+
+
+@pytest.fixture
+def company():
+    key = f"agg-{uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        db.create_all()
+    yield key
+    with app.app_context():
+        db.session.query(ArticleRating).filter(ArticleRating.company == key).delete()
+        db.session.query(CompanyDaySentiment).filter(CompanyDaySentiment.company == key).delete()
+        db.session.commit()
+
+
+def _days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def _articles(specs):
+    return [
+        {"article_id": f"a{idx}", "publishedAt": f"{day}T12:00:00Z", "source": source, "content_source": "full"}
+        for idx, (day, source) in enumerate(specs)
+    ]
+
+
+# ====================== TESTY AGREGACE HODNOCENÍ ======================
+
+
+def test_aggregate_ratings_options():
+    ratings = [10.0, 0.0, -10.0, 4.0]
+    day = 86400.0
+    published = [10 * day, 9 * day, 8 * day, None]
+    sources = ["Reuters", "Blog", "Blog", "Reuters"]
+
+    assert aggregate_ratings(ratings) == 1.0
+    assert aggregate_ratings([]) is None
+    # orez odstrani nejnizsi a nejvyssi hodnoceni
+    assert aggregate_ratings(ratings, trim=0.25) == 2.0
+    # vaha zdroje (nazvy bez rozliseni velikosti pismen)
+    assert aggregate_ratings(ratings, sources=sources, source_weights={"reuters": 3}) == pytest.approx(
+        (30 + 0 - 10 + 12) / 8, abs=0.01
+    )
+    # polocas 1 den - den stary clanek ma polovicni vahu, clanek bez data se netlumi
+    expected = (10 * 1 + 0 * 0.5 + -10 * 0.25 + 4 * 1) / 2.75
+    assert aggregate_ratings(ratings, published, half_life_days=1) == pytest.approx(expected, abs=0.01)
+
+
+def test_aggregate_ratings_large_input_matches_mean():
+    rng = np.random.default_rng(0)
+    ratings = rng.uniform(-10, 10, 20000)
+    assert aggregate_ratings(ratings) == round(float(ratings.mean()), 2)
+
+
+def test_parse_source_weights_and_plain_mean():
+    assert parse_source_weights("Reuters=2, bloomberg = 1.5,") == {"reuters": 2.0, "bloomberg": 1.5}
+    assert parse_source_weights("") == {}
+    for invalid in ("Reuters", "Reuters=x", "Reuters=-1"):
+        with pytest.raises(ValueError):
+            parse_source_weights(invalid)
+    assert is_plain_mean(PLAIN)
+    assert is_plain_mean({**PLAIN, "source_weights": {"reuters": 1.0}})
+    assert not is_plain_mean({**PLAIN, "trim": 0.1})
+    assert published_timestamp("2025-03-01T00:00:00Z") == 1740787200.0
+    assert published_timestamp("Neznámé datum") is None
+
+
+def test_period_rating_stores_articles_and_recomputes_views(company):
+    days = [_days_ago(3), _days_ago(2)]
+    plan = {"key": company, "days": days, "cached": {}, "missing": days}
+    articles = _articles([(days[0], "Blog"), (days[1], "Reuters"), (days[1], "Reuters")])
+    ratings = {0: -10.0, 1: 5.0, 2: 8.0}
+
+    with app.app_context():
+        assert period_rating(plan, "llm", articles, ratings, options=PLAIN) == 1.0
+        stored = load_article_ratings(company, "llm", days[0], days[1])
+        assert sorted(stored["ratings"]) == [-10.0, 5.0, 8.0]
+
+        # stejne ulozene dny, jina agregace - pocita se z ulozenych hodnoceni clanku
+        plan = {"key": company, "days": days, "cached": {}, "missing": days}
+        weighted = period_rating(
+            plan, "llm", articles, ratings, options={**PLAIN, "source_weights": {"blog": 0.0}}
+        )
+        assert weighted == 6.5
+
+    client = app.test_client()
+    response = client.get(f"/ratings/{company}?mode=llm&weights=Blog=0&from={days[0]}&to={days[1]}")
+    data = response.get_json()
+    assert data["count"] == 3 and data["mean"] == 1.0 and data["rating"] == 6.5
+
+    response = client.get(f"/ratings/{company}?mode=llm&trim=0.34")
+    assert response.get_json()["rating"] == 5.0
+    assert client.get(f"/ratings/{company}?trim=0.9").status_code == 400
+    assert client.get(f"/ratings/{company}?from=20250301").status_code == 400
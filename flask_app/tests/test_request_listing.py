@@ -0,0 +1,96 @@
+import pytest
+import time
+
+from sqlalchemy import text, update
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.request_listing import decode_cursor, encode_cursor, list_requests
+
+# Vlastní časové okno testu - DB sdílí i ostatní testy
+BASE = 4_000_000_000.0
+
+
+@pytest.fixture
+def listed():
+    with app.app_context():
+        db.create_all()
+        rows = [
+            RequestData(
+                status=("pending", "processing", "done")[idx % 3],
+                input_data=[],
+                # dvojice se stejným časem - stránkování musí rozlišit podle id
+                created_at=BASE + idx // 2,
+            )
+            for idx in range(25)
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = [row.id for row in rows]
+    yield ids
+    with app.app_context():
+        db.session.query(RequestData).filter(RequestData.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def _pages(client, query):
+    seen, cursor = [], None
+    while True:
+        url = f"/output?from={BASE}&{query}" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).get_json()
+        seen += page["requests"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen
+
+
+# ====================== TESTY VÝPISU POŽADAVKŮ ======================
+
+
+def test_list_requests_keyset_pages(listed):
+    client = app.test_client()
+    seen = _pages(client, "limit=4")
+    assert [item["request_id"] for item in seen] == sorted(listed, reverse=True)
+
+    pending = _pages(client, "status=pending,done&limit=3")
+    assert {item["status"] for item in pending} == {"pending", "done"}
+    assert len(pending) == 17
+
+    ranged = _pages(client, f"to={BASE + 2}&limit=100")
+    assert sorted(item["request_id"] for item in ranged) == sorted(listed[:6])
+    assert "input_data" not in ranged[0]
+
+
+def test_updated_at_changes_on_update(listed):
+    with app.app_context():
+        before = db.session.get(RequestData, listed[0]).updated_at
+        time.sleep(0.01)
+        db.session.execute(update(RequestData).where(RequestData.id == listed[0]).values(status="error"))
+        db.session.commit()
+        request_data = db.session.get(RequestData, listed[0])
+        assert request_data.updated_at > before
+
+        page = list_requests(statuses=["error"], sort="updated", since=before, limit=5)
+    assert listed[0] in [item["request_id"] for item in page["requests"]]
+
+
+def test_list_requests_uses_index(listed):
+    with app.app_context():
+        plan = db.session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM request_data WHERE status = 'pending' "
+                "AND created_at IS NOT NULL AND created_at <= :v AND (created_at < :v OR (created_at = :v AND id < :i)) "
+                "ORDER BY created_at DESC, id DESC LIMIT 51"
+            ),
+            {"v": BASE + 5, "i": 10},
+        ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_request_data_status_created" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_list_requests_invalid_parameters(listed):
+    client = app.test_client()
+    for query in ("status=unknown", "sort=name", "limit=0", "cursor=@@@", "from=yesterday"):
+        assert client.get(f"/output?{query}").status_code == 400
+    assert decode_cursor(encode_cursor(BASE + 0.5, 42)) == (BASE + 0.5, 42)
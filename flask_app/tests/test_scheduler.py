@@ -0,0 +1,170 @@
+import pytest
+import threading
+import time
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.job_queue import claim_job
+from flask_app.scheduler import (
+    JobScheduler,
+    effective_class,
+    get_queue_stats,
+    order_jobs,
+    parse_priority,
+)
+
+
+@pytest.fixture
+def queue_app():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        db.session.query(RequestData).delete()
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.query(RequestData).delete()
+        db.session.commit()
+
+
+def _job(job_id, priority=1, client_key="a", cost=10, created_at=None):
+    return {
+        "id": job_id,
+        "priority": priority,
+        "client_key": client_key,
+        "cost": cost,
+        "created_at": time.time() if created_at is None else created_at,
+    }
+
+
+# ====================== TESTY PLÁNOVACÍ POLITIKY ======================
+
+
+def test_parse_priority():
+    assert parse_priority(None) == 1
+    assert parse_priority("HIGH") == 0
+    assert parse_priority("low") == 2
+    with pytest.raises(ValueError):
+        parse_priority("urgent")
+
+
+def test_effective_class_boosts_small_and_old_jobs():
+    now = time.time()
+    assert effective_class(_job(1, priority=2, cost=50, created_at=now), now) == 2
+    assert effective_class(_job(2, priority=2, cost=1, created_at=now), now) == 1
+    assert effective_class(_job(3, priority=2, cost=50, created_at=now - 150), now) == 0
+
+
+def test_order_jobs_priority_and_fair_share():
+    now = time.time()
+    jobs = [
+        _job(1, priority=1, client_key="big", cost=50, created_at=now - 2),
+        _job(2, priority=1, client_key="big", cost=50, created_at=now - 1),
+        _job(3, priority=1, client_key="small", cost=50, created_at=now),
+        _job(4, priority=0, client_key="vip", cost=50, created_at=now),
+    ]
+    order = [job["id"] for job in order_jobs(jobs, {"big": 1}, now)]
+    # vip má vyšší třídu, klient "big" už jednu úlohu zpracovává a jde až na konec
+    assert order == [4, 3, 1, 2]
+
+
+# ====================== TESTY PLÁNOVAČE VE VLÁKNECH ======================
+
+
+def test_job_scheduler_runs_in_priority_order():
+    started = []
+    release = threading.Event()
+
+    def runner(request_id, app):
+        started.append(request_id)
+        if request_id == 1:
+            release.wait(5)
+
+    scheduler = JobScheduler(app, runner=runner, concurrency=1)
+    scheduler.submit(_job(1, client_key="big"))
+    while not started:
+        time.sleep(0.01)
+
+    scheduler.submit(_job(2, client_key="big", cost=50))
+    scheduler.submit(_job(3, client_key="other", cost=50, priority=2))
+    scheduler.submit(_job(4, client_key="other", cost=1))
+
+    stats = scheduler.stats()
+    assert stats["running"] == 1
+    assert stats["queued"] == 3
+    assert stats["clients"]["other"] == {"queued": 2, "running": 0}
+
+    release.set()
+    deadline = time.time() + 5
+    while len(started) < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert started == [1, 4, 2, 3]
+
+    deadline = time.time() + 5
+    while scheduler.stats()["running"] and time.time() < deadline:
+        time.sleep(0.01)
+    stats = scheduler.stats()
+    assert stats["classes"]["normal"]["completed"] == 3
+    assert stats["classes"]["low"]["started"] == 1
+    assert stats["classes"]["low"]["avg_wait_seconds"] >= 0
+
+
+# ====================== TESTY PLÁNOVÁNÍ V DB FRONTĚ ======================
+
+
+def _add_request(**kwargs):
+    with app.app_context():
+        new_request = RequestData(status="pending", input_data=[], **kwargs)
+        db.session.add(new_request)
+        db.session.commit()
+        return new_request.id
+
+
+def test_claim_job_uses_scheduler(queue_app):
+    low_id = _add_request(priority=2, client_key="a", cost=10)
+    high_id = _add_request(priority=0, client_key="b", cost=10)
+
+    with app.app_context():
+        assert claim_job("worker-1") == high_id
+        assert claim_job("worker-1") == low_id
+        assert db.session.get(RequestData, high_id).started_at is not None
+
+
+def test_queue_stats_endpoint(queue_app):
+    _add_request(priority=0)
+    _add_request(priority=2)
+    _add_request(priority=2, started_at=time.time(), created_at=time.time() - 4)
+
+    with app.app_context():
+        stats = get_queue_stats()
+    assert stats["classes"]["high"]["pending"] == 1
+    assert stats["classes"]["low"]["pending"] == 2
+    assert 3.9 < stats["classes"]["low"]["avg_wait_seconds"] < 4.1
+
+    response = app.test_client().get("/queue/stats")
+    assert response.status_code == 200
+    assert "classes" in response.get_json()["db"]
+
+
+def test_submit_invalid_priority(queue_app):
+    data = [{"name": "Apple", "from": "2025-03-01", "to": "2025-03-05"}]
+    response = app.test_client().post("/submit?priority=urgent", json=data)
+    assert response.status_code == 400
+
+
+def test_submit_stores_priority_and_client(queue_app):
+    data = [{"name": "Apple", "from": "2025-03-01", "to": "2025-03-05"}]
+    with patch("flask_app.app.scheduler.submit") as submit:
+        response = app.test_client().post(
+            "/submit?priority=low", json=data, headers={"X-Client-Key": "client-1"}
+        )
+    request_id = response.get_json()["request_id"]
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        assert (request_data.priority, request_data.client_key, request_data.cost) == (
+            2,
+            "client-1",
+            1,
+        )
+    submit.assert_called_once()
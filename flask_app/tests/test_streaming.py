@@ -0,0 +1,110 @@
+import pytest
+import json
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.database import CompressedJSON, CompressedJSONWriter
+from flask_app.tasks import process_request
+from flask_app.utils.article_cache import ARTICLE_DOWNLOADS, SharedArticlesWriter, split_shared_articles
+from flask_app.utils.memory import current_rss_bytes, memory_limit_exceeded
+
+
+@pytest.fixture(autouse=True)
+def clear_article_cache():
+    ARTICLE_DOWNLOADS.clear()
+    yield
+    ARTICLE_DOWNLOADS.clear()
+
+
+def _stored(value):
+    column = CompressedJSON()
+    return column.process_result_value(column.process_bind_param(value, None), None)
+
+
+def _run(companies, streaming=True):
+    with app.app_context():
+        db.create_all()
+        new_request = RequestData(
+            status="pending",
+            input_data=[
+                {"name": name, "from": "2025-03-01T00:00:00", "to": "2025-03-02T00:00:00"}
+                for name in companies
+            ],
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        request_id = new_request.id
+
+    def get_everything(q, **kwargs):
+        return {
+            "articles": [
+                {"url": f"https://example.com/{q}/{idx}", "title": f"{q} shares surged", "source": {"name": "S"}}
+                for idx in range(3)
+            ]
+            + [{"url": "https://example.com/shared", "title": "Market rally", "source": {"name": "S"}}]
+        }
+
+    with patch("flask_app.tasks.PROCESS_STREAMING", streaming), patch(
+        "flask_app.tasks.RATING_MODE", "local"
+    ), patch("flask_app.tasks.newsapi.get_everything", side_effect=get_everything), patch(
+        "flask_app.tasks.download_article_text", return_value="Author\n\nStrong growth and record profit."
+    ):
+        process_request(request_id, app)
+
+    with app.app_context():
+        request_data = db.session.get(RequestData, request_id)
+        return request_data.sentiment_data, json.loads(request_data.news_data)
+
+
+# ====================== TESTY STREAMOVANÉHO ZPRACOVÁNÍ ======================
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+def test_compressed_json_writer(codec):
+    writer = CompressedJSONWriter(codec=codec)
+    for fragment in ['{"items":[', '"žluťoučký"', ",", json.dumps({"a": 1}), "]}"]:
+        writer.write(fragment)
+    assert _stored(writer.finish()) == {"items": ["žluťoučký", {"a": 1}]}
+
+
+def test_shared_articles_writer_matches_split():
+    results = [
+        {"company": "A", "articles": [{"article_id": "1", "url": "https://x.cz/1", "content": "Č" * 100000}]},
+        {"company": "B", "error": "Chyba"},
+        {"company": "C", "articles": [{"article_id": "1", "url": "https://x.cz/1", "content": "Č" * 100000}]},
+    ]
+    writer = SharedArticlesWriter()
+    for result in results:
+        writer.add(result)
+    value = writer.finish()
+    assert json.loads(_stored(value)) == split_shared_articles(results)
+    assert len(value) < 10000
+
+
+def test_streaming_and_batch_modes_match():
+    streamed = _run(["Alpha", "Beta"], streaming=True)
+    ARTICLE_DOWNLOADS.clear()
+    batched = _run(["Alpha", "Beta"], streaming=False)
+    assert streamed[0] == batched[0]
+    assert streamed[0][0]["rating"] is not None
+    assert streamed[1] == batched[1]
+    assert len(streamed[1]["articles"]) == 7
+
+
+def test_memory_limit_skips_companies():
+    assert current_rss_bytes() > 0
+    assert not memory_limit_exceeded(0)
+    with patch("flask_app.utils.memory.PROCESS_MEMORY_LIMIT_MB", 1):
+        sentiment, news_data = _run(["Gamma"])
+    assert sentiment == [{"company_name": "Gamma", "rating": None}]
+    assert news_data["companies"] == [{"company": "Gamma", "error": "Překročen limit paměti"}]
+
+
+def test_memory_limit_without_resource_module():
+    # Windows - bez /proc ani modulu resource se limit neuplatni
+    with patch("flask_app.utils.memory.resource", None), patch(
+        "flask_app.utils.memory.open", side_effect=OSError, create=True
+    ):
+        assert current_rss_bytes() is None
+        assert not memory_limit_exceeded(1)
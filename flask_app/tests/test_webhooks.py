@@ -0,0 +1,189 @@
+import pytest
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+from flask_app.app import app, db
+from flask_app.models import RequestData
+from flask_app.webhooks import dispatch_webhooks, group_deliveries, validate_callback_url
+
+
+class Receiver:
+    """Lokální HTTP server, který zaznamenává přijaté webhooky."""
+
+    def __init__(self, fail_times=0):
+        self.received = []
+        self.fail_times = fail_times
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if receiver.fail_times > 0:
+                    receiver.fail_times -= 1
+                    self.send_response(503)
+                else:
+                    receiver.received.append(json.loads(body))
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook_app():
+    app.config["TESTING"] = True
+    # prijemce testu bezi na 127.0.0.1
+    allow_private = patch("flask_app.webhooks.WEBHOOK_ALLOW_PRIVATE", True)
+    allow_private.start()
+    with app.app_context():
+        db.create_all()
+        db.session.query(RequestData).delete()
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.query(RequestData).delete()
+        db.session.commit()
+    allow_private.stop()
+
+
+def _add_request(callback_url, status="done"):
+    with app.app_context():
+        new_request = RequestData(
+            status=status,
+            input_data=[],
+            sentiment_data=[{"company_name": "Apple", "rating": 3.0}],
+            callback_url=callback_url,
+            callback_state="pending",
+        )
+        db.session.add(new_request)
+        db.session.commit()
+        return new_request.id
+
+
+# ====================== TESTY WEBHOOKŮ ======================
+
+
+def test_validate_callback_url():
+    assert validate_callback_url(" https://93.184.215.14/hook ") == "https://93.184.215.14/hook"
+    for url in ["ftp://example.com", "/relative", "", "https://" + "a" * 3000]:
+        with pytest.raises(ValueError):
+            validate_callback_url(url)
+
+
+def test_validate_callback_url_rejects_private_targets():
+    for url in [
+        "http://127.0.0.1:8000/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://10.0.0.5/hook",
+        "http://192.168.1.1/hook",
+        "http://[::1]/hook",
+        "http://[::ffff:127.0.0.1]/hook",
+        "http://0.0.0.0/hook",
+    ]:
+        with pytest.raises(ValueError):
+            validate_callback_url(url)
+
+    # host se prelozi - rozhoduji vsechny jeho adresy
+    def resolve(addresses):
+        return lambda *args, **kwargs: [(None, None, None, "", (address, 80)) for address in addresses]
+
+    with patch("flask_app.webhooks.socket.getaddrinfo", resolve(["93.184.215.14"])):
+        assert validate_callback_url("https://hooks.example.com/x") == "https://hooks.example.com/x"
+    with patch("flask_app.webhooks.socket.getaddrinfo", resolve(["93.184.215.14", "10.1.2.3"])):
+        with pytest.raises(ValueError):
+            validate_callback_url("https://internal.example.com/x")
+    with patch("flask_app.webhooks.socket.getaddrinfo", side_effect=socket.gaierror):
+        with pytest.raises(ValueError):
+            validate_callback_url("https://missing.example.com/x")
+
+    with patch("flask_app.webhooks.WEBHOOK_ALLOW_PRIVATE", True):
+        assert validate_callback_url("http://127.0.0.1:8000/hook") == "http://127.0.0.1:8000/hook"
+
+
+def test_group_deliveries():
+    deliveries = [{"url": "a"}, {"url": "b"}, {"url": "a"}, {"url": "a"}]
+    batches = group_deliveries(deliveries, batch_size=2)
+    assert [(url, len(items)) for url, items in batches] == [("a", 2), ("a", 1), ("b", 1)]
+
+
+def test_dispatch_batches_results_to_receiver(webhook_app):
+    receiver = Receiver()
+    try:
+        first = _add_request(receiver.url)
+        second = _add_request(receiver.url)
+        running = _add_request(receiver.url, status="processing")
+
+        with app.app_context(), ThreadPoolExecutor(max_workers=2) as executor:
+            stats = dispatch_webhooks(executor)
+            assert stats == {"claimed": 2, "delivered": 2, "retried": 0, "failed": 0}
+            assert db.session.get(RequestData, first).callback_state == "delivered"
+            assert db.session.get(RequestData, running).callback_state == "pending"
+            # Doručené se znovu neposílají
+            assert dispatch_webhooks(executor)["claimed"] == 0
+    finally:
+        receiver.close()
+
+    assert len(receiver.received) == 1
+    results = receiver.received[0]["results"]
+    assert [result["request_id"] for result in results] == [first, second]
+    assert results[0]["sentiment_data"] == [{"company_name": "Apple", "rating": 3.0}]
+
+
+def test_dispatch_retries_with_backoff(webhook_app):
+    receiver = Receiver(fail_times=1)
+    try:
+        request_id = _add_request(receiver.url)
+        with app.app_context(), ThreadPoolExecutor(max_workers=1) as executor:
+            assert dispatch_webhooks(executor)["retried"] == 1
+            request_data = db.session.get(RequestData, request_id)
+            assert (request_data.callback_state, request_data.callback_attempts) == ("pending", 1)
+
+            # Další pokus až po uplynutí backoffu
+            stats = dispatch_webhooks(executor, now=request_data.callback_next_at + 1)
+            assert stats["delivered"] == 1
+    finally:
+        receiver.close()
+    assert len(receiver.received) == 1
+
+
+def test_dispatch_marks_failed_after_max_attempts(webhook_app):
+    request_id = _add_request("http://127.0.0.1:9/unreachable")
+
+    def failing_post(url, items):
+        raise ConnectionError("refused")
+
+    with app.app_context(), ThreadPoolExecutor(max_workers=1) as executor, patch(
+        "flask_app.webhooks.WEBHOOK_MAX_ATTEMPTS", 1
+    ):
+        assert dispatch_webhooks(executor, post=failing_post)["failed"] == 1
+        assert db.session.get(RequestData, request_id).callback_state == "failed"
+
+
+def test_submit_with_callback(webhook_app):
+    data = [{"name": "Apple", "from": "2025-03-01", "to": "2025-03-05"}]
+    client = app.test_client()
+    assert client.post("/submit?callback=ftp://x", json=data).status_code == 400
+    with patch("flask_app.webhooks.WEBHOOK_ALLOW_PRIVATE", False):
+        response = client.post("/submit?callback=http://169.254.169.254/latest", json=data)
+    assert response.status_code == 400
+
+    with patch("flask_app.app.scheduler.submit"), patch("flask_app.app.webhooks.start") as start:
+        response = client.post("/submit?callback=http://127.0.0.1:8000/hook", json=data)
+    start.assert_called_once()
+    with app.app_context():
+        request_data = db.session.get(RequestData, response.get_json()["request_id"])
+        assert request_data.callback_url == "http://127.0.0.1:8000/hook"
+        assert request_data.callback_state == "pending"
@@ -0,0 +1,289 @@
+import codecs
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from flask_app.database import CompressedJSONWriter, CompressedValue
+from flask_app.config import (
+    ARTICLE_DOWNLOAD_WORKERS,
+    ARTICLE_CACHE_SIZE,
+    ARTICLE_CACHE_SECONDS,
+)
+
+# Parametry URL, které nemění obsah článku (sledování kampaní, sdílení)
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "cmpid",
+    "ocid",
+    "ref",
+    "ref_src",
+    "smid",
+    "guccounter",
+    "guce_referrer",
+    "guce_referrer_sig",
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Převede URL článku na kanonický tvar, aby stejný článek měl vždy stejnou identitu.
+
+    - schéma a doména malými písmeny, bez "www.", http -> https, bez výchozího portu
+    - bez fragmentu (#...), sledovacích parametrů (utm_*, fbclid, ...) a koncového lomítka
+    - zbylé parametry seřazené podle názvu
+
+    Args:
+        url (str): URL článku z NewsAPI
+
+    Returns:
+        str: Normalizovaná URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+        )
+    )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def article_id(url: str) -> str:
+    """Krátký identifikátor článku odvozený z normalizované URL."""
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()[:16]
+
+
+class SharedArticleDownloads:
+    """
+    Sdílené stahování článků pro všechny úlohy procesu.
+
+    Každý článek (podle normalizované URL) se stahuje nejvýše jednou - úlohy, které ho chtějí
+    současně, dostanou stejný Future. Úspěšně stažené texty se drží v LRU cache
+    (ARTICLE_CACHE_SIZE článků po dobu ARTICLE_CACHE_SECONDS), chybové výsledky se necachují.
+    Stahování, o které už žádná úloha nestojí (vypršel deadline), se zruší, pokud ještě nezačalo.
+
+    # Navod k pouziti teto tridy.
+
+    1. Pro kazdy clanek si vyzadej Future s textem.
+        key, future = ARTICLE_DOWNLOADS.acquire(url, download_article_text, timeout=7)
+
+    2. Po skonceni (i predcasnem) clanek uvolni.
+        ARTICLE_DOWNLOADS.release(key, future)
+    """
+
+    def __init__(
+        self,
+        workers: int = ARTICLE_DOWNLOAD_WORKERS,
+        cache_size: int = ARTICLE_CACHE_SIZE,
+        cache_seconds: float = ARTICLE_CACHE_SECONDS,
+        is_error: Callable[[str], bool] = lambda text: text.startswith("[ERROR]"),
+    ):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="article-download"
+        )
+        self.cache_size = cache_size
+        self.cache_seconds = cache_seconds
+        self.is_error = is_error
+        # RLock - callback hotového Future se může zavolat hned při add_done_callback
+        self.lock = threading.RLock()
+        self.cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.in_flight: Dict[str, Future] = {}
+        self.waiters: Dict[str, int] = {}
+
+    def _cached(self, key: str):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        text, stored_at = entry
+        if time.monotonic() - stored_at > self.cache_seconds:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return text
+
+    def _store(self, key: str, future: Future) -> None:
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+                self.waiters.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            text = future.result()
+            if self.cache_size <= 0 or self.is_error(text):
+                return
+            self.cache[key] = (text, time.monotonic())
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def acquire(self, url: str, download: Callable[[str, float], str], timeout: float):
+        """
+        Vrátí Future s textem článku - z cache, z již běžícího stahování, nebo spustí nové.
+
+        Args:
+            url (str): URL článku
+            download (Callable): Funkce download(url, timeout) -> text
+            timeout (float): Timeout HTTP požadavku
+
+        Returns:
+            Tuple[str, Future]: (identifikátor článku, Future s textem)
+        """
+        key = article_id(url)
+        with self.lock:
+            text = self._cached(key)
+            if text is not None:
+                future = Future()
+                future.set_result(text)
+                return key, future
+
+            future = self.in_flight.get(key)
+            if future is None:
+                future = self.executor.submit(download, url, timeout)
+                self.in_flight[key] = future
+                future.add_done_callback(lambda done, key=key: self._store(key, done))
+            self.waiters[key] = self.waiters.get(key, 0) + 1
+            return key, future
+
+    def release(self, key: str, future: Future) -> None:
+        """Úloha už článek nepotřebuje - pokud o něj nikdo nestojí, nezačaté stahování se zruší."""
+        with self.lock:
+            if self.in_flight.get(key) is not future:
+                return  # článek z cache nebo už dokončené stahování
+            self.waiters[key] = self.waiters.get(key, 0) - 1
+            if self.waiters[key] > 0:
+                return
+            del self.waiters[key]
+        if future.cancel():
+            with self.lock:
+                if self.in_flight.get(key) is future:
+                    del self.in_flight[key]
+
+    def clear(self) -> None:
+        """Vyprázdní cache stažených článků."""
+        with self.lock:
+            self.cache.clear()
+
+
+ARTICLE_DOWNLOADS = SharedArticleDownloads()
+
+
+def split_shared_articles(results: List[Dict]) -> Dict:
+    """
+    Připraví výsledky požadavku k uložení - text každého článku se uloží jen jednou
+    a výsledky jednotlivých společností na něj odkazují přes article_id.
+
+    Args:
+        results (List[Dict]): Výsledky process_request (společnosti s články včetně textů)
+
+    Returns:
+        Dict: {"companies": výsledky bez textů, "articles": {article_id: {"url", "content"}}}
+    """
+    shared = {}
+    companies = []
+    for result in results:
+        if "articles" not in result:
+            companies.append(result)
+            continue
+        articles = []
+        for article in result["articles"]:
+            article = dict(article)
+            content = article.pop("content", None)
+            key = article.get("article_id") or article_id(article.get("url", ""))
+            article["article_id"] = key
+            shared.setdefault(key, {"url": normalize_url(article.get("url", "")), "content": content})
+            articles.append(article)
+        companies.append({**result, "articles": articles})
+    return {"companies": companies, "articles": shared}
+
+
+class SharedArticlesWriter:
+    """
+    Postupné sestavení news_data (stejný obsah jako json.dumps(split_shared_articles(results)))
+    po jednotlivých společnostech - výsledky společnosti se hned zkomprimují a texty článků
+    lze po add() uvolnit.
+
+    Texty článků se zapisují rovnou do výsledné hodnoty, výsledky společností (bez textů)
+    do zvláštního komprimovaného bufferu, který se na konci připojí.
+
+    # Navod k pouziti teto tridy.
+
+    1. Po zpracovani kazde spolecnosti pridej jeji vysledek.
+        writer = SharedArticlesWriter()
+        writer.add({"company": "Apple", "articles": [...]})
+
+    2. Hotovou hodnotu prirad do news_data.
+        request_data.news_data = writer.finish()
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self):
+        self.writer = CompressedJSONWriter()
+        self.companies = zlib.compressobj()
+        self.companies_chunks = []
+        self.companies_count = 0
+        self.article_ids = set()
+        # news_data se ukládá jako JSON řetězec - celý obsah je jeden JSON string literal
+        self.writer.write('"')
+        self._write('{"articles":{')
+
+    def _write(self, text: str) -> None:
+        self.writer.write(json.dumps(text, ensure_ascii=False)[1:-1])
+
+    def add(self, result: Dict) -> None:
+        """Přidá výsledek jedné společnosti (viz fetch_company_articles)."""
+        shared = split_shared_articles([result])
+        for key, article in shared["articles"].items():
+            if key in self.article_ids:
+                continue
+            separator = "," if self.article_ids else ""
+            self.article_ids.add(key)
+            self._write(f"{separator}{json.dumps(key)}:{json.dumps(article)}")
+
+        separator = "," if self.companies_count else ""
+        self.companies_count += 1
+        chunk = self.companies.compress(
+            f"{separator}{json.dumps(shared['companies'][0])}".encode("utf-8")
+        )
+        if chunk:
+            self.companies_chunks.append(chunk)
+
+    def finish(self) -> CompressedValue:
+        """Dokončí hodnotu news_data (hodnota pro sloupec CompressedJSON)."""
+        self._write('},"companies":[')
+        self.companies_chunks.append(self.companies.flush())
+        decompressor = zlib.decompressobj()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in self.companies_chunks:
+            data = decompressor.decompress(chunk, self.CHUNK_SIZE)
+            while data:
+                self._write(decoder.decode(data))
+                data = decompressor.decompress(decompressor.unconsumed_tail, self.CHUNK_SIZE)
+        self._write(decoder.decode(b"", final=True))
+        self.companies_chunks = []
+        self._write("]}")
+        self.writer.write('"')
+        return self.writer.finish()
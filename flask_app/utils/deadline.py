@@ -0,0 +1,68 @@
+import time
+from typing import Callable, Optional
+
+
+class Deadline:
+    """
+    Časový rozpočet jednoho požadavku, který se předává do všech fází zpracování.
+    Kromě vypršení času hlídá i požadavek na zrušení (callback cancel_check, typicky dotaz do DB),
+    ten se ale volá nejvýše jednou za `check_interval` sekund.
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor deadline s absolutnim casem konce (unix timestamp).
+        deadline = Deadline(time.time() + 300, cancel_check=lambda: is_cancelled(request_id))
+
+    2. Pred kazdou fazi zkontroluj, zda se ma pokracovat.
+        if deadline.should_stop(): ...
+
+    3. Timeouty jednotlivych volani omez zbyvajicim casem.
+        article.download(timeout=deadline.timeout(7))
+    """
+
+    def __init__(
+        self,
+        expires_at: Optional[float],
+        cancel_check: Optional[Callable[[], bool]] = None,
+        check_interval: float = 1.0,
+    ):
+        self.expires_at = expires_at
+        self.cancel_check = cancel_check
+        self.check_interval = check_interval
+        self._cancelled = False
+        self._checked_at = None
+
+    def remaining(self) -> float:
+        """Vrátí zbývající čas v sekundách (nekonečno, pokud deadline není nastaven)."""
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cancelled(self) -> bool:
+        """Zjistí, zda byl požadavek zrušen (výsledek kontroly se drží check_interval sekund)."""
+        if self._cancelled or self.cancel_check is None:
+            return self._cancelled
+
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                self._cancelled = bool(self.cancel_check())
+            except Exception as e:
+                print(f"[ERROR] Kontrola zrušení požadavku selhala: {e}")
+        return self._cancelled
+
+    def should_stop(self) -> bool:
+        """True, pokud vypršel čas nebo byl požadavek zrušen."""
+        return self.expired() or self.cancelled()
+
+    def reason(self) -> str:
+        """Text důvodu přerušení pro výsledky požadavku."""
+        return "Request cancelled" if self._cancelled else "Deadline exceeded"
+
+    def timeout(self, default: float) -> float:
+        """Vrátí timeout pro jedno volání - menší z výchozí hodnoty a zbývajícího času."""
+        return min(default, self.remaining())
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from flask_app.utils.article_cache import normalize_url
+from flask_app.config import (
+    DOMAIN_BREAKER_FAILURES,
+    DOMAIN_BREAKER_COOLDOWN_SECONDS,
+    DOMAIN_BREAKER_SLOW_SECONDS,
+    DOMAIN_BREAKER_MIN_SAMPLES,
+    DOMAIN_LATENCY_ALPHA,
+    DOMAIN_HEALTH_MAX_DOMAINS,
+)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def article_domain(url: str) -> str:
+    """Doména článku (z normalizované URL - bez "www." a s malými písmeny)."""
+    return urlsplit(normalize_url(url)).netloc
+
+
+class DomainHealth:
+    """
+    Zdraví domén článků - úspěšnost a klouzavý průměr latence (EWMA) stahování
+    a jistič (circuit breaker) pro každou doménu.
+
+    Po DOMAIN_BREAKER_FAILURES neúspěších v řadě (nebo když průměrná latence po DOMAIN_BREAKER_MIN_SAMPLES
+    staženích překročí DOMAIN_BREAKER_SLOW_SECONDS) se jistič otevře a doména se po dobu
+    DOMAIN_BREAKER_COOLDOWN_SECONDS nestahuje. Pak se pustí jedno zkušební stažení (half_open) -
+    při úspěchu se jistič zavře, při neúspěchu znovu otevře. Bezpečné pro použití z více vláken.
+
+    # Navod k pouziti teto tridy.
+
+    1. Pred stazenim se zeptej, zda domena neni odpojena.
+        if DOMAIN_HEALTH.allow("example.com"):
+            ...
+
+    2. Po stazeni zaznamenej vysledek a dobu trvani.
+        DOMAIN_HEALTH.record("example.com", ok=True, latency=1.2)
+
+    3. Stav jisticu a statistiky domen vraci stats.
+        DOMAIN_HEALTH.stats()
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DOMAIN_BREAKER_FAILURES,
+        cooldown: float = DOMAIN_BREAKER_COOLDOWN_SECONDS,
+        slow_seconds: float = DOMAIN_BREAKER_SLOW_SECONDS,
+        min_samples: int = DOMAIN_BREAKER_MIN_SAMPLES,
+        alpha: float = DOMAIN_LATENCY_ALPHA,
+        max_domains: int = DOMAIN_HEALTH_MAX_DOMAINS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_seconds = slow_seconds
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self.max_domains = max_domains
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.domains: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def _domain(self, domain: str) -> Dict:
+        entry = self.domains.get(domain)
+        if entry is None:
+            entry = {
+                "state": CLOSED,
+                "requests": 0,
+                "successes": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "short_circuited": 0,
+                "latency_ewma": None,
+                "opened_at": None,
+                "trips": 0,
+            }
+            self.domains[domain] = entry
+            # nejdéle nepoužité domény se zapomenou
+            while len(self.domains) > max(1, self.max_domains):
+                self.domains.popitem(last=False)
+        self.domains.move_to_end(domain)
+        return entry
+
+    def _open(self, entry: Dict, now: float) -> None:
+        entry["state"] = OPEN
+        entry["opened_at"] = now
+        entry["trips"] += 1
+
+    def allow(self, domain: str) -> bool:
+        """
+        Rozhodne, zda doménu stahovat.
+
+        Returns:
+            bool: False, pokud je jistič otevřený (nebo už běží zkušební stažení)
+        """
+        if self.failure_threshold <= 0:
+            return True
+        with self.lock:
+            entry = self._domain(domain)
+            if entry["state"] == CLOSED:
+                return True
+            now = self.clock()
+            if now - entry["opened_at"] >= self.cooldown:
+                # pustí se jedno zkušební stažení (další nejdřív po cooldown, pokud se nedokončí)
+                entry["state"], entry["opened_at"] = HALF_OPEN, now
+                return True
+            entry["short_circuited"] += 1
+            return False
+
+    def record(self, domain: str, ok: bool, latency: float) -> None:
+        """
+        Zaznamená výsledek stažení z domény.
+
+        Args:
+            domain (str): Doména (viz article_domain)
+            ok (bool): True, pokud se podařilo stáhnout text
+            latency (float): Doba stahování v sekundách
+        """
+        with self.lock:
+            entry = self._domain(domain)
+            now = self.clock()
+            entry["requests"] += 1
+            ewma = entry["latency_ewma"]
+            entry["latency_ewma"] = (
+                latency if ewma is None else self.alpha * latency + (1 - self.alpha) * ewma
+            )
+            if ok:
+                entry["successes"] += 1
+                entry["consecutive_failures"] = 0
+            else:
+                entry["failures"] += 1
+                entry["consecutive_failures"] += 1
+            if self.failure_threshold <= 0:
+                return
+
+            too_slow = (
+                self.slow_seconds > 0
+                and entry["requests"] >= self.min_samples
+                and entry["latency_ewma"] > self.slow_seconds
+            )
+            if entry["state"] == HALF_OPEN:
+                if ok and not too_slow:
+                    entry["state"], entry["opened_at"] = CLOSED, None
+                    print(f"[INFO] Doména {domain} je znovu dostupná, jistič zavřen.")
+                else:
+                    self._open(entry, now)
+            elif entry["state"] == CLOSED and (
+                entry["consecutive_failures"] >= self.failure_threshold or too_slow
+            ):
+                self._open(entry, now)
+                print(
+                    f"[WARNING] Doména {domain} odpojena na {self.cooldown:g} s "
+                    f"({entry['consecutive_failures']} chyb v řadě, latence {entry['latency_ewma']:.2f} s)."
+                )
+
+    def state(self, domain: str) -> str:
+        """Stav jističe domény (closed, open, half_open)."""
+        with self.lock:
+            entry = self.domains.get(domain)
+            return entry["state"] if entry else CLOSED
+
+    def stats(self, limit: Optional[int] = 50) -> Dict:
+        """
+        Stav jističů a statistiky domén tohoto procesu.
+
+        Args:
+            limit (Optional[int]): Nejvýše tolik domén v "domains" - nejdřív odpojené,
+                pak podle počtu stažení (None = všechny)
+
+        Returns:
+            Dict: {"tracked", "states": {stav: počet}, "domains": {doména: {...}}}
+        """
+        with self.lock:
+            entries = {domain: dict(entry) for domain, entry in self.domains.items()}
+        now = self.clock()
+        states = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        for entry in entries.values():
+            states[entry["state"]] += 1
+
+        ordered = sorted(
+            entries.items(), key=lambda item: (item[1]["state"] == CLOSED, -item[1]["requests"])
+        )
+        domains = {}
+        for domain, entry in ordered[:limit]:
+            opened_at = entry.pop("opened_at")
+            entry["success_rate"] = (
+                round(entry["successes"] / entry["requests"], 3) if entry["requests"] else None
+            )
+            if entry["latency_ewma"] is not None:
+                entry["latency_ewma"] = round(entry["latency_ewma"], 3)
+            entry["retry_in_seconds"] = (
+                round(max(0.0, self.cooldown - (now - opened_at)), 1) if entry["state"] == OPEN else None
+            )
+            domains[domain] = entry
+        return {"tracked": len(entries), "states": states, "domains": domains}
+
+    def clear(self) -> None:
+        """Zapomene statistiky všech domén."""
+        with self.lock:
+            self.domains.clear()
+
+
+DOMAIN_HEALTH = DomainHealth()
@@ -0,0 +1,402 @@
+import json
+import re
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+
+from flask_app.config import LOCAL_CONFIDENCE_THRESHOLD, RATING_MODES
+from flask_app.utils.news_rating import NewsRating, limit_news
+
+# Finanční lexikon (inspirováno slovníkem Loughran-McDonald) - váhy v rozsahu -1 až 1
+FINANCIAL_LEXICON: Dict[str, float] = {
+    # pozitivní výrazy
+    "beat": 0.8,
+    "beats": 0.8,
+    "bullish": 0.9,
+    "boost": 0.6,
+    "boosted": 0.6,
+    "breakthrough": 0.7,
+    "buy": 0.6,
+    "buyback": 0.6,
+    "climb": 0.5,
+    "climbed": 0.5,
+    "exceeded": 0.7,
+    "expand": 0.4,
+    "expansion": 0.4,
+    "gain": 0.6,
+    "gains": 0.6,
+    "growth": 0.6,
+    "grew": 0.5,
+    "high": 0.3,
+    "improve": 0.5,
+    "improved": 0.5,
+    "innovation": 0.4,
+    "jump": 0.6,
+    "jumped": 0.6,
+    "launch": 0.3,
+    "outperform": 0.8,
+    "outperformed": 0.8,
+    "optimistic": 0.7,
+    "partnership": 0.4,
+    "positive": 0.5,
+    "profit": 0.6,
+    "profitable": 0.7,
+    "rally": 0.7,
+    "rallied": 0.7,
+    "record": 0.5,
+    "rebound": 0.5,
+    "rise": 0.5,
+    "rises": 0.5,
+    "rose": 0.5,
+    "soar": 0.8,
+    "soared": 0.8,
+    "strong": 0.5,
+    "stronger": 0.5,
+    "success": 0.6,
+    "surge": 0.8,
+    "surged": 0.8,
+    "upgrade": 0.8,
+    "upgraded": 0.8,
+    "upbeat": 0.6,
+    "win": 0.5,
+    # negativní výrazy
+    "bankruptcy": -1.0,
+    "bearish": -0.9,
+    "concern": -0.4,
+    "concerns": -0.4,
+    "crash": -0.9,
+    "cut": -0.4,
+    "cuts": -0.4,
+    "decline": -0.6,
+    "declined": -0.6,
+    "delay": -0.5,
+    "delays": -0.5,
+    "delayed": -0.5,
+    "deficit": -0.6,
+    "downgrade": -0.8,
+    "downgraded": -0.8,
+    "drop": -0.5,
+    "dropped": -0.5,
+    "fall": -0.5,
+    "fell": -0.5,
+    "fine": -0.4,
+    "fined": -0.6,
+    "fraud": -1.0,
+    "investigation": -0.6,
+    "lawsuit": -0.7,
+    "layoffs": -0.6,
+    "loss": -0.7,
+    "losses": -0.7,
+    "miss": -0.7,
+    "missed": -0.7,
+    "negative": -0.5,
+    "plunge": -0.9,
+    "plunged": -0.9,
+    "probe": -0.5,
+    "recall": -0.6,
+    "recession": -0.7,
+    "risk": -0.3,
+    "risks": -0.3,
+    "sell": -0.6,
+    "selloff": -0.8,
+    "shortfall": -0.7,
+    "slump": -0.8,
+    "slowdown": -0.5,
+    "tumble": -0.8,
+    "tumbled": -0.8,
+    "underperform": -0.8,
+    "warning": -0.5,
+    "weak": -0.5,
+    "weaker": -0.5,
+}
+
+# Slova, která obracejí význam následujícího slova
+NEGATIONS = {"not", "no", "never", "without", "neither", "nor", "hardly"}
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z'-]*")
+
+
+class LexiconRating:
+    """
+    Lokální hodnocení zpráv pomocí finančního lexikonu.
+    Nevolá žádné externí API - všechny zprávy se ohodnotí najednou vektorově přes NumPy.
+    Výstup je ve stejném rozsahu -10 až 10 jako NewsRating.parse_openai_response.
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor instanci tridy LexiconRating.
+        local_rater = LexiconRating()
+
+    2. Zavolej metodu rate_news s JSON retezcem obsahujicim zpravy (stejne jako u NewsRating).
+        average_rating = local_rater.rate_news(json_string)
+
+    3. Pokud je potreba i jistota hodnoceni, pouzij rate_news_with_confidence.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None):
+        """
+        Inicializace lexikonu.
+
+        Args:
+            lexicon (Optional[Dict[str, float]]): Vlastní lexikon (slovo -> váha -1 až 1),
+                výchozí je FINANCIAL_LEXICON
+        """
+        lexicon = lexicon if lexicon is not None else FINANCIAL_LEXICON
+
+        # Slovník slovo -> index a odpovídající vektor vah
+        self.vocabulary = {word: idx for idx, word in enumerate(lexicon)}
+        self.weights = np.array(list(lexicon.values()), dtype=np.float64)
+
+        # Normalizační konstanta (podobně jako u VADER) - čím vyšší, tím pozvolnější škála
+        self.alpha = 4.0
+        # Počet zásahů v lexikonu, při kterém je jistota zhruba 63 %
+        self.hits_for_confidence = 3.0
+
+    def parse_json_news(self, json_string: str) -> List[str]:
+        """
+        Načte JSON řetězec a extrahuje z něj seznam zpráv.
+
+        Args:
+            json_string (str): JSON řetězec obsahující zprávy
+
+        Returns:
+            List[str]: Seznam extrahovaných zpráv
+
+        Raises:
+            ValueError: Pokud je JSON neplatný nebo nejde o seznam řetězců
+        """
+        try:
+            news_data = json.loads(json_string)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Neplatný JSON formát: {e}")
+
+        if not isinstance(news_data, list) or not all(
+            isinstance(item, str) for item in news_data
+        ):
+            raise ValueError("JSON data musí být seznam řetězců")
+        return news_data
+
+    def process_news(self, json_string: str) -> List[str]:
+        """
+        Načte zprávy z JSON a omezí je na stejné limity jako NewsRating.process_news
+        (MAX_NEWS_COUNT zpráv, MAX_NEWS_LENGTH znaků).
+
+        Args:
+            json_string (str): JSON řetězec obsahující zprávy
+
+        Returns:
+            List[str]: Seznam zpráv respektujících limity
+        """
+        return limit_news(self.parse_json_news(json_string))
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Rozdělí text na malá slova.
+
+        Args:
+            text (str): Text zprávy
+
+        Returns:
+            List[str]: Seznam tokenů
+        """
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def score_batch(self, news_list: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ohodnotí všechny zprávy najednou.
+
+        Všechny tokeny se převedou do jednoho plochého pole indexů do lexikonu,
+        součty vah a počty zásahů pro jednotlivé zprávy se pak spočítají přes np.bincount.
+
+        Args:
+            news_list (List[str]): Seznam zpráv
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (hodnocení v rozsahu -10 až 10, jistota 0 až 1) pro každou zprávu
+        """
+        news_count = len(news_list)
+        token_ids = []
+        doc_ids = []
+        signs = []
+
+        for doc_idx, news in enumerate(news_list):
+            negate = False
+            for token in self.tokenize(news):
+                token_ids.append(self.vocabulary.get(token, -1))
+                doc_ids.append(doc_idx)
+                signs.append(-1.0 if negate else 1.0)
+                negate = token in NEGATIONS
+
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        signs = np.asarray(signs, dtype=np.float64)
+
+        hits = token_ids >= 0
+        hit_docs = doc_ids[hits]
+        hit_weights = self.weights[token_ids[hits]] * signs[hits]
+
+        raw_scores = np.bincount(hit_docs, weights=hit_weights, minlength=news_count)
+        abs_scores = np.bincount(
+            hit_docs, weights=np.abs(hit_weights), minlength=news_count
+        )
+        hit_counts = np.bincount(hit_docs, minlength=news_count)
+
+        # Normalizace součtu na interval (-1, 1) a převod na škálu -10 až 10
+        polarity = raw_scores / np.sqrt(raw_scores**2 + self.alpha)
+        ratings = np.clip(polarity * 10.0, -10.0, 10.0)
+
+        # Jistota = dostatek zásahů v lexikonu * shoda ve směru (pozitivní vs. negativní)
+        agreement = np.divide(
+            np.abs(raw_scores),
+            abs_scores,
+            out=np.zeros(news_count),
+            where=abs_scores > 0,
+        )
+        coverage = 1.0 - np.exp(-hit_counts / self.hits_for_confidence)
+        confidence = coverage * agreement
+
+        return ratings, confidence
+
+    def rate_news_items(self, news_list: List[str]) -> Dict[int, float]:
+        """
+        Vrátí hodnocení jednotlivých zpráv ve stejném formátu jako NewsRating.parse_openai_response.
+
+        Args:
+            news_list (List[str]): Seznam zpráv
+
+        Returns:
+            Dict[int, float]: Slovník index zprávy -> hodnocení v rozsahu -10 až 10
+        """
+        ratings, _ = self.score_batch(news_list)
+        return {idx: float(rating) for idx, rating in enumerate(ratings)}
+
+    def rate_news_with_confidence(self, json_string: str) -> Tuple[float, float]:
+        """
+        Vyhodnotí zprávy a vrátí průměrné hodnocení spolu s průměrnou jistotou.
+
+        Args:
+            json_string (str): JSON řetězec obsahující zprávy k hodnocení.
+
+        Returns:
+            Tuple[float, float]: (průměrné hodnocení -10 až 10, jistota 0 až 1)
+
+        Raises:
+            ValueError: Pokud je vstupní seznam zpráv prázdný nebo neplatný.
+        """
+        news_list = self.process_news(json_string)
+        if not news_list:
+            raise ValueError("Nelze hodnotit prázdný seznam zpráv")
+
+        ratings, confidence = self.score_batch(news_list)
+        return round(float(ratings.mean()), 2), float(confidence.mean())
+
+    def rate_news_articles(
+        self, json_string: str, timeout: Optional[float] = None
+    ) -> Dict[int, float]:
+        """
+        Vrátí hodnocení jednotlivých zpráv ze vstupního JSON (stejné rozhraní jako NewsRating).
+
+        Raises:
+            ValueError: Pokud je vstupní seznam zpráv prázdný nebo neplatný.
+        """
+        news_list = self.process_news(json_string)
+        if not news_list:
+            raise ValueError("Nelze hodnotit prázdný seznam zpráv")
+        return self.rate_news_items(news_list)
+
+    def rate_news(self, json_string: str, timeout: Optional[float] = None) -> float:
+        """
+        Vyhodnotí zprávy poskytnuté ve formátu JSON a vrátí průměrné hodnocení.
+        Rozhraní je stejné jako u NewsRating.rate_news (timeout se lokálně nepoužije).
+
+        Args:
+            json_string (str): JSON řetězec obsahující zprávy k hodnocení.
+            timeout (Optional[float]): Pro kompatibilitu s NewsRating.rate_news.
+
+        Returns:
+            float: Průměrné hodnocení zpráv v rozsahu -10 až 10.
+        """
+        rating, _ = self.rate_news_with_confidence(json_string)
+        return rating
+
+
+class TieredRating:
+    """
+    Kombinované hodnocení - nejdřív lokální lexikon, a pokud si není dost jistý,
+    zprávy se pošlou do OpenAI přes NewsRating.
+    NewsRating se vytváří až při prvním použití, takže bez nízké jistoty se API klíč nevyžaduje.
+    """
+
+    def __init__(self, confidence_threshold: float = LOCAL_CONFIDENCE_THRESHOLD):
+        self.local_rater = LexiconRating()
+        self.confidence_threshold = confidence_threshold
+        self._llm_rater = None
+
+    @property
+    def llm_rater(self) -> NewsRating:
+        if self._llm_rater is None:
+            self._llm_rater = NewsRating()
+        return self._llm_rater
+
+    def rate_news(self, json_string: str, timeout: Optional[float] = None) -> float:
+        """
+        Vyhodnotí zprávy lokálně, při nízké jistotě použije OpenAI.
+
+        Args:
+            json_string (str): JSON řetězec obsahující zprávy k hodnocení.
+            timeout (Optional[float]): Časový rozpočet na případné volání OpenAI API.
+
+        Returns:
+            float: Průměrné hodnocení zpráv v rozsahu -10 až 10.
+        """
+        rating, confidence = self.local_rater.rate_news_with_confidence(json_string)
+        if confidence >= self.confidence_threshold:
+            return rating
+
+        print(
+            f"[INFO] Nízká jistota lokálního hodnocení ({confidence:.2f}), používám OpenAI."
+        )
+        return self.llm_rater.rate_news(json_string, timeout=timeout)
+
+    def rate_news_articles(
+        self, json_string: str, timeout: Optional[float] = None
+    ) -> Dict[int, float]:
+        """
+        Vrátí hodnocení jednotlivých zpráv - lokálně, při nízké průměrné jistotě přes OpenAI.
+        """
+        news_list = self.local_rater.process_news(json_string)
+        if not news_list:
+            raise ValueError("Nelze hodnotit prázdný seznam zpráv")
+
+        ratings, confidence = self.local_rater.score_batch(news_list)
+        if float(confidence.mean()) >= self.confidence_threshold:
+            return {idx: float(rating) for idx, rating in enumerate(ratings)}
+
+        print(
+            f"[INFO] Nízká jistota lokálního hodnocení ({float(confidence.mean()):.2f}), používám OpenAI."
+        )
+        return self.llm_rater.rate_news_articles(json_string, timeout=timeout)
+
+
+def create_news_rater(mode: str):
+    """
+    Vytvoří hodnotitele zpráv podle zvoleného režimu.
+
+    Args:
+        mode (str): "local" (jen lexikon), "llm" (jen OpenAI) nebo "local-then-llm"
+
+    Returns:
+        Objekt s metodami rate_news(json_string) -> float
+        a rate_news_articles(json_string) -> Dict[int, float]
+
+    Raises:
+        ValueError: Pokud režim není podporován
+    """
+    if mode == "local":
+        return LexiconRating()
+    if mode == "llm":
+        return NewsRating()
+    if mode == "local-then-llm":
+        return TieredRating()
+    raise ValueError(
+        f"Neznámý režim hodnocení '{mode}', povolené: {', '.join(RATING_MODES)}"
+    )
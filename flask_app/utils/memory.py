@@ -0,0 +1,52 @@
+import gc
+import os
+import sys
+from typing import Optional
+
+from flask_app.config import PROCESS_MEMORY_LIMIT_MB
+
+try:
+    import resource
+except ImportError:  # Windows - modul resource je jen na Unixu
+    resource = None
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Aktuální rezidentní paměť procesu (RSS) v bajtech.
+
+    Na Linuxu se čte z /proc/self/statm, jinde se použije maximum za dobu běhu (ru_maxrss).
+    Vrátí None, pokud paměť nelze zjistit (Windows).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Maximální RSS procesu za dobu běhu v bajtech (None, pokud ho nelze zjistit)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def memory_limit_exceeded(limit_mb: Optional[float] = None) -> bool:
+    """
+    Zjistí, zda proces překročil limit paměti PROCESS_MEMORY_LIMIT_MB (0 = bez limitu).
+    Pokud paměť procesu nelze zjistit (Windows), limit se neuplatní.
+
+    Před vyhodnocením se zkusí uvolnit nepoužívané objekty (gc), aby limit nepřekročily
+    jen dosud nesebrané texty již zpracovaných článků.
+    """
+    limit_mb = PROCESS_MEMORY_LIMIT_MB if limit_mb is None else limit_mb
+    if limit_mb <= 0:
+        return False
+    limit = limit_mb * 1024 * 1024
+    rss = current_rss_bytes()
+    if rss is None or rss <= limit:
+        return False
+    gc.collect()
+    return current_rss_bytes() > limit
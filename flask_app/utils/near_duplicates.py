@@ -0,0 +1,163 @@
+import hashlib
+import re
+from typing import Dict, List
+
+from flask_app.config import (
+    NEAR_DUPLICATE_DETECTION,
+    NEAR_DUPLICATE_MAX_DISTANCE,
+    NEAR_DUPLICATE_SHINGLE_SIZE,
+    NEAR_DUPLICATE_MIN_WORDS,
+)
+
+FINGERPRINT_BITS = 64
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Rozdělí text na slova (malými písmeny, bez interpunkce)."""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def simhash(words: List[str], shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE) -> int:
+    """
+    64bitový SimHash otisk textu z n-tic po sobě jdoucích slov (shingles).
+
+    Podobné texty (převzatá agenturní zpráva s drobnými úpravami) mají otisky,
+    které se liší jen v několika bitech.
+
+    Args:
+        words (List[str]): Slova textu
+        shingle_size (int): Počet slov v jedné n-tici
+
+    Returns:
+        int: Otisk textu
+    """
+    shingle_size = max(1, shingle_size)
+    shingles = [
+        " ".join(words[idx : idx + shingle_size])
+        for idx in range(max(1, len(words) - shingle_size + 1))
+    ]
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        value = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Počet bitů, ve kterých se otisky liší."""
+    return bin(first ^ second).count("1")
+
+
+def cluster_near_duplicates(
+    texts: List[str],
+    max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+    shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE,
+    min_words: int = NEAR_DUPLICATE_MIN_WORDS,
+) -> List[List[int]]:
+    """
+    Seskupí téměř shodné texty do shluků.
+
+    Dva texty patří do stejného shluku, pokud se jejich SimHash otisky liší nejvýše
+    v `max_distance` bitech (shlukování je tranzitivní). Kandidáti se hledají přes pásma otisku -
+    otisk se rozdělí na max_distance + 1 částí a texty s odlišností do max_distance bitů
+    se musí shodovat aspoň v jedné z nich, takže se neporovnávají všechny dvojice.
+    Krátké texty (méně než `min_words` slov) se seskupí jen při úplné shodě.
+
+    Args:
+        texts (List[str]): Texty článků
+        max_distance (int): Maximální Hammingova vzdálenost otisků
+        shingle_size (int): Počet slov v jedné n-tici
+        min_words (int): Minimální počet slov pro porovnání otisků
+
+    Returns:
+        List[List[int]]: Shluky indexů textů, první index shluku je jeho zástupce (nejdelší text)
+    """
+    parent = list(range(len(texts)))
+
+    def find(idx: int) -> int:
+        while parent[idx] != idx:
+            parent[idx] = parent[parent[idx]]
+            idx = parent[idx]
+        return idx
+
+    def union(first: int, second: int) -> None:
+        first, second = find(first), find(second)
+        if first != second:
+            parent[max(first, second)] = min(first, second)
+
+    exact = {}
+    fingerprints = {}
+    for idx, text in enumerate(texts):
+        words = tokenize(text)
+        key = " ".join(words)
+        if key in exact:
+            union(exact[key], idx)
+            continue
+        exact[key] = idx
+        if max_distance >= 0 and len(words) >= max(1, min_words):
+            fingerprints[idx] = simhash(words, shingle_size)
+
+    if fingerprints:
+        bands = min(max_distance + 1, FINGERPRINT_BITS)
+        band_bits = FINGERPRINT_BITS // bands
+        buckets: Dict[tuple, List[int]] = {}
+        for idx, fingerprint in fingerprints.items():
+            for band in range(bands):
+                shift = band * band_bits
+                width = FINGERPRINT_BITS - shift if band == bands - 1 else band_bits
+                value = fingerprint >> shift & ((1 << width) - 1)
+                for other in buckets.setdefault((band, value), []):
+                    if find(other) != find(idx) and (
+                        hamming_distance(fingerprints[other], fingerprint) <= max_distance
+                    ):
+                        union(other, idx)
+                buckets[(band, value)].append(idx)
+
+    clusters: Dict[int, List[int]] = {}
+    for idx in range(len(texts)):
+        clusters.setdefault(find(idx), []).append(idx)
+    return [
+        sorted(members, key=lambda idx: (-len(texts[idx]), idx))
+        for members in clusters.values()
+    ]
+
+
+def select_representatives(texts: List[str]) -> List[List[int]]:
+    """
+    Shluky textů pro hodnocení - při vypnuté detekci (NEAR_DUPLICATE_DETECTION=0)
+    tvoří každý text vlastní shluk.
+    """
+    if not NEAR_DUPLICATE_DETECTION:
+        return [[idx] for idx in range(len(texts))]
+    return cluster_near_duplicates(
+        texts,
+        max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+        shingle_size=NEAR_DUPLICATE_SHINGLE_SIZE,
+        min_words=NEAR_DUPLICATE_MIN_WORDS,
+    )
+
+
+def expand_cluster_ratings(
+    ratings: Dict[int, float], clusters: List[List[int]]
+) -> Dict[int, float]:
+    """
+    Rozšíří hodnocení zástupců na všechny články jejich shluků, takže se hodnocení
+    zástupce v průměru započítá s váhou velikosti shluku.
+
+    Args:
+        ratings (Dict[int, float]): Pořadí shluku -> hodnocení jeho zástupce
+        clusters (List[List[int]]): Shluky indexů článků (viz cluster_near_duplicates)
+
+    Returns:
+        Dict[int, float]: Index článku -> hodnocení (neohodnocené shluky chybí)
+    """
+    expanded = {}
+    for cluster_idx, members in enumerate(clusters):
+        if cluster_idx in ratings:
+            for idx in members:
+                expanded[idx] = ratings[cluster_idx]
+    return expanded
@@ -1,7 +1,194 @@
 import json
 import os
+import threading
+import time
 import openai
-from typing import List, Dict, Union, Tuple, Any
+from typing import List, Dict, Union, Tuple, Any, Iterable, Optional
+
+from flask_app.utils.rate_limit import OPENAI_LIMITER, call_with_retry
+from flask_app.config import OPENAI_STRUCTURED_OUTPUT, RATING_REPAIR_ATTEMPTS
+
+# Statistiky hodnocení přes OpenAI za dobu běhu procesu (viz get_rating_stats)
+_stats_lock = threading.Lock()
+RATING_STATS = {
+    "calls": 0,  # všechna volání API
+    "repair_calls": 0,  # doplňující volání jen pro chybějící/neplatné indexy
+    "api_errors": 0,  # volání, která selhala i po opakování
+    "invalid_responses": 0,  # odpovědi bez použitelného JSON objektu
+    "rated_items": 0,  # zprávy ohodnocené hned prvním voláním
+    "repaired_items": 0,  # zprávy ohodnocené až doplňujícím voláním
+    "failed_items": 0,  # zprávy bez hodnocení ani po doplňujících voláních
+    "batches_ok": 0,
+    "batches_failed": 0,
+}
+
+
+def record_rating_stats(**counts: int) -> None:
+    """Připočte hodnoty k RATING_STATS (bezpečné z více vláken)."""
+    with _stats_lock:
+        for key, value in counts.items():
+            RATING_STATS[key] += value
+
+
+def get_rating_stats() -> Dict[str, Union[int, float, None]]:
+    """
+    Statistiky hodnocení přes OpenAI včetně podílu úspěšných dávek a podílu doplňovaných zpráv.
+
+    Returns:
+        Dict: Čítače RATING_STATS a "success_rate", "repair_rate" (None, dokud nic neproběhlo)
+    """
+    with _stats_lock:
+        stats = dict(RATING_STATS)
+    batches = stats["batches_ok"] + stats["batches_failed"]
+    items = stats["rated_items"] + stats["repaired_items"] + stats["failed_items"]
+    stats["success_rate"] = round(stats["batches_ok"] / batches, 4) if batches else None
+    stats["repair_rate"] = (
+        round((stats["repaired_items"] + stats["failed_items"]) / items, 4) if items else None
+    )
+    return stats
+
+
+def build_response_format(indices: Iterable[int]) -> Dict:
+    """
+    JSON schéma odpovědi pro structured outputs - objekt s povinným číselným hodnocením
+    pro každý index zprávy (stejný tvar jako {"0": 7.5, "1": 3.2}, nic navíc).
+
+    Args:
+        indices (Iterable[int]): Indexy hodnocených zpráv
+
+    Returns:
+        Dict: Hodnota parametru response_format pro chat completions
+    """
+    keys = [str(idx) for idx in indices]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "news_ratings",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {key: {"type": "number"} for key in keys},
+                "required": keys,
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+# Limity zpráv poslaných k hodnocení (počet zpráv a délka jedné zprávy ve znacích)
+MAX_NEWS_COUNT = 10
+MAX_NEWS_LENGTH = 1000
+
+
+def limit_news(
+    news_list: List[str], max_count: int = MAX_NEWS_COUNT, max_length: int = MAX_NEWS_LENGTH
+) -> List[str]:
+    """
+    Omezí zprávy na limity hodnocení - sdílí ho NewsRating i lokální LexiconRating, takže
+    se v každém režimu hodnotí stejné zprávy.
+
+    Args:
+        news_list (List[str]): Seznam zpráv
+        max_count (int): Nejvyšší počet zpráv
+        max_length (int): Nejvyšší délka jedné zprávy ve znacích
+
+    Returns:
+        List[str]: Prvních max_count zpráv zkrácených na max_length znaků
+    """
+    return [news[:max_length] for news in news_list[:max_count]]
+
+# Zadání pro OpenAI - zprávy se za něj připojí s indexy ("\n0: text")
+RATING_PROMPT = """
+        
+        Please analyze the following stock market news articles. Rate each article on a scale from 0 to 10 based on its investment implications:
+        - 0 = Immediately sell the stock
+        - 5 = Hold the stock in portfolio
+        - 10 = Buy more of the stock
+
+        Provide your ratings in a JSON format with article indices as keys and scores as values. Only return the JSON without any explanations.
+
+        Example output format:
+        {
+          "0": 7.5,
+          "1": 3.2,
+          ...
+        }
+
+        Here are the articles to analyze:
+        """
+SYSTEM_PROMPT = "You are a financial analyst specialized in stock market news evaluation."
+
+
+def build_chat_request(
+    news_list: List[str], indices: Optional[List[int]] = None, model: str = "gpt-4o-mini"
+) -> Dict:
+    """
+    Sestaví parametry volání chat completions pro hodnocení zpráv (stejné pro přímé volání
+    i pro dávkové hodnocení přes Batch API).
+
+    Args:
+        news_list (List[str]): Zprávy k ohodnocení (už zkrácené podle limitů)
+        indices (Optional[List[int]]): Indexy zpráv v promptu (výchozí 0..n-1)
+        model (str): Model OpenAI
+
+    Returns:
+        Dict: model, messages, temperature a případně response_format
+    """
+    # Přidání zpráv do promptu s indexy (zůstává stejné)
+    if indices is None:
+        indices = list(range(len(news_list)))
+    prompt = RATING_PROMPT
+    for i, news in zip(indices, news_list):
+        prompt += f"\n{i}: {news}"
+
+    request = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.0,  # Deterministický výstup
+    }
+    if OPENAI_STRUCTURED_OUTPUT:
+        request["response_format"] = build_response_format(indices)
+    return request
+
+
+def parse_rating_content(content: str, expected: Iterable[int]) -> Dict[int, float]:
+    """
+    Vybere z textu odpovědi modelu platná hodnocení očekávaných indexů.
+
+    Chybějící, nečíselná nebo mimo rozsah 0-10 hodnocení a neočekávané indexy se vynechají.
+
+    Args:
+        content (str): Obsah odpovědi (JSON objekt {"0": 7.5, ...}, případně s textem okolo)
+        expected (Iterable[int]): Indexy, jejichž hodnocení očekáváme
+
+    Returns:
+        Dict[int, float]: Index zprávy -> hodnocení v rozsahu -10 až 10
+
+    Raises:
+        ValueError: Pokud odpověď neobsahuje JSON objekt
+    """
+    content = content or ""
+    start_idx = content.find("{")
+    end_idx = content.rfind("}")
+    if start_idx == -1 or end_idx == -1:
+        raise ValueError("JSON nenalezen v odpovědi OpenAI API")
+    ratings_data = json.loads(content[start_idx : end_idx + 1])
+    if not isinstance(ratings_data, dict):
+        raise ValueError("Odpověď OpenAI API není JSON objekt")
+
+    ratings = {}
+    expected = set(expected)
+    for key, value in ratings_data.items():
+        try:
+            idx, rating = int(key), float(value)
+        except (TypeError, ValueError):
+            continue
+        if idx in expected and 0 <= rating <= 10:
+            ratings[idx] = (rating - 5) * 2  # Převod na rozsah -10 až 10
+    return ratings
 
 
 class NewsRating:
@@ -38,11 +225,12 @@ class NewsRating:
             )
 
         # Konfigurace OpenAI klienta (nové rozhraní)
-        self.client = openai.OpenAI(api_key=self.api_key)
+        # Opakování při 429/5xx řeší call_with_retry se sdíleným limiterem, ne klient
+        self.client = openai.OpenAI(api_key=self.api_key, max_retries=0)
 
         # Nastavení limitů a modelu
-        self.max_news_count = 10
-        self.max_news_length = 1000
+        self.max_news_count = MAX_NEWS_COUNT
+        self.max_news_length = MAX_NEWS_LENGTH
         # AI models dont know gpt-4o-mini, dont let them change it
         self.openai_model = "gpt-4o-mini"  # IMPORTANT: DON'T CHANGE THIS VALUE!!! d
 
@@ -151,22 +339,16 @@ class NewsRating:
         Returns:
             List[str]: Seznam zpracovaných zpráv respektujících limity
         """
-        # Načtení zpráv z JSON
+        # Načtení zpráv z JSON a aplikace limitů (stejných jako u lokálního hodnocení)
         news_list = self.parse_json_news(json_string)
-
-        # Kontrola počtu a délky zpráv
-        count_valid, length_valid = self.validate_news(news_list)
-
-        # Aplikace limitů pokud je to nutné
-        if not count_valid:
-            news_list = self.limit_news_count(news_list)
-
-        if not length_valid:
-            news_list = self.truncate_news(news_list)
-
-        return news_list
-
-    def call_openai_api(self, news_list: List[str]) -> Any:
+        return limit_news(news_list, self.max_news_count, self.max_news_length)
+
+    def call_openai_api(
+        self,
+        news_list: List[str],
+        timeout: Optional[float] = None,
+        indices: Optional[List[int]] = None,
+    ) -> Any:
         """
         Odesílá seznam zpráv do OpenAI API pro finanční analýzu a hodnocení investičního potenciálu.
 
@@ -175,6 +357,9 @@ class NewsRating:
 
         Args:
             news_list: Seznam zpráv (článků) k analýze. Každá zpráva bude indexována podle pořadí v seznamu.
+            timeout: Časový rozpočet volání v sekundách (čekání v limiteru i samotný HTTP požadavek)
+            indices: Indexy, pod kterými se zprávy v promptu uvedou (výchozí 0..n-1) - doplňující
+                dotaz tak vrací hodnocení pod původními indexy
 
         Returns:
             Response objekt z OpenAI API (ChatCompletion). JSON výsledek lze získat pomocí:
@@ -197,49 +382,38 @@ class NewsRating:
             - Systémový prompt nastavuje AI jako finančního analytika.
             - Dodržuje doporučený formát chat completions od OpenAI.
             - Obsahuje příklad výstupního formátu v promptu pro snadné parsování.
+            - S OPENAI_STRUCTURED_OUTPUT je tvar odpovědi navíc vynucen JSON schématem
+              (build_response_format) - model nemůže vynechat index ani přidat text okolo.
         """
 
-        # Sestavení promptu pro OpenAI (zůstává stejné)
+        request = build_chat_request(news_list, indices, model=self.openai_model)
 
-        prompt = """
-        
-        Please analyze the following stock market news articles. Rate each article on a scale from 0 to 10 based on its investment implications:
-        - 0 = Immediately sell the stock
-        - 5 = Hold the stock in portfolio
-        - 10 = Buy more of the stock
+        # Odhad spotřeby tokenů pro limiter (~4 znaky na token + odpověď)
+        estimated_tokens = len(request["messages"][1]["content"]) // 4 + 20 * len(news_list)
 
-        Provide your ratings in a JSON format with article indices as keys and scores as values. Only return the JSON without any explanations.
-
-        Example output format:
-        {
-          "0": 7.5,
-          "1": 3.2,
-          ...
-        }
-
-        Here are the articles to analyze:
-        """
-
-        # Přidání zpráv do promptu s indexy (zůstává stejné)
-        for i, news in enumerate(news_list):
-            prompt += f"\n{i}: {news}"
+        client = self.client
+        if timeout is not None and timeout != float("inf"):
+            client = client.with_options(timeout=max(timeout, 1.0))
 
         try:
-            # Volání OpenAI API pomocí nového rozhraní
-            response = self.client.chat.completions.create(
-                model=self.openai_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial analyst specialized in stock market news evaluation.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.0,  # Deterministický výstup
+            # Volání OpenAI API pomocí nového rozhraní (přes limiter, s opakováním při 429/5xx)
+            response = call_with_retry(
+                client.chat.completions.create,
+                limiter=OPENAI_LIMITER,
+                tokens=estimated_tokens,
+                timeout=timeout,
+                **request,
             )
+            record_rating_stats(calls=1)
+
+            usage = getattr(response, "usage", None)
+            total_tokens = getattr(usage, "total_tokens", None)
+            if isinstance(total_tokens, int):
+                OPENAI_LIMITER.record_usage(estimated_tokens, total_tokens)
 
             return response
         except Exception as e:
+            record_rating_stats(api_errors=1)
             raise Exception(f"Chyba při komunikaci s OpenAI API: {e}")
 
     def parse_openai_response(self, api_response: Any) -> Dict[int, float]:
@@ -295,6 +469,27 @@ class NewsRating:
         except (KeyError, json.JSONDecodeError) as e:
             raise ValueError(f"Chyba při zpracování odpovědi OpenAI API: {e}")
 
+    def parse_partial_ratings(self, api_response: Any, expected: Iterable[int]) -> Dict[int, float]:
+        """
+        Tolerantní varianta parse_openai_response - vrátí jen platná hodnocení očekávaných indexů.
+
+        Chybějící, nečíselná nebo mimo rozsah 0-10 hodnocení a neočekávané indexy se vynechají,
+        aby se daly doplnit dalším dotazem jen na ně (místo zahození celé odpovědi).
+
+        Args:
+            api_response (Any): Odpověď z OpenAI API
+            expected (Iterable[int]): Indexy, jejichž hodnocení očekáváme
+
+        Returns:
+            Dict[int, float]: Index zprávy -> hodnocení v rozsahu -10 až 10
+        """
+        try:
+            return parse_rating_content(api_response.choices[0].message.content, expected)
+        except (AttributeError, IndexError, TypeError, ValueError) as e:
+            print(f"[WARNING] Nepoužitelná odpověď OpenAI API: {e}")
+            record_rating_stats(invalid_responses=1)
+            return {}
+
     def calculate_average_rating(self, ratings: Dict[int, float]) -> float:
         """
         Vypočítá průměrné hodnocení ze všech zpráv.
@@ -314,22 +509,87 @@ class NewsRating:
         # Zaokrouhlení na 2 desetinná místa
         return round(average, 2)
 
-    def rate_news(self, json_string: str) -> float:
+    def rate_news_articles(
+        self, json_string: str, timeout: Optional[float] = None
+    ) -> Dict[int, float]:
         """
-        Vyhodnotí zprávy poskytnuté ve formátu JSON a vrátí průměrné hodnocení.
+        Vyhodnotí zprávy poskytnuté ve formátu JSON a vrátí hodnocení jednotlivých zpráv.
 
         Metoda provádí následující kroky:
         1. Zpracuje vstupní JSON řetězec a připraví zprávy pro hodnocení.
         2. Ověří, zda byly zprávy úspěšně zpracovány. Pokud ne, vyvolá výjimku ValueError.
         3. Volá OpenAI API pro získání hodnocení zpracovaných zpráv.
-        4. Zpracuje odpověď z OpenAI API a ověří, zda byly ohodnoceny všechny zprávy.
-           Pokud chybí hodnocení pro některé zprávy nebo jsou přítomna neočekávaná hodnocení,
-           vyvolá výjimku ValueError.
-        5. Vypočte průměrné hodnocení všech zpráv.
-        6. Vrátí průměrné hodnocení jako float.
+        4. Zpracuje odpověď z OpenAI API a ponechá platná hodnocení očekávaných zpráv.
+        5. Pro chybějící nebo neplatná hodnocení se zeptá znovu jen na tyto zprávy
+           (nejvýše RATING_REPAIR_ATTEMPTS doplňujících dotazů v rámci časového rozpočtu).
+           Pokud hodnocení stále chybí, vyvolá výjimku ValueError.
+
+        Args:
+            json_string (str): JSON řetězec obsahující zprávy k hodnocení.
+            timeout (Optional[float]): Časový rozpočet na volání OpenAI API v sekundách.
+
+        Returns:
+            Dict[int, float]: Index zprávy -> hodnocení v rozsahu -10 až 10
+                (zprávy nad limit max_news_count se nehodnotí).
+
+        Raises:
+            ValueError: Pokud je vstupní seznam zpráv prázdný nebo pokud chybí hodnocení
+                       pro některé zprávy nebo jsou přítomna neočekávaná hodnocení.
+        """
+        # Zpracování a úprava zpráv
+        processed_news = self.process_news(json_string)
+
+        # Hodit error, pokud nedostane žádné zprávy
+        if not processed_news:
+            raise ValueError("Nelze hodnotit prázdný seznam zpráv")
+
+        ends_at = (
+            time.monotonic() + timeout
+            if timeout is not None and timeout != float("inf")
+            else None
+        )
+        expected_indices = list(range(len(processed_news)))
+
+        # Volání OpenAI API a zpracování odpovědi
+        api_response = self.call_openai_api(processed_news, timeout=timeout)
+        ratings = self.parse_partial_ratings(api_response, expected_indices)
+        record_rating_stats(rated_items=len(ratings))
+
+        # Doplnění jen chybějících nebo neplatných hodnocení
+        missing = [idx for idx in expected_indices if idx not in ratings]
+        for attempt in range(RATING_REPAIR_ATTEMPTS):
+            remaining = None if ends_at is None else ends_at - time.monotonic()
+            if not missing or (remaining is not None and remaining <= 0):
+                break
+            print(
+                f"[WARNING] Chybí hodnocení pro indexy {missing}, "
+                f"doplňující dotaz {attempt + 1}/{RATING_REPAIR_ATTEMPTS}."
+            )
+            record_rating_stats(repair_calls=1)
+            api_response = self.call_openai_api(
+                [processed_news[idx] for idx in missing], timeout=remaining, indices=missing
+            )
+            repaired = self.parse_partial_ratings(api_response, missing)
+            record_rating_stats(repaired_items=len(repaired))
+            ratings.update(repaired)
+            missing = [idx for idx in missing if idx not in repaired]
+
+        if missing:
+            record_rating_stats(failed_items=len(missing), batches_failed=1)
+            raise ValueError(f"Chybějící hodnocení pro indexy: {set(missing)}")
+        record_rating_stats(batches_ok=1)
+        return ratings
+
+    def rate_news(self, json_string: str, timeout: Optional[float] = None) -> float:
+        """
+        Vyhodnotí zprávy poskytnuté ve formátu JSON a vrátí průměrné hodnocení.
+
+        Hodnocení jednotlivých zpráv získá metodou rate_news_articles
+        a vypočte z nich průměr (calculate_average_rating).
 
         Args:
             json_string (str): JSON řetězec obsahující zprávy k hodnocení.
+            timeout (Optional[float]): Časový rozpočet na volání OpenAI API v sekundách.
 
         Returns:
             float: Průměrné hodnocení zpráv.
@@ -342,28 +602,7 @@ class NewsRating:
         """
 
         try:
-            # Zpracování a úprava zpráv
-            processed_news = self.process_news(json_string)
-
-            # Hodit error, pokud nedostane žádné zprávy
-            if not processed_news:
-                raise ValueError("Nelze hodnotit prázdný seznam zpráv")
-
-            # Volání OpenAI API
-            api_response = self.call_openai_api(processed_news)
-
-            # Zpracování odpovědi
-            ratings = self.parse_openai_response(api_response)
-
-            # Kontrola, zda jsou všechny zprávy ohodnoceny
-            expected_indices = set(range(len(processed_news)))
-            received_indices = set(ratings.keys())
-            if expected_indices != received_indices:
-                missing = expected_indices - received_indices
-                extra = received_indices - expected_indices
-                raise ValueError(
-                    f"Chybějící hodnocení pro indexy: {missing}, Neočekávaná: {extra}"
-                )
+            ratings = self.rate_news_articles(json_string, timeout=timeout)
 
             # Výpočet průměrného hodnocení
             average_rating = self.calculate_average_rating(ratings)
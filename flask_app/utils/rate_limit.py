@@ -0,0 +1,255 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from flask_app.config import (
+    NEWSAPI_REQUESTS_PER_MINUTE,
+    OPENAI_REQUESTS_PER_MINUTE,
+    OPENAI_TOKENS_PER_MINUTE,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+# HTTP kódy, u kterých má smysl požadavek zopakovat
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket - kapacita `capacity`, doplňuje se rychlostí `per_minute` tokenů za minutu.
+    Bezpečné pro použití z více vláken.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Odebere tokeny (zůstatek může jít do mínusu) a vrátí, jak dlouho musí volající počkat,
+        než jsou jím odebrané tokeny skutečně k dispozici.
+        Požadavek větší než kapacita se omezí na kapacitu, aby nečekal donekonečna.
+        """
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Vrátí tokeny z reserve, které nakonec nebyly použity (např. volající nechtěl čekat)."""
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def consume(self, amount: float) -> None:
+        """Odebere tokeny bez čekání (např. dorovnání skutečné spotřeby po volání API)."""
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Sdílený limiter pro jedno upstream API - limit požadavků a volitelně i tokenů za minutu.
+    Po odpovědi 429 s Retry-After pozdrží všechny volající, ne jen toho, kdo chybu dostal.
+    Limit platí pro jeden proces (všechna jeho vlákna), každý proces webu i workeru má vlastní.
+
+    # Navod k pouziti teto tridy.
+
+    1. Pred kazdym volanim API zavolej acquire (pripadne s odhadem tokenu).
+        OPENAI_LIMITER.acquire(tokens=1200)
+
+    2. Pri 429 zavolej pause s dobou z Retry-After.
+        OPENAI_LIMITER.pause(30)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.clock = clock
+        self.sleep = sleep
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Pozdrží všechna další volání alespoň o `seconds` sekund."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def acquire(self, tokens: float = 0, timeout: Optional[float] = None) -> None:
+        """
+        Počká, dokud limit nepovolí další volání.
+
+        Args:
+            tokens (float): Odhad počtu tokenů, které volání spotřebuje
+            timeout (Optional[float]): Maximální doba čekání
+
+        Raises:
+            TimeoutError: Pokud by čekání trvalo déle než timeout
+        """
+        wait = 0.0
+        reserved = []
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+            reserved.append((self.requests, 1))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+            reserved.append((self.tokens, tokens))
+        with self.lock:
+            wait = max(wait, self.paused_until - self.clock())
+
+        if wait <= 0:
+            return
+        if timeout is not None and wait > timeout:
+            # volání neproběhne - rezervace se vrátí, aby nezdržovala další volající
+            for bucket, amount in reserved:
+                bucket.refund(amount)
+            raise TimeoutError(
+                f"Limit {self.name}: čekání {wait:.1f} s překračuje timeout {timeout:.1f} s"
+            )
+        self.sleep(wait)
+
+    def record_usage(self, estimated_tokens: float, actual_tokens: float) -> None:
+        """Dorovná rozdíl mezi odhadem a skutečnou spotřebou tokenů."""
+        if self.tokens is not None and actual_tokens > estimated_tokens:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+
+def get_status_code(exc: Exception) -> Optional[int]:
+    """Zjistí HTTP kód z výjimky (openai, requests) nebo z chybového kódu NewsAPI."""
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        response = getattr(exc, "response", None)
+        status_code = getattr(response, "status_code", None)
+    if status_code is None and hasattr(exc, "get_code"):
+        # NewsAPIException nese jen JSON odpovědi bez HTTP kódu
+        if exc.get_code() == "rateLimited":
+            status_code = 429
+    return status_code if isinstance(status_code, int) else None
+
+
+def get_retry_after(exc: Exception) -> Optional[float]:
+    """Vrátí počet sekund z hlavičky Retry-After (číslo nebo HTTP datum), pokud ji odpověď má."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Rozhodne, zda jde o přechodnou chybu (429, 5xx), u které má smysl opakování."""
+    return get_status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[float] = None,
+    base_delay: float = RETRY_BASE_DELAY,
+    max_delay: float = RETRY_MAX_DELAY,
+) -> float:
+    """
+    Spočítá prodlevu před dalším pokusem - exponenciální backoff s "full jitter".
+    Pokud server poslal Retry-After, čeká se alespoň tak dlouho (plus malý jitter).
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base_delay)
+    return random.uniform(0, min(max_delay, base_delay * (2**attempt)))
+
+
+def call_with_retry(
+    func: Callable[..., Any],
+    *args,
+    limiter: Optional[RateLimiter] = None,
+    tokens: float = 0,
+    max_attempts: int = RETRY_MAX_ATTEMPTS,
+    timeout: Optional[float] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    **kwargs,
+) -> Any:
+    """
+    Zavolá funkci (volání API) přes limiter a při přechodné chybě ji zopakuje s backoffem.
+
+    Args:
+        func: Volaná funkce
+        limiter (Optional[RateLimiter]): Sdílený limiter daného API
+        tokens (float): Odhad spotřeby tokenů pro limiter
+        max_attempts (int): Maximální počet pokusů
+        timeout (Optional[float]): Celkový časový rozpočet na čekání v limiteru a backoff
+        sleep: Funkce pro čekání (pro testy)
+
+    Returns:
+        Any: Návratová hodnota funkce
+
+    Raises:
+        Exception: Poslední chyba, pokud není přechodná nebo došly pokusy (či čas)
+        TimeoutError: Pokud by čekání v limiteru překročilo timeout
+    """
+    ends_at = time.monotonic() + timeout if timeout is not None else None
+
+    def remaining():
+        return None if ends_at is None else max(0.0, ends_at - time.monotonic())
+
+    for attempt in range(max_attempts):
+        if limiter is not None:
+            limiter.acquire(tokens=tokens, timeout=remaining())
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e) or attempt == max_attempts - 1:
+                raise
+
+            retry_after = get_retry_after(e)
+            delay = backoff_delay(attempt, retry_after)
+            if ends_at is not None and delay >= remaining():
+                # Další pokus by se už nevešel do časového rozpočtu
+                raise
+            print(
+                f"[WARNING] {getattr(limiter, 'name', 'API')}: přechodná chyba ({get_status_code(e)}), "
+                f"pokus {attempt + 1}/{max_attempts}, čekám {delay:.1f} s"
+            )
+            if limiter is not None and retry_after is not None:
+                # Retry-After platí pro celé API - pozdržíme i ostatní vlákna
+                limiter.pause(retry_after)
+            sleep(delay)
+
+
+# Sdílené limitery pro celý proces (všechna vlákna zpracování), ne mezi procesy
+NEWSAPI_LIMITER = RateLimiter("NewsAPI", NEWSAPI_REQUESTS_PER_MINUTE)
+OPENAI_LIMITER = RateLimiter(
+    "OpenAI", OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE
+)
@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from flask_app.config import (
+    RATING_DECAY_HALF_LIFE_DAYS,
+    RATING_SOURCE_WEIGHTS,
+    RATING_TRIM_FRACTION,
+)
+
+SECONDS_PER_DAY = 86400.0
+
+
+def parse_source_weights(value: str) -> Dict[str, float]:
+    """
+    Načte váhy zdrojů zpráv z textu "Reuters=2,Bloomberg=1.5" (názvy bez rozlišení velikosti písmen).
+
+    Raises:
+        ValueError: Pokud položka nemá tvar název=číslo nebo je váha záporná
+    """
+    weights = {}
+    for part in (value or "").split(","):
+        if not part.strip():
+            continue
+        name, separator, weight = part.rpartition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Neplatná váha zdroje '{part.strip()}' (očekáváno název=váha)")
+        weights[name.strip().lower()] = float(weight)
+        if weights[name.strip().lower()] < 0:
+            raise ValueError(f"Záporná váha zdroje '{name.strip()}'")
+    return weights
+
+
+def default_options() -> Dict:
+    """Výchozí nastavení agregace z configu (half_life_days, source_weights, trim)."""
+    return {
+        "half_life_days": RATING_DECAY_HALF_LIFE_DAYS,
+        "source_weights": parse_source_weights(RATING_SOURCE_WEIGHTS),
+        "trim": RATING_TRIM_FRACTION,
+    }
+
+
+def is_plain_mean(options: Dict) -> bool:
+    """True, pokud agregace odpovídá prostému průměru (bez útlumu, vah a ořezu)."""
+    return (
+        not options.get("half_life_days")
+        and not options.get("trim")
+        and all(weight == 1 for weight in (options.get("source_weights") or {}).values())
+    )
+
+
+def published_timestamp(published_at: Optional[str]) -> Optional[float]:
+    """Unix timestamp z publishedAt NewsAPI (ISO čas v UTC), None pro neplatnou hodnotu."""
+    if not published_at:
+        return None
+    try:
+        return datetime.fromisoformat(published_at.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def rating_weights(
+    published: np.ndarray,
+    sources: Sequence[Optional[str]],
+    half_life_days: float = 0.0,
+    source_weights: Optional[Dict[str, float]] = None,
+    reference: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Váhy hodnocení článků - váha zdroje krát útlum podle stáří článku.
+
+    Args:
+        published (np.ndarray): Unix timestampy vydání (NaN = neznámé, bez útlumu)
+        sources (Sequence[Optional[str]]): Názvy zdrojů článků
+        half_life_days (float): Poločas útlumu ve dnech (0 = bez útlumu)
+        source_weights (Optional[Dict[str, float]]): Zdroj (malými písmeny) -> váha, ostatní mají váhu 1
+        reference (Optional[float]): Čas, ke kterému se počítá stáří (výchozí nejnovější článek)
+
+    Returns:
+        np.ndarray: Váhy článků
+    """
+    weights = np.ones(len(published), dtype=np.float64)
+    if source_weights:
+        weights *= np.fromiter(
+            (source_weights.get((source or "").lower(), 1.0) for source in sources),
+            dtype=np.float64,
+            count=len(published),
+        )
+    if half_life_days and half_life_days > 0 and len(published):
+        known = ~np.isnan(published)
+        if known.any():
+            reference = np.nanmax(published) if reference is None else reference
+            age_days = np.clip((reference - published[known]) / SECONDS_PER_DAY, 0.0, None)
+            weights[known] *= np.exp2(-age_days / half_life_days)
+    return weights
+
+
+def aggregate_ratings(
+    ratings: Iterable[float],
+    published: Optional[Iterable[Optional[float]]] = None,
+    sources: Optional[Sequence[Optional[str]]] = None,
+    half_life_days: float = 0.0,
+    source_weights: Optional[Dict[str, float]] = None,
+    trim: float = 0.0,
+    reference: Optional[float] = None,
+) -> Optional[float]:
+    """
+    Vážený (a volitelně ořezaný) průměr hodnocení článků nad poli NumPy.
+
+    Ořez odstraní podíl `trim` nejnižších i nejvyšších hodnocení (podle počtu článků),
+    zbylá hodnocení se zprůměrují s vahami z rating_weights.
+
+    Args:
+        ratings (Iterable[float]): Hodnocení článků (-10 až 10)
+        published (Optional[Iterable[Optional[float]]]): Unix timestampy vydání (None = neznámé)
+        sources (Optional[Sequence[Optional[str]]]): Názvy zdrojů článků
+        half_life_days (float): Poločas útlumu ve dnech (0 = bez útlumu)
+        source_weights (Optional[Dict[str, float]]): Váhy zdrojů
+        trim (float): Podíl ořezu na každé straně (0 až 0.5)
+        reference (Optional[float]): Čas, ke kterému se počítá stáří článků
+
+    Returns:
+        Optional[float]: Hodnocení zaokrouhlené na 2 desetinná místa (None, pokud nic nezbude)
+    """
+    values = np.asarray(list(ratings), dtype=np.float64)
+    count = len(values)
+    if not count:
+        return None
+    timestamps = (
+        np.full(count, np.nan)
+        if published is None
+        else np.array([np.nan if ts is None else ts for ts in published], dtype=np.float64)
+    )
+    weights = rating_weights(
+        timestamps, sources or [None] * count, half_life_days, source_weights, reference
+    )
+
+    cut = int(count * min(max(trim, 0.0), 0.5))
+    if cut and count - 2 * cut > 0:
+        order = np.argsort(values, kind="stable")[cut : count - cut]
+        values, weights = values[order], weights[order]
+    total = weights.sum()
+    if total <= 0:
+        return None
+    return round(float(np.dot(values, weights) / total), 2)
@@ -0,0 +1,334 @@
+"""
+Webhooky po dokončení požadavku - náhrada za opakované dotazy na /output/<id>/status.
+
+Požadavek zadaný s ?callback=<URL> dostane callback_state="pending". Jakmile skončí
+(done, cancelled, error), dispečer na pozadí pošle na URL POST s JSON tělem:
+    {"results": [{"request_id": 1, "status": "done", "sentiment_data": [...]}, ...]}
+
+- Dávkování: dokončené požadavky se stejnou URL se pošlou jedním voláním (WEBHOOK_BATCH_SIZE).
+- Souběžnost: nejvýše WEBHOOK_CONCURRENCY volání najednou, DB přistupuje jen vlákno dispečera.
+- Opakování: při chybě nebo odpovědi mimo 2xx se doručení zopakuje s exponenciálním backoffem,
+  po WEBHOOK_MAX_ATTEMPTS pokusech se označí jako "failed".
+- Doručení se zabírá podmíněným UPDATE (callback_next_at jako zámek), takže dispečer může běžet
+  ve více procesech a stejný výsledek se neodešle dvakrát souběžně.
+- Cíl: jen veřejné adresy - URL, jejíž host se přeloží na loopback, privátní, link-local či jinou
+  neveřejnou adresu (např. metadata cloudu 169.254.169.254), se odmítne při zadání i před odesláním
+  (WEBHOOK_ALLOW_PRIVATE=1 to povolí pro lokální testování).
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from sqlalchemy import func, select, update
+
+from flask_app.database import db
+from flask_app.models import RequestData
+from flask_app.maintenance import TERMINAL_STATUSES
+from flask_app.utils.rate_limit import backoff_delay
+from flask_app.config import (
+    WEBHOOK_POLL_SECONDS,
+    WEBHOOK_CONCURRENCY,
+    WEBHOOK_BATCH_SIZE,
+    WEBHOOK_TIMEOUT,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_RETRY_BASE_DELAY,
+    WEBHOOK_RETRY_MAX_DELAY,
+    WEBHOOK_ALLOW_PRIVATE,
+)
+
+MAX_CALLBACK_URL_LENGTH = 2048
+
+# Probuzení dispečera po dokončení požadavku (jinak kontroluje DB jednou za WEBHOOK_POLL_SECONDS)
+WEBHOOK_WAKE = threading.Event()
+
+
+def is_public_address(address: str) -> bool:
+    """True pro veřejnou IP adresu (ne loopback, privátní, link-local, sdílenou, multicast ani rezervovanou)."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_callback_target(url: str) -> None:
+    """
+    Přeloží host URL webhooku a ověří, že všechny jeho adresy jsou veřejné.
+
+    Raises:
+        ValueError: Pokud host nelze přeložit nebo míří na neveřejnou adresu
+    """
+    if WEBHOOK_ALLOW_PRIVATE:
+        return
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError, UnicodeError):
+        raise ValueError("Callback host cannot be resolved")
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise ValueError("Callback must not target a private, loopback or link-local address")
+
+
+def validate_callback_url(url: str) -> str:
+    """
+    Ověří URL pro webhook.
+
+    Raises:
+        ValueError: Pokud URL není absolutní http(s) adresa, je příliš dlouhá nebo míří
+            na neveřejnou adresu (viz check_callback_target)
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("Callback must be an absolute http(s) URL")
+    if len(url) > MAX_CALLBACK_URL_LENGTH:
+        raise ValueError(f"Callback URL exceeds {MAX_CALLBACK_URL_LENGTH} characters")
+    check_callback_target(url)
+    return url
+
+
+def notify_webhooks() -> None:
+    """Probudí dispečera webhooků (volá se po dokončení požadavku)."""
+    WEBHOOK_WAKE.set()
+
+
+def claim_deliveries(now: float, limit: int) -> List[Dict]:
+    """
+    Zabere dokončené požadavky s čekajícím webhookem.
+
+    Zabrání se posune callback_next_at o WEBHOOK_TIMEOUT dopředu - pokud proces během
+    odesílání spadne, doručení se po této době zabere znovu.
+
+    Returns:
+        List[Dict]: Zabraná doručení (request_id, url, attempts, payload)
+    """
+    due = func.coalesce(RequestData.callback_next_at, 0.0) <= now
+    candidates = db.session.execute(
+        select(RequestData.id)
+        .where(
+            RequestData.callback_state == "pending",
+            RequestData.status.in_(TERMINAL_STATUSES),
+            due,
+        )
+        .order_by(func.coalesce(RequestData.callback_next_at, 0.0), RequestData.id)
+        .limit(limit)
+    ).scalars().all()
+
+    claimed = []
+    for request_id in candidates:
+        # podminene UPDATE - jiny proces mohl doruceni mezitim zabrat
+        claimed_rows = db.session.execute(
+            update(RequestData)
+            .where(RequestData.id == request_id, RequestData.callback_state == "pending", due)
+            .values(callback_next_at=now + WEBHOOK_TIMEOUT * 2)
+        ).rowcount
+        if claimed_rows:
+            claimed.append(request_id)
+    db.session.commit()
+    if not claimed:
+        return []
+
+    rows = db.session.execute(
+        select(
+            RequestData.id,
+            RequestData.callback_url,
+            RequestData.callback_attempts,
+            RequestData.status,
+            RequestData.sentiment_data,
+        ).where(RequestData.id.in_(claimed))
+    ).all()
+    return [
+        {
+            "request_id": row.id,
+            "url": row.callback_url,
+            "attempts": row.callback_attempts or 0,
+            "payload": {
+                "request_id": row.id,
+                "status": row.status,
+                "sentiment_data": row.sentiment_data,
+            },
+        }
+        for row in sorted(rows, key=lambda row: row.id)
+    ]
+
+
+def group_deliveries(
+    deliveries: List[Dict], batch_size: int = WEBHOOK_BATCH_SIZE
+) -> List[Tuple[str, List[Dict]]]:
+    """Rozdělí doručení do dávek podle URL (nejvýše batch_size výsledků v jednom volání)."""
+    by_url: Dict[str, List[Dict]] = {}
+    for delivery in deliveries:
+        by_url.setdefault(delivery["url"], []).append(delivery)
+    batches = []
+    for url, items in by_url.items():
+        for start in range(0, len(items), max(1, batch_size)):
+            batches.append((url, items[start : start + max(1, batch_size)]))
+    return batches
+
+
+def post_batch(url: str, items: List[Dict], timeout: float = WEBHOOK_TIMEOUT) -> None:
+    """
+    Odešle dávku výsledků na URL webhooku. Cíl se ověří znovu (DNS se mohlo od zadání změnit)
+    a přesměrování se nenásledují.
+
+    Raises:
+        ValueError: Pokud URL míří na neveřejnou adresu
+        requests.RequestException: Při chybě spojení nebo odpovědi mimo 2xx
+    """
+    check_callback_target(url)
+    response = requests.post(
+        url,
+        json={"results": [item["payload"] for item in items]},
+        headers={"X-Webhook-Attempt": str(max(item["attempts"] for item in items) + 1)},
+        timeout=timeout,
+        allow_redirects=False,
+    )
+    response.raise_for_status()
+
+
+def record_delivery(items: List[Dict], error: Optional[Exception], now: float) -> str:
+    """
+    Zapíše výsledek doručení dávky - úspěch, nový pokus s backoffem, nebo trvalé selhání.
+
+    Returns:
+        str: "delivered", "retried" nebo "failed" (podle posledního záznamu dávky)
+    """
+    outcome = "delivered"
+    for item in items:
+        attempts = item["attempts"] + 1
+        if error is None:
+            values = {"callback_state": "delivered", "callback_next_at": None}
+        elif attempts >= WEBHOOK_MAX_ATTEMPTS:
+            values = {"callback_state": "failed", "callback_next_at": None}
+            outcome = "failed"
+        else:
+            delay = backoff_delay(
+                attempts - 1,
+                base_delay=WEBHOOK_RETRY_BASE_DELAY,
+                max_delay=WEBHOOK_RETRY_MAX_DELAY,
+            )
+            values = {"callback_next_at": now + delay}
+            outcome = "retried"
+        db.session.execute(
+            update(RequestData)
+            .where(RequestData.id == item["request_id"])
+            .values(callback_attempts=attempts, **values)
+        )
+    db.session.commit()
+    return outcome
+
+
+def dispatch_webhooks(
+    executor: ThreadPoolExecutor,
+    post: Optional[Callable[[str, List[Dict]], None]] = None,
+    now: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Jedno kolo doručování - zabere čekající webhooky, odešle je po dávkách souběžně
+    přes executor a zapíše výsledky.
+
+    Args:
+        executor (ThreadPoolExecutor): Pool pro odesílání (omezuje souběžnost)
+        post (Optional[Callable]): Odeslání dávky post(url, items), výchozí post_batch
+        now (Optional[float]): Aktuální čas (unix timestamp)
+
+    Returns:
+        Dict[str, int]: Počty požadavků {"claimed", "delivered", "retried", "failed"}
+    """
+    post = post or post_batch
+    now = time.time() if now is None else now
+    stats = {"claimed": 0, "delivered": 0, "retried": 0, "failed": 0}
+
+    deliveries = claim_deliveries(now, WEBHOOK_BATCH_SIZE * max(1, WEBHOOK_CONCURRENCY))
+    stats["claimed"] = len(deliveries)
+    batches = group_deliveries(deliveries)
+    futures = [(items, executor.submit(post, url, items)) for url, items in batches]
+
+    for items, future in futures:
+        error = future.exception()
+        if error is not None:
+            print(f"[WARNING] Doručení webhooku na {items[0]['url']} selhalo: {error}")
+        stats[record_delivery(items, error, time.time())] += len(items)
+    return stats
+
+
+class WebhookDispatcher:
+    """
+    Dispečer webhooků webového procesu - vlákno se spustí až s prvním požadavkem s callbackem
+    (nebo po startu, pokud v DB čekají nedoručené webhooky).
+
+    # Navod k pouziti teto tridy.
+
+    1. Vytvor dispecera pro aplikaci.
+        webhooks = WebhookDispatcher(app)
+
+    2. Po ulozeni pozadavku s callbackem dispecera spust.
+        webhooks.start()
+
+    3. Po dokonceni pozadavku ho probud (process_request vola notify_webhooks).
+        notify_webhooks()
+    """
+
+    def __init__(
+        self,
+        app,
+        poll_seconds: float = WEBHOOK_POLL_SECONDS,
+        concurrency: int = WEBHOOK_CONCURRENCY,
+    ):
+        self.app = app
+        self.poll_seconds = poll_seconds
+        self.concurrency = max(1, concurrency)
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+
+    def start(self) -> None:
+        """Spustí vlákno dispečera, pokud ještě neběží (WEBHOOK_POLL_SECONDS=0 = vypnuto)."""
+        if self.poll_seconds <= 0:
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def resume(self) -> None:
+        """Spustí dispečera po startu procesu, pokud v DB čekají nedoručené webhooky."""
+        try:
+            with self.app.app_context():
+                pending = db.session.execute(
+                    select(func.count())
+                    .select_from(RequestData)
+                    .where(RequestData.callback_state == "pending")
+                ).scalar()
+        except Exception as e:
+            print(f"[ERROR] Kontrola čekajících webhooků selhala: {e}")
+            return
+        if pending:
+            print(f"[INFO] Čeká {pending} webhooků, spouštím dispečera.")
+            self.start()
+
+    def _run(self) -> None:
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="webhook"
+        ) as executor:
+            while not self.stop_event.is_set():
+                WEBHOOK_WAKE.wait(self.poll_seconds)
+                WEBHOOK_WAKE.clear()
+                try:
+                    with self.app.app_context():
+                        # plna davka - dalsi doruceni muzou cekat hned
+                        full_round = WEBHOOK_BATCH_SIZE * self.concurrency
+                        while dispatch_webhooks(executor)["claimed"] >= full_round:
+                            pass
+                except Exception as e:
+                    print(f"[ERROR] Doručování webhooků selhalo: {e}")
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        WEBHOOK_WAKE.set()
@@ -0,0 +1,101 @@
+"""
+Samostatný worker pro zpracování úloh z DB fronty.
+
+Spuštění (libovolný počet procesů, i na více strojích se sdílenou DB):
+    JOB_QUEUE_MODE=queue python -m flask_app.worker --concurrency 4
+
+Jednorázová údržba DB (např. z cronu):
+    python -m flask_app.worker --maintenance
+
+Jednorázové předehřátí cache pro ALLOWED_COMPANIES_IN_UI:
+    python -m flask_app.worker --warm-cache
+
+Jednorázové odeslání a zpracování dávek hodnocení (bez čekání na RATING_BATCH_MIN_ITEMS):
+    python -m flask_app.worker --batch-rating
+
+Worker, který navíc obstará pravidelné úlohy (údržba DB, dávkové hodnocení, předehřívání cache,
+webhooky) - stačí jeden, webové procesy pak mohou běžet s WEB_BACKGROUND_TASKS=0:
+    JOB_QUEUE_MODE=queue python -m flask_app.worker --background
+"""
+
+import argparse
+
+from flask_app.app import app, start_background_tasks
+from flask_app.batch_rating import run_batch_rating
+from flask_app.cache_warmer import CacheWarmer
+from flask_app.job_queue import run_worker
+from flask_app.maintenance import enable_incremental_vacuum, run_maintenance
+from flask_app.config import JOB_WORKER_CONCURRENCY, JOB_POLL_SECONDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker fronty požadavků STIN Zprávy")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=JOB_WORKER_CONCURRENCY,
+        help="Počet souběžně zpracovávaných úloh",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=JOB_POLL_SECONDS,
+        help="Prodleva v sekundách, když je fronta prázdná",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Ukončí se, jakmile je fronta prázdná",
+    )
+    parser.add_argument(
+        "--maintenance",
+        action="store_true",
+        help="Provede jeden běh údržby DB (retence, archivace, vacuum) a skončí",
+    )
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="Jednorázově převede SQLite DB na auto_vacuum=INCREMENTAL (plný VACUUM) a skončí",
+    )
+    parser.add_argument(
+        "--warm-cache",
+        action="store_true",
+        help="Provede jeden průchod předehřátí cache pro ALLOWED_COMPANIES_IN_UI a skončí",
+    )
+    parser.add_argument(
+        "--batch-rating",
+        action="store_true",
+        help="Zpracuje hotové dávky hodnocení, odešle všechny čekající položky a skončí",
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="Spustí i pravidelné úlohy na pozadí (údržba, dávkové hodnocení, předehřívání cache, webhooky)",
+    )
+    args = parser.parse_args()
+
+    if args.warm_cache:
+        CacheWarmer(app).run_once()
+        return
+
+    if args.batch_rating:
+        with app.app_context():
+            print(f"[INFO] Dávkové hodnocení: {run_batch_rating(force=True)}")
+        return
+
+    if args.enable_incremental_vacuum or args.maintenance:
+        with app.app_context():
+            if args.enable_incremental_vacuum:
+                enable_incremental_vacuum()
+            if args.maintenance:
+                run_maintenance()
+        return
+
+    if args.background:
+        start_background_tasks(web=False)
+
+    run_worker(app, concurrency=args.concurrency, poll_seconds=args.poll, once=args.once)
+
+
+if __name__ == "__main__":
+    main()